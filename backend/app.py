@@ -1,15 +1,28 @@
 import os
-import io
+import hashlib
 import json
-import re
+import math
 import threading
-from flask import Flask, request, jsonify
+import time
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from extractor import extract_sections_from_pdf_bytes, extract_skills_from_text
+import metrics
+from metrics import DOCUMENTS, PAIRS_PRUNED, PAIRS_SCORED, REQUEST_SECONDS, REGISTRY, stage
+from blocking import SkillIndex, partition
+from feature_store import SkillMatrix, SkillVocabulary
+from corpus import CorpusModel, job_key, resume_key
+from extractor import get_pdf_backend
+from bulk_import import extract_zip, import_pdfs, timed_extract, upload_path
+from parse_cache import ParseCache
+from questionnaire import QuestionIndex
+from rescore import Rescorer
+from storage import BackfillStorage, FileLock, TimedStorage, decode_position, encode_position, make_storage
+from tasks import QueueFull, TaskQueue
+from scoring import (SCORE_VERSION, ensure_job_features, ensure_resume_features, features_current, job_features,
+                     resume_features, score_counts_for_job, score_matrix, score_pair)
 from werkzeug.utils import secure_filename
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
 from datetime import datetime
 
 UPLOAD_FOLDER = 'uploads'
@@ -19,11 +32,10 @@ ALLOWED_EXT = {'pdf'}
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(DATA_FOLDER, exist_ok=True)
 
-RESUMES_FILE = os.path.join(DATA_FOLDER, 'resumes.json')
-JOBS_FILE = os.path.join(DATA_FOLDER, 'jobs.json')
-MATCHES_FILE = os.path.join(DATA_FOLDER, 'matches.json')
-
-lock = threading.Lock()
+# 'json' (resumes.json/jobs.json/matches.json) or 'sqlite' (data/app.db)
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json')
+CORPUS_MODEL_FILE = os.path.join(DATA_FOLDER, 'corpus_model.pkl')
+PARSE_CACHE_FOLDER = os.path.join(DATA_FOLDER, 'parse_cache')
 
 CORS(resources={r"/*": {"origins": "*"}})
 
@@ -31,6 +43,47 @@ CORS(resources={r"/*": {"origins": "*"}})
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 15 * 1024 * 1024  # 15MB
+app.config['BULK_MAX_CONTENT_LENGTH'] = 512 * 1024 * 1024  # /upload_resumes_bulk only
+# Async ingestion: /upload_resume returns 202 + task id and parses in a process pool
+app.config['ASYNC_INGEST'] = os.environ.get('ASYNC_INGEST', '0') == '1'
+app.config['INGEST_WORKERS'] = int(os.environ.get('INGEST_WORKERS', os.cpu_count() or 1))
+app.config['INGEST_QUEUE_SIZE'] = int(os.environ.get('INGEST_QUEUE_SIZE', 64))
+# niceness of the parsing processes: on a box with few cores they then leave
+# CPU to the request threads instead of taking a full share of it
+app.config['INGEST_NICE'] = int(os.environ.get('INGEST_NICE', 10))
+# parse results kept in memory (all of them are kept on disk)
+app.config['PARSE_CACHE_SIZE'] = int(os.environ.get('PARSE_CACHE_SIZE', 256))
+# requests slower than this many seconds are logged with their per-stage breakdown (0 = off)
+app.config['SLOW_REQUEST_SECONDS'] = float(os.environ.get('SLOW_REQUEST_SECONDS', 0))
+app.config['SLOW_REQUEST_LOG'] = os.environ.get('SLOW_REQUEST_LOG', os.path.join(DATA_FOLDER, 'slow_requests.log'))
+# Candidate blocking: fully score only pairs sharing at least BLOCKING_MIN_SHARED_SKILLS
+# skills (and, if BLOCKING_TOP_M > 0, only the top M of those by overlap)
+app.config['CANDIDATE_BLOCKING'] = os.environ.get('CANDIDATE_BLOCKING', '0') == '1'
+app.config['BLOCKING_MIN_SHARED_SKILLS'] = int(os.environ.get('BLOCKING_MIN_SHARED_SKILLS', 1))
+app.config['BLOCKING_TOP_M'] = int(os.environ.get('BLOCKING_TOP_M', 0))
+# 'lower_bound' stores pruned pairs scored without the cosine term, flagged lower_bound; 'skip' stores nothing
+app.config['BLOCKING_PRUNED'] = os.environ.get('BLOCKING_PRUNED', 'lower_bound')
+# matches scored under an older SCORE_VERSION are rescored when read and, if
+# RESCORE_ON_STARTUP, by a background pass in batches of RESCORE_BATCH_SIZE
+app.config['RESCORE_ON_STARTUP'] = os.environ.get('RESCORE_ON_STARTUP', '1') == '1'
+app.config['RESCORE_BATCH_SIZE'] = int(os.environ.get('RESCORE_BATCH_SIZE', 2000))
+# Set when several worker processes serve this data folder (e.g. MULTI_WORKER=1
+# gunicorn -w 4 app:app): storage locks and versions its files across processes,
+# each worker catches up with documents the others stored, only one runs the
+# startup rescore pass or refits the corpus model (the others reload it), and
+# async upload status is visible from every worker
+app.config['MULTI_WORKER'] = os.environ.get('MULTI_WORKER', '0') == '1'
+# /matches/changes: most changes per response, longest ?wait= long-poll, and how
+# often an event stream with nothing new sends a keep-alive
+app.config['CHANGES_MAX_BATCH'] = int(os.environ.get('CHANGES_MAX_BATCH', 1000))
+app.config['CHANGES_MAX_WAIT'] = float(os.environ.get('CHANGES_MAX_WAIT', 30))
+app.config['CHANGES_HEARTBEAT_SECONDS'] = float(os.environ.get('CHANGES_HEARTBEAT_SECONDS', 15))
+# how often a waiting /matches/changes request checks for new matches
+CHANGES_POLL_SECONDS = 0.1
+# most applicants per /chatbot_score/batch call, and the default share of the
+# questionnaire score in /employability_ranking (the rest is the match score)
+app.config['QUESTIONNAIRE_MAX_BATCH'] = int(os.environ.get('QUESTIONNAIRE_MAX_BATCH', 10000))
+app.config['QUESTIONNAIRE_WEIGHT'] = float(os.environ.get('QUESTIONNAIRE_WEIGHT', 0.3))
 
 QUESTIONS = [
     {
@@ -120,57 +173,185 @@ QUESTIONS = [
     }
 ]
 
-def _load_json(path):
-    if not os.path.exists(path):
-        return {}
-    with open(path, 'r', encoding='utf-8') as f:
-        try:
-            return json.load(f)
-        except:
-            return {}
+questions = QuestionIndex(QUESTIONS)
+
+# refuse to start with an unknown PDF_BACKEND rather than parse every upload into nothing
+get_pdf_backend()
+
+def _features_stale(record):
+    return not features_current(record.get('features'))
+
+# records as stored, for reads that do not look at their features
+stored = make_storage(STORAGE_BACKEND, DATA_FOLDER, shared=app.config['MULTI_WORKER'])
+# records stored before features existed (or with an older FEATURES_VERSION or
+# skills vocabulary) get them computed and saved the first time they are read
+store = TimedStorage(BackfillStorage(stored, {'resumes': ensure_resume_features, 'jobs': ensure_job_features},
+                                     _features_stale))
+
+def _build_indexes():
+    """
+    The skill index and the resident resume skill bitsets (for scoring jobs
+    against every resume), over the records whose features are current;
+    the others are added once they are read through store. The last value
+    tells whether there were any others.
+    """
+    resumes, jobs = stored.list_resumes(), stored.list_jobs()
+    current_resumes = {key: r for key, r in resumes.items() if not _features_stale(r)}
+    current_jobs = {key: j for key, j in jobs.items() if not _features_stale(j)}
+    return (SkillIndex.build(current_resumes, current_jobs), SkillMatrix.build(current_resumes, SkillVocabulary()),
+            len(current_resumes) < len(resumes) or len(current_jobs) < len(jobs))
+
+skill_index, resume_skills, _index_pending = _build_indexes()
+
+_indexed_versions = {}
+_index_sync = threading.Lock()
+
+def _sync_skill_index():
+    """
+    Index the documents missing from skill_index: with MULTI_WORKER, ones other
+    workers stored since this one last looked; after startup, ones whose features
+    were not current yet.
+    """
+    global _index_pending
+    for side in ('resumes', 'jobs'):
+        version = store.version(side)
+        if _indexed_versions.get(side) == version:
+            continue
+        with _index_sync:
+            records = store.list_resumes() if side == 'resumes' else store.list_jobs()
+            for doc_id in skill_index.missing(side, records):
+                skill_index.add(side, doc_id, records[doc_id]['features']['skills'])
+            _indexed_versions[side] = version
+    _index_pending = False
+
+# resume_id -> questionnaire score saved on the resume (see /chatbot_score/batch)
+questionnaire_scores = {}
+_questionnaire_version = None
+
+def _sync_questionnaire_scores():
+    """Load the saved questionnaire scores; with MULTI_WORKER, also ones other workers saved since."""
+    global questionnaire_scores, _questionnaire_version
+    version = store.version('resumes')
+    if version != _questionnaire_version:
+        questionnaire_scores = {rid: r['questionnaire']['total_score']
+                                for rid, r in stored.list_resumes().items() if 'questionnaire' in r}
+        _questionnaire_version = version
+
+_sync_questionnaire_scores()
+
+def _blocked(side, skills):
+    """Ids on `side` to fully score against a document with `skills`, or None for all of them."""
+    if not app.config['CANDIDATE_BLOCKING'] or not skills:
+        return None
+    if app.config['MULTI_WORKER'] or _index_pending:
+        # the resident bitsets and corpus vectors pick new documents up on their own
+        _sync_skill_index()
+    return skill_index.candidates(side, skills, app.config['BLOCKING_MIN_SHARED_SKILLS'],
+                                  app.config['BLOCKING_TOP_M'])
+
+def _corpus_documents():
+    """All stored documents keyed the way CorpusModel expects."""
+    docs = {}
+    for job_id, job in stored.list_jobs().items():
+        docs[job_key(job_id)] = job.get('job_text', '') or ''
+    for resume_id, rdata in stored.list_resumes().items():
+        docs[resume_key(resume_id)] = rdata.get('parsed', {}).get('combined_text', '') or ''
+    return docs
 
-def _save_json(path, data):
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+corpus = CorpusModel(CORPUS_MODEL_FILE, _corpus_documents, shared=app.config['MULTI_WORKER'])
+corpus.load_or_fit()
+
+parse_cache = ParseCache(PARSE_CACHE_FOLDER, app.config['PARSE_CACHE_SIZE'])
+ingest_queue = TaskQueue(app.config['INGEST_WORKERS'], app.config['INGEST_QUEUE_SIZE'],
+                         status_folder=os.path.join(DATA_FOLDER, 'tasks') if app.config['MULTI_WORKER'] else None,
+                         nice=app.config['INGEST_NICE'])
+rescorer = Rescorer(store, corpus, _blocked, app.config['RESCORE_BATCH_SIZE'],
+                    lock=FileLock(os.path.join(DATA_FOLDER, 'rescore.lock'), 'rescore') if app.config['MULTI_WORKER'] else None)
+if app.config['RESCORE_ON_STARTUP']:
+    rescorer.start()
+
+REGISTRY.gauge('parse_cache_hits_total', 'Parse cache hits.', lambda: parse_cache.hits, kind='counter')
+REGISTRY.gauge('parse_cache_misses_total', 'Parse cache misses.', lambda: parse_cache.misses, kind='counter')
+REGISTRY.gauge('ingest_queue_pending', 'Async uploads queued or running.', lambda: ingest_queue.stats()['pending'])
+REGISTRY.gauge('resume_skills_bytes', 'Memory held by the resident resume skill bitsets.',
+               lambda: resume_skills.stats()['allocated_bytes'])
+REGISTRY.gauge('matches_stale', 'Matches still scored under an older SCORE_VERSION (estimate).',
+               rescorer.stale_estimate)
+
+def _non_negative_int(value):
+    value = int(value)
+    if value < 0:
+        raise ValueError(value)
+    return value
+
+def _positive_int(value):
+    value = int(value)
+    if value < 1:
+        raise ValueError(value)
+    return value
+
+def _finite(value):
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(value)
+    return value
+
+def _seconds(value):
+    value = float(value)
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(value)
+    return value
+
+def _query_arg(name, convert, default=None, args=None):
+    """Parse a query string argument (from `args`, default request.args), raising ValueError with a readable message."""
+    value = (request.args if args is None else args).get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid {name}: {value!r}")
+
+def save_upload(stream, path):
+    """Stream an uploaded file to disk, hashing it on the way; returns its SHA-256."""
+    digest = hashlib.sha256()
+    # renamed into place when complete, so a parser never reads a half-written file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as out:
+        for chunk in iter(lambda: stream.read(1 << 16), b''):
+            digest.update(chunk)
+            out.write(chunk)
+    os.replace(tmp_path, path)
+    return digest.hexdigest()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.',1)[1].lower() in ALLOWED_EXT
 
-def compute_employability_score(resume: dict, job_text: str) -> float:
+def _pairwise_cosine(job_text: str, resume_text: str) -> float:
+    """TF-IDF cosine using the corpus model, or a two-document fit if it has none yet."""
+    vectorizer = corpus.vectorizer
+    try:
+        if vectorizer is not None:
+            X = vectorizer.transform([job_text or "", resume_text or ""])
+        else:
+            X = TfidfVectorizer(stop_words='english', max_features=2000).fit_transform([job_text or "", resume_text or ""])
+        return float(cosine_similarity(X[0], X[1])[0,0])
+    except Exception:
+        return 0.0
+
+def compute_employability_score(resume: dict, job_text: str, cos: float = None) -> float:
     """
     Score components:
       - skill_overlap_ratio (0..1) = matched_skills / required_skills
-      - tfidf_cosine (0..1) between job_text and resume['combined_text']
+      - tfidf_cosine (0..1) between job_text and resume['combined_text'],
+        using corpus-level IDF; pass `cos` when the stored vectors are at hand
       - title_keyword_boost (0..0.15) if job title keywords appear in resume
     Weighted sum normalized to 0..100:
       score = 100 * (0.6*skill_overlap + 0.35*cos_sim + title_boost)
     """
-    job_skills = extract_skills_from_text(job_text)
-    resume_skills = resume.get('skills', []) or []
-    job_skills_set = set([s.lower() for s in job_skills])
-    resume_skills_set = set([s.lower() for s in resume_skills])
-
-    matched = resume_skills_set.intersection(job_skills_set)
-    skill_overlap = (len(matched) / max(1, len(job_skills_set))) if job_skills_set else 0.0
-
-    txts = [job_text or "", resume.get('combined_text','') or ""]
-    try:
-        vec = TfidfVectorizer(stop_words='english', max_features=2000)
-        X = vec.fit_transform(txts)
-        cos = float(cosine_similarity(X[0], X[1])[0,0])
-    except Exception:
-        cos = 0.0
-
-    title_boost = 0.0
-    title_tokens = re.findall(r'\b([A-Za-z]{3,})\b', job_text)
-    for tk in ['developer','engineer','manager','analyst','designer','scientist','administrator','consultant']:
-        if re.search(r'\b' + re.escape(tk) + r'\b', job_text, re.IGNORECASE):
-            if re.search(r'\b' + re.escape(tk) + r'\b', resume.get('raw_text',''), re.IGNORECASE):
-                title_boost = 0.1
-                break
-    score_raw = 0.6*skill_overlap + 0.35*cos + title_boost
-    score = max(0.0, min(1.0, score_raw))
-    return round(score * 100.0, 2)
+    if cos is None:
+        cos = _pairwise_cosine(job_text, resume.get('combined_text','') or "")
+    return score_pair(job_features(job_text), resume_features(resume), cos)
 
 
 @app.route('/')
@@ -183,6 +364,9 @@ def upload_resume():
     """
     multipart/form-data: field 'resume' (PDF), optional 'applicant_name'
     Saves resume and computes matches against existing jobs.
+    With ASYNC_INGEST=1 (or ?async=1) returns 202 and a task id to poll at
+    /tasks/<task_id>; 429 when the ingestion queue is full. A file already
+    in the parse cache is never re-parsed and is always handled inline.
     """
     if 'resume' not in request.files:
         return jsonify({'error':'No resume file provided (field name resume).'}), 400
@@ -193,50 +377,212 @@ def upload_resume():
         return jsonify({'error':'Only PDF allowed'}), 400
 
     applicant_name = request.form.get('applicant_name') or request.form.get('name') or "Applicant"
-    filename = secure_filename(f.filename)
-    save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    f.save(save_path)
-
-    with open(save_path,'rb') as fh:
-        pdf_bytes = fh.read()
-
-    parsed = extract_sections_from_pdf_bytes(pdf_bytes)
-    resume_id = f"{applicant_name}_{int(datetime.utcnow().timestamp())}"
-
-    with lock:
-        resumes = _load_json(RESUMES_FILE)
-        resumes[resume_id] = {
-            'id': resume_id,
-            'name': applicant_name,
-            'filename': filename,
-            'uploaded_at': datetime.utcnow().isoformat(),
-            'parsed': parsed
-        }
-        _save_json(RESUMES_FILE, resumes)
-
-    matches_updated = []
-    with lock:
-        jobs = _load_json(JOBS_FILE)
-        matches = _load_json(MATCHES_FILE)
-        for job_id, job in jobs.items():
-            score = compute_employability_score(parsed, job.get('job_text',''))
-            matches.setdefault(job_id, {})
-            matches[job_id][resume_id] = {
-                'resume_id': resume_id,
+    save_path = upload_path(app.config['UPLOAD_FOLDER'], f.filename)
+    digest = save_upload(f.stream, save_path)
+    resume_id = new_resume_id(applicant_name)
+
+    parsed = parse_cache.get(digest)
+    if parsed is not None:
+        # duplicate upload: nothing left to parse, so no need to queue it
+        return jsonify(ingest_resume(resume_id, applicant_name, save_path, parsed, f.filename)), 201
+
+    if app.config['ASYNC_INGEST'] or request.args.get('async') == '1':
+        try:
+            task_id = queue_resume(save_path, digest, resume_id, applicant_name, f.filename)
+        except QueueFull:
+            return jsonify({'error':'Ingestion queue is full, retry later'}), 429
+        response = jsonify({'task_id': task_id, 'status': 'queued', 'resume_id': resume_id})
+        response.headers['Location'] = f"/tasks/{task_id}"
+        return response, 202
+
+    parsed, timings = timed_extract(save_path)
+    metrics.observe_stages(timings)
+    parse_cache.put(digest, parsed)
+    return jsonify(ingest_resume(resume_id, applicant_name, save_path, parsed, f.filename)), 201
+
+
+# ids handed out during the current second, so documents created together do not share one
+_new_ids = {'stamp': None, 'taken': set()}
+_new_ids_lock = threading.Lock()
+
+
+def _new_id(prefix, exists):
+    """<prefix>_<unix time>, with _2, _3, ... added while the id was handed out this second or exists(id)."""
+    stamp = int(datetime.utcnow().timestamp())
+    with _new_ids_lock:
+        if _new_ids['stamp'] != stamp:
+            _new_ids.update(stamp=stamp, taken=set())
+        taken = _new_ids['taken']
+        doc_id, n = f"{prefix}_{stamp}", 2
+        while doc_id in taken or exists(doc_id):
+            doc_id, n = f"{prefix}_{stamp}_{n}", n + 1
+        taken.add(doc_id)
+    return doc_id
+
+
+def new_resume_id(applicant_name):
+    """<name>_<unix time>, or <name>_<unix time>_2, _3, ... when that one is handed out or stored already."""
+    return _new_id(applicant_name, lambda resume_id: stored.get_resume(resume_id) is not None)
+
+
+def queue_resume(save_path, digest, resume_id, applicant_name, original_filename):
+    """Parse a saved upload on the ingestion queue, then ingest it; returns the task id (may raise QueueFull)."""
+    def on_parsed(result):
+        parsed, timings = result
+        metrics.observe_stages(timings)
+        parse_cache.put(digest, parsed)
+        return ingest_resume(resume_id, applicant_name, save_path, parsed, original_filename)
+    return ingest_queue.submit(timed_extract, (save_path,), on_parsed, info={'resume_id': resume_id})
+
+
+def ingest_resume(resume_id, applicant_name, path, parsed, original_filename=None):
+    """Store a parsed resume (uploaded as original_filename, stored at path) and score it against every job."""
+    filename = os.path.basename(path)
+    return ingest_resumes([{'resume_id': resume_id, 'name': applicant_name, 'filename': filename,
+                            'original_filename': original_filename or filename, 'parsed': parsed}])[0]
+
+
+def ingest_resumes(items):
+    """
+    Store parsed resumes (dicts with resume_id, name, filename: the stored
+    file in UPLOAD_FOLDER, optional original_filename: the name it was
+    uploaded as, and parsed) and
+    score all of them against every job in one batch, with one storage
+    write for the resumes and one for the matches.
+
+    Scoring runs on a snapshot of the jobs without holding any lock. The
+    resumes are committed before that snapshot is taken, so a job uploaded
+    concurrently either is in the snapshot or sees these resumes itself.
+
+    With CANDIDATE_BLOCKING only pairs sharing enough skills are fully
+    scored; see BLOCKING_PRUNED for the rest.
+    """
+    records = [{
+        'id': item['resume_id'],
+        'name': item['name'],
+        'filename': item['filename'],
+        'original_filename': item.get('original_filename', item['filename']),
+        'uploaded_at': datetime.utcnow().isoformat(),
+        'parsed': item['parsed'],
+        'features': resume_features(item['parsed'])
+    } for item in items]
+    for record in records:
+        skill_index.add('resumes', record['id'], record['features']['skills'])
+    resume_skills.add_records(records)
+    store.put_resumes(records)
+    resume_keys = [resume_key(r['id']) for r in records]
+    resume_texts = [r['parsed'].get('combined_text', '') or '' for r in records]
+    with stage('tfidf'):
+        corpus.add_many(resume_keys, resume_texts)
+
+    entries = []
+    results = [{'resume_id': r['id'], 'parsed': r['parsed'], 'matches_created': []} for r in records]
+    jobs = store.list_jobs()
+    job_ids = list(jobs.keys())
+    keep = [_blocked('jobs', r['features']['skills']) for r in records]
+    scored_ids = [j for j in job_ids if any(k is None or j in k for k in keep)]
+    column = {job_id: c for c, job_id in enumerate(scored_ids)}
+    # one snapshot for both sides: a background refit may have swapped
+    # the vocabulary since add_many
+    with stage('tfidf'):
+        matrix = corpus.matrix(resume_keys + [job_key(j) for j in scored_ids],
+                               resume_texts + [jobs[j].get('job_text','') or '' for j in scored_ids])
+    resume_matrix = matrix[:len(records)] if matrix is not None else None
+    job_matrix = matrix[len(records):] if matrix is not None else None
+    with stage('scoring'):
+        scores = score_matrix([r['features'] for r in records], resume_matrix,
+                              [jobs[j]['features'] for j in scored_ids], job_matrix)
+        bounds = None
+        if app.config['BLOCKING_PRUNED'] == 'lower_bound' and any(k is not None for k in keep):
+            # no TF-IDF involved, so cheap enough to compute for every pair
+            bounds = score_matrix([r['features'] for r in records], None,
+                                  [jobs[j]['features'] for j in job_ids], None)
+    exact = 0
+    for i, (record, result, row) in enumerate(zip(records, results, scores)):
+        for c, job_id in enumerate(job_ids):
+            if keep[i] is None or job_id in keep[i]:
+                score, lower_bound = row[column[job_id]], False
+                exact += 1
+            elif app.config['BLOCKING_PRUNED'] == 'lower_bound':
+                score, lower_bound = bounds[i][c], True
+            else:
+                continue
+            entry = {
+                'resume_id': record['id'],
                 'job_id': job_id,
-                'applicant_name': applicant_name,
+                'applicant_name': record['name'],
                 'score': score,
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': datetime.utcnow().isoformat(),
+                'score_version': SCORE_VERSION
             }
-            matches_updated.append({'job_id': job_id, 'resume_id': resume_id, 'score': score})
-        _save_json(MATCHES_FILE, matches)
+            created = {'job_id': job_id, 'resume_id': record['id'], 'score': score}
+            if lower_bound:
+                entry['lower_bound'] = created['lower_bound'] = True
+            entries.append(entry)
+            result['matches_created'].append(created)
+    store.put_matches(entries)
+    DOCUMENTS.inc(len(records), kind='resume')
+    PAIRS_SCORED.inc(exact)
+    PAIRS_PRUNED.inc(len(records) * len(job_ids) - exact)
+    return results
 
-    response = {
-        'resume_id': resume_id,
-        'parsed': parsed,
-        'matches_created': matches_updated
-    }
-    return jsonify(response), 201
+
+@app.route('/upload_resumes_bulk', methods=['POST'])
+def upload_resumes_bulk():
+    """
+    multipart/form-data: any number of files under 'resumes', each a PDF or
+    a zip of PDFs. All files are parsed in the worker process pool, then
+    stored and scored against every job in one batch. Returns a per-file
+    report with timings and errors.
+    """
+    request.max_content_length = app.config['BULK_MAX_CONTENT_LENGTH']
+    files = request.files.getlist('resumes')
+    if not files:
+        return jsonify({'error':'No files provided (field name resumes).'}), 400
+
+    saved = []
+    errors = []
+    for f in files:
+        filename = secure_filename(f.filename or '')
+        if filename.lower().endswith('.zip'):
+            unpacked, failed = extract_zip(f.stream, app.config['UPLOAD_FOLDER'])
+            saved += unpacked
+            errors += failed
+        elif allowed_file(filename):
+            save_path = upload_path(app.config['UPLOAD_FOLDER'], filename)
+            f.save(save_path)
+            saved.append((save_path, f.filename))
+        else:
+            errors.append({'filename': f.filename, 'status': 'error', 'error': 'Only PDF or zip allowed'})
+
+    report = import_pdfs(saved, ingest_resumes, parse_cache, new_resume_id, executor=ingest_queue.executor())
+    report['results'] += errors
+    report['files'] += len(errors)
+    report['errors'] += len(errors)
+    return jsonify(report), 201
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage latency histograms and counters in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/parse_cache/stats', methods=['GET'])
+def parse_cache_stats():
+    return jsonify(parse_cache.stats()), 200
+
+
+@app.route('/tasks/<task_id>', methods=['GET'])
+def task_status(task_id):
+    """
+    Status of an async upload: queued, running, done (with the same body
+    /upload_resume returns synchronously under 'result') or failed.
+    """
+    task = ingest_queue.status(task_id)
+    if task is None:
+        return jsonify({'error':'Unknown task id'}), 404
+    return jsonify(task), 200
 
 
 @app.route('/upload_job', methods=['POST'])
@@ -249,8 +595,11 @@ def upload_job():
     job_text = ""
     title = request.form.get('title') or request.form.get('job_title') or ""
     if request.is_json:
-        job_text = request.json.get('job_text','')
-        title = title or request.json.get('title','')
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Invalid JSON body'}), 400
+        job_text = data.get('job_text','')
+        title = title or data.get('title','')
     elif 'job' in request.files:
         blob = request.files['job'].read()
         try:
@@ -261,61 +610,168 @@ def upload_job():
         job_text = request.form.get('job_text')
     else:
         return jsonify({'error':'No job text provided: send job_text in form or JSON, or upload job file under "job"'}), 400
+    return jsonify(create_job(title, job_text)), 201
+
+
+def new_job_id():
+    """job_<unix time>, or job_<unix time>_2, _3, ... for later jobs in the same second."""
+    return _new_id('job', lambda job_id: stored.get_job(job_id) is not None)
+
 
-    job_id = f"job_{int(datetime.utcnow().timestamp())}"
+def create_job(title, job_text):
+    """Store a job and score it against every resume; returns the /upload_job body."""
+    job_id = new_job_id()
     job_entry = {
         'id': job_id,
         'title': title,
         'job_text': job_text,
-        'uploaded_at': datetime.utcnow().isoformat()
+        'uploaded_at': datetime.utcnow().isoformat(),
+        'features': job_features(job_text)
     }
 
-    with lock:
-        jobs = _load_json(JOBS_FILE)
-        jobs[job_id] = job_entry
-        _save_json(JOBS_FILE, jobs)
-
-        resumes = _load_json(RESUMES_FILE)
-        matches = _load_json(MATCHES_FILE)
-        matches.setdefault(job_id, {})
-        for resume_id, rdata in resumes.items():
-            parsed = rdata.get('parsed', {})
-            score = compute_employability_score(parsed, job_text)
-            matches[job_id][resume_id] = {
-                'resume_id': resume_id,
-                'job_id': job_id,
-                'applicant_name': rdata.get('name',''),
-                'score': score,
-                'timestamp': datetime.utcnow().isoformat()
-            }
-        _save_json(MATCHES_FILE, matches)
+    # commit the job before snapshotting the resumes (see ingest_resumes)
+    skill_index.add('jobs', job_id, job_entry['features']['skills'])
+    store.put_job(job_entry)
+    with stage('tfidf'):
+        corpus.add(job_key(job_id), job_text)
+
+    resumes = store.list_resumes()
+    keep = _blocked('resumes', job_entry['features']['skills'])
+    resume_ids, pruned_ids = partition(list(resumes), keep) if keep is not None else (list(resumes), [])
+    # job and resumes from one snapshot, in case a refit swapped the vocabulary
+    with stage('tfidf'):
+        matrix = corpus.matrix([job_key(job_id)] + [resume_key(r) for r in resume_ids],
+                               [job_text] + [resumes[r].get('parsed', {}).get('combined_text', '') or '' for r in resume_ids])
+    job_vec = matrix[0] if matrix is not None else None
+    resume_matrix = matrix[1:] if matrix is not None else None
+    job_skills = job_entry['features']['skills']
+    with stage('scoring'):
+        rows = resume_skills.rows(resume_ids, resumes)
+        scores = score_counts_for_job(job_entry['features'], job_vec, resume_skills.shared_counts(rows, job_skills),
+                                      resume_skills.title_masks(rows), resume_matrix)
+    entries = [{
+        'resume_id': resume_id,
+        'job_id': job_id,
+        'applicant_name': resumes[resume_id].get('name',''),
+        'score': score,
+        'timestamp': datetime.utcnow().isoformat(),
+        'score_version': SCORE_VERSION
+    } for resume_id, score in zip(resume_ids, scores)]
+    if pruned_ids and app.config['BLOCKING_PRUNED'] == 'lower_bound':
+        with stage('scoring'):
+            rows = resume_skills.rows(pruned_ids, resumes)
+            bounds = score_counts_for_job(job_entry['features'], None, resume_skills.shared_counts(rows, job_skills),
+                                          resume_skills.title_masks(rows), None)
+        entries += [{
+            'resume_id': resume_id,
+            'job_id': job_id,
+            'applicant_name': resumes[resume_id].get('name',''),
+            'score': score,
+            'timestamp': datetime.utcnow().isoformat(),
+            'score_version': SCORE_VERSION,
+            'lower_bound': True
+        } for resume_id, score in zip(pruned_ids, bounds)]
+    store.put_matches(entries)
+    DOCUMENTS.inc(kind='job')
+    PAIRS_SCORED.inc(len(resume_ids))
+    PAIRS_PRUNED.inc(len(pruned_ids))
+    return {'job_id': job_id, 'title': title, 'matches_count': len(entries)}
+
+
+def _project(record, fields):
+    """Keep only `fields` of a record; a dotted field like parsed.skills reaches one level down."""
+    out = {}
+    for field in fields:
+        head, _, rest = field.partition('.')
+        if head not in record:
+            continue
+        if not rest:
+            out[head] = record[head]
+        elif isinstance(record[head], dict) and rest in record[head] and out.get(head) is not record[head]:
+            out.setdefault(head, {})[rest] = record[head][rest]
+    return out
+
+
+def collection_etag(collection, query_string: bytes):
+    """ETag of a /resumes or /jobs response: the collection's version and the query."""
+    return hashlib.sha1(store.version(collection).encode() + b'?' + query_string).hexdigest()[:20]
+
 
-    return jsonify({'job_id': job_id, 'title': title, 'matches_count': len(matches.get(job_id, {}))}), 201
+def collection_page(collection, args):
+    """(records, next_cursor) for /resumes or /jobs query args; raises ValueError on bad ones."""
+    limit = _query_arg('limit', _positive_int, args=args)
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()]
+    records, next_cursor = store.records_page(collection, limit, args.get('cursor'))
+    if fields:
+        records = {key: _project(record, fields) for key, record in records.items()}
+    return records, next_cursor
+
+
+def _list_collection(collection):
+    """
+    GET /resumes and /jobs as {id: record}, paged in upload order.
+    Optional query params: fields (comma separated, e.g.
+    fields=name,uploaded_at,parsed.skills), limit, cursor (from the
+    X-Next-Cursor header of the previous page).
+    Responses carry an ETag derived from the collection's version; a request
+    whose If-None-Match still matches gets a 304 without reading storage.
+    """
+    etag = collection_etag(collection, request.query_string)
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    try:
+        records, next_cursor = collection_page(collection, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = jsonify(records)
+    response.set_etag(etag)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 
 @app.route('/jobs', methods=['GET'])
 def list_jobs():
-    with lock:
-        jobs = _load_json(JOBS_FILE)
-    return jsonify(jobs), 200
+    return _list_collection('jobs')
 
 
 @app.route('/resumes', methods=['GET'])
 def list_resumes():
-    with lock:
-        resumes = _load_json(RESUMES_FILE)
-    return jsonify(resumes), 200
+    return _list_collection('resumes')
 
 
 @app.route('/job_matches/<job_id>', methods=['GET'])
 def job_matches(job_id):
     """
     Return ranked list of applicants for a job_id
+    Optional query params: limit, offset, min_score, cursor (from the
+    X-Next-Cursor header of the previous page).
     """
-    with lock:
-        matches = _load_json(MATCHES_FILE).get(job_id, {})
-    sorted_list = sorted(matches.values(), key=lambda x: x.get('score',0), reverse=True)
-    return jsonify(sorted_list), 200
+    try:
+        sorted_list, next_cursor = job_matches_page(job_id, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = jsonify(sorted_list)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
+
+def job_matches_page(job_id, args):
+    """(entries, next_cursor) for /job_matches query args; raises ValueError on bad ones."""
+    limit = _query_arg('limit', _positive_int, args=args)
+    offset = _query_arg('offset', _non_negative_int, 0, args=args)
+    min_score = _query_arg('min_score', _finite, args=args)
+    cursor = args.get('cursor')
+    rescorer.ensure_job(job_id)
+    return store.job_matches_page(job_id, limit, offset, min_score, cursor)
+
+
+def resume_matches_list(resume_id):
+    rescorer.ensure_resume(resume_id)
+    return store.resume_matches(resume_id)
 
 
 @app.route('/resume_matches/<resume_id>', methods=['GET'])
@@ -323,40 +779,276 @@ def resume_matches(resume_id):
     """
     Return list of jobs and scores for a given resume_id
     """
-    with lock:
-        matches = _load_json(MATCHES_FILE)
-    out = []
-    for job_id, job_matches in matches.items():
-        if resume_id in job_matches:
-            out.append(job_matches[resume_id])
-    out = sorted(out, key=lambda x: x.get('score',0), reverse=True)
-    return jsonify(out), 200
+    return jsonify(resume_matches_list(resume_id)), 200
+
+
+@app.route('/matches/changes', methods=['GET'])
+def matches_changes():
+    """
+    Matches inserted or updated since a cursor, oldest first, so a client
+    can keep rankings in sync without re-reading them:
+    {"changes": [entry, ...], "cursor": "...", "more": true|false}.
+    Pass cursor as since= on the next call; since=now starts from the
+    latest change and no since from the first. Optional query params:
+    job_id, resume_id, limit (at most CHANGES_MAX_BATCH), wait (seconds to
+    hold the request while there is nothing new, at most CHANGES_MAX_WAIT).
+
+    With Accept: text/event-stream (as EventSource sends) the response is
+    a Server-Sent Events stream: one 'match' event per change, whose id is
+    the cursor after it, so a reconnect resumes from Last-Event-ID.
+    """
+    stream = wants_event_stream(request.headers.get('Accept'))
+    try:
+        query = changes_query(request.args, request.headers.get('Last-Event-ID') if stream else None)
+        wait = changes_wait(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if stream:
+        return Response(change_events(query), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    return jsonify(poll_changes(query, wait)), 200
+
+
+def wants_event_stream(accept):
+    return (accept or '').split(',')[0].split(';')[0].strip() == 'text/event-stream'
+
+
+def changes_query(args, last_event_id=None):
+    """The store.match_changes arguments for /matches/changes query args; raises ValueError on bad ones."""
+    since = last_event_id or args.get('since')
+    max_batch = app.config['CHANGES_MAX_BATCH']
+    return {
+        'after': store.last_change_seq() if since == 'now' else (decode_position(since) if since else 0),
+        'limit': min(_query_arg('limit', _positive_int, max_batch, args=args), max_batch),
+        'job_id': args.get('job_id'),
+        'resume_id': args.get('resume_id'),
+    }
+
+
+def changes_wait(args):
+    """The /matches/changes long-poll time in seconds (at most CHANGES_MAX_WAIT); raises ValueError on a bad one."""
+    return min(_query_arg('wait', _seconds, 0.0, args=args), app.config['CHANGES_MAX_WAIT'])
+
+
+def next_changes(query):
+    """One batch of changes; moves query['after'] past it."""
+    entries, query['after'], more = store.match_changes(**query)
+    return {'changes': entries, 'cursor': encode_position(query['after']), 'more': more}
+
+
+def poll_changes(query, wait=0.0):
+    """next_changes, waiting up to `wait` seconds for a change when there is none yet."""
+    deadline = time.monotonic() + wait
+    while True:
+        # taken before reading, so a write landing in between ends the wait
+        version = store.version('matches')
+        body = next_changes(query)
+        if body['changes'] or time.monotonic() >= deadline:
+            return body
+        while store.version('matches') == version and time.monotonic() < deadline:
+            time.sleep(CHANGES_POLL_SECONDS)
+
+
+def change_event(entry):
+    return f"id: {encode_position(entry['seq'])}\nevent: match\ndata: {json.dumps(entry, sort_keys=True)}\n\n"
+
+
+def change_events(query):
+    """Server-Sent Events for /matches/changes, until the client goes away."""
+    more = False
+    while True:
+        # a full batch means more are waiting: fetch them without a pause
+        body = poll_changes(query, 0 if more else app.config['CHANGES_HEARTBEAT_SECONDS'])
+        more = body['more']
+        if not body['changes']:
+            yield ": keep-alive\n\n"
+        for entry in body['changes']:
+            yield change_event(entry)
+
+
+@app.route('/rescore', methods=['GET', 'POST'])
+def rescore_status():
+    """
+    GET: progress of the background rescore pass and how many matches are
+    stored per score_version. POST: start a pass (202; 409 if one is running).
+    """
+    if request.method == 'POST':
+        if not rescorer.start():
+            return jsonify({'error': 'a rescore pass is already running'}), 409
+        return jsonify(rescorer.stats()), 202
+    return jsonify(rescore_report()), 200
+
+
+def rescore_report():
+    versions = store.match_versions()
+    current = versions.get(SCORE_VERSION, 0)
+    return dict(rescorer.stats(),
+                matches={'total': sum(versions.values()), 'current': current,
+                         'stale': sum(versions.values()) - current},
+                versions={v or 'unversioned': n for v, n in versions.items()})
+
+
+@app.route("/chatbot_questions", methods=["GET"])
+def chatbot_questions():
+    """The questionnaire, with the ids answers may use instead of the question text."""
+    return jsonify(questions.describe()), 200
+
+
 @app.route("/chatbot_score", methods=["POST"])
 def chatbot_score():
-    data = request.get_json(force=True)
-    answers = data.get("answers", [])
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid JSON body'}), 400
+    try:
+        return jsonify(questionnaire_score(data.get("answers", [])))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    total = 0
-    for item in answers:
-        q = item.get("question")
-        idx = item.get("option_index", 0)
 
-        for qset in QUESTIONS:
-            if qset["q"] == q:
-                total += qset["values"][idx]
+def questionnaire_score(answers):
+    scores, errors = questions.score([answers])
+    if errors[0]:
+        raise ValueError(errors[0])
+    return {"total_score": scores[0]}
 
-    MAX_SCORE = sum([max(q["values"]) for q in QUESTIONS])  # 160
 
-    normalized = (total / MAX_SCORE) * 100
-    normalized = round(normalized, 2)
+@app.route("/chatbot_score/batch", methods=["POST"])
+def chatbot_score_batch():
+    """
+    Score many applicants' questionnaires in one call. JSON body:
+      {"applicants": [{"resume_id": "...", "answers": [...]}, ...], "persist": false}
+    Answers are as for /chatbot_score; "question_id" (see /chatbot_questions)
+    may replace the question text. Returns one result per applicant, in
+    order, with total_score or error. With persist, each score is saved on
+    its resume record (resume_id required) for /employability_ranking.
+    """
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid JSON body'}), 400
+    try:
+        return jsonify(questionnaire_batch(data.get('applicants'), bool(data.get('persist')))), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def questionnaire_batch(applicants, persist=False):
+    """The /chatbot_score/batch body; raises ValueError on a malformed request."""
+    if not isinstance(applicants, list):
+        raise ValueError('applicants must be a list')
+    if len(applicants) > app.config['QUESTIONNAIRE_MAX_BATCH']:
+        raise ValueError(f"at most {app.config['QUESTIONNAIRE_MAX_BATCH']} applicants per call")
+    if not all(isinstance(a, dict) for a in applicants):
+        raise ValueError('each applicant must be an object')
+    scores, errors = questions.score([a.get('answers', []) for a in applicants])
+    results = []
+    for applicant, score, error in zip(applicants, scores, errors):
+        result = {'total_score': score} if error is None else {'error': error}
+        if 'resume_id' in applicant:
+            result['resume_id'] = applicant['resume_id']
+        results.append(result)
+    persisted = save_questionnaire_scores(applicants, results) if persist else 0
+    return {'results': results, 'scored': errors.count(None), 'failed': len(errors) - errors.count(None),
+            'persisted': persisted}
+
+
+def save_questionnaire_scores(applicants, results):
+    """Save scored results on their resume records (one storage write); marks each result persisted or not."""
+    scored_at = datetime.utcnow().isoformat()
+    records = []
+    for applicant, result in zip(applicants, results):
+        if 'error' in result:
+            continue
+        resume = store.get_resume(result['resume_id']) if isinstance(result.get('resume_id'), str) else None
+        result['persisted'] = resume is not None
+        if resume is not None:
+            records.append(dict(resume, questionnaire={
+                'total_score': result['total_score'],
+                'answers': applicant.get('answers', []),
+                'questions_version': questions.version,
+                'scored_at': scored_at,
+            }))
+    store.put_resumes(records)
+    questionnaire_scores.update((r['id'], r['questionnaire']['total_score']) for r in records)
+    return len(records)
+
+
+@app.route('/employability_ranking/<job_id>', methods=['GET'])
+def employability_ranking(job_id):
+    """
+    Applicants for a job ranked by a combined score: (1 - w) * match score
+    + w * saved questionnaire score (0 for applicants without one), with
+    w = questionnaire_weight (default QUESTIONNAIRE_WEIGHT).
+    Optional query params: questionnaire_weight, limit, offset, min_score
+    (on the combined score).
+    """
+    try:
+        return jsonify(employability_ranking_page(job_id, request.args)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def _fraction(value):
+    value = float(value)
+    if not 0 <= value <= 1:
+        raise ValueError(value)
+    return value
+
+
+def employability_ranking_page(job_id, args):
+    """The /employability_ranking entries for query args; raises ValueError on bad ones."""
+    weight = _query_arg('questionnaire_weight', _fraction, app.config['QUESTIONNAIRE_WEIGHT'], args=args)
+    limit = _query_arg('limit', _non_negative_int, args=args)
+    offset = _query_arg('offset', _non_negative_int, 0, args=args)
+    min_score = _query_arg('min_score', _finite, args=args)
+    rescorer.ensure_job(job_id)
+    if app.config['MULTI_WORKER']:
+        _sync_questionnaire_scores()
+    scores = questionnaire_scores
+    ranked = []
+    for entry in store.job_matches(job_id):
+        questionnaire = scores.get(entry['resume_id'])
+        combined = round((1 - weight) * entry.get('score', 0) + weight * (questionnaire or 0.0), 2)
+        if min_score is None or combined >= min_score:
+            ranked.append(dict(entry, questionnaire_score=questionnaire, combined_score=combined))
+    # stable: ties keep the match ranking
+    ranked.sort(key=lambda e: -e['combined_score'])
+    return ranked[offset:] if limit is None else ranked[offset:offset + limit]
+
+
+@app.before_request
+def start_request_timer():
+    metrics.start_request()
+
+
+def log_slow_request(method, path, status, seconds, stages):
+    entry = {
+        'at': datetime.utcnow().isoformat(),
+        'method': method,
+        'path': path,
+        'status': status,
+        'seconds': round(seconds, 4),
+        'stages': {name: round(s, 4) for name, s in sorted(stages.items(), key=lambda kv: -kv[1])},
+    }
+    try:
+        with open(app.config['SLOW_REQUEST_LOG'], 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Error writing slow request log: {e}")
 
-    return jsonify({"total_score": normalized})
 
 @app.after_request
 def after_request(response):
+    seconds, stages = metrics.finish_request()
+    if stages is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(seconds, method=request.method, endpoint=endpoint)
+        threshold = app.config['SLOW_REQUEST_SECONDS']
+        if threshold and seconds > threshold:
+            log_slow_request(request.method, request.full_path.rstrip('?'), response.status_code, seconds, stages)
     response.headers.add("Access-Control-Allow-Origin", "*")
     response.headers.add("Access-Control-Allow-Headers", "Content-Type")
     response.headers.add("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+    response.headers.add("Access-Control-Expose-Headers", "ETag, X-Next-Cursor")
     return response
 
 
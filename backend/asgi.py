@@ -0,0 +1,414 @@
+"""
+Async serving mode: the same routes and JSON bodies as app.py, on FastAPI.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Importing app.py gives this mode the same storage, corpus model, indexes
+and ingestion queue. Handlers never block the event loop: PDF parsing
+runs in the ingestion queue's process pool, and scoring and storage,
+which need that in-process state, run in the threadpool. A slow upload
+therefore holds no worker while reads keep being served.
+"""
+import asyncio
+import json
+import os
+import shutil
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import MutableHeaders, UploadFile
+from werkzeug.utils import secure_filename
+
+import app as core
+import metrics
+from bulk_import import extract_zip, import_pdfs, timed_extract, upload_path
+from metrics import REGISTRY, REQUEST_SECONDS
+from tasks import QueueFull
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor',
+}
+
+
+class FlaskJSONResponse(JSONResponse):
+    """Serialized like flask.jsonify (sorted keys, compact, ASCII, trailing newline)."""
+
+    def render(self, content) -> bytes:
+        return (json.dumps(content, sort_keys=True, separators=(',', ':')) + "\n").encode('utf-8')
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    yield
+    # forked pool workers inherit the listening socket; do not leave them behind
+    await run_in_threadpool(core.ingest_queue.shutdown)
+
+
+app = FastAPI(title='resume-matcher API', default_response_class=FlaskJSONResponse,
+              docs_url=None, redoc_url=None, openapi_url=None, lifespan=lifespan)
+
+
+def _error(message, status):
+    return FlaskJSONResponse({'error': message}, status_code=status)
+
+
+def _is_json(request: Request) -> bool:
+    mimetype = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    return mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match header, like werkzeug's contains_weak."""
+    tags = [t.strip() for t in (if_none_match or '').split(',') if t.strip()]
+    return '*' in tags or any((t[2:] if t.startswith('W/') else t) == f'"{etag}"' for t in tags)
+
+
+async def _parse(save_path):
+    """timed_extract in the shared process pool."""
+    loop = asyncio.get_running_loop()
+    parsed, timings = await loop.run_in_executor(core.ingest_queue.executor(), timed_extract, save_path)
+    metrics.observe_stages(timings)
+    return parsed
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+def _body_limit(path: str) -> int:
+    return core.app.config['BULK_MAX_CONTENT_LENGTH' if path == '/upload_resumes_bulk' else 'MAX_CONTENT_LENGTH']
+
+
+class RequestMiddleware:
+    """
+    Answers CORS preflights, adds the CORS headers, records request metrics
+    (up to the response headers, like Flask's after_request) and caps request
+    bodies: a declared Content-Length over the limit is refused up front, and
+    a chunked body is counted as it streams in, ending in a 413 once it passes
+    the limit. Plain ASGI rather than @app.middleware('http'), which runs
+    every request in an extra task and pipes the response through a stream.
+    """
+
+    def __init__(self, asgi_app):
+        self.app = asgi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        if scope['method'] == 'OPTIONS':
+            return await Response(status_code=200, headers=CORS_HEADERS)(scope, receive, send)
+        limit = _body_limit(scope['path'])
+        length = dict(scope['headers']).get(b'content-length', b'')
+        if length.isdigit() and int(length) > limit:
+            return await self._respond(scope, receive, send, _error('Upload too large', 413))
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    raise BodyTooLarge()
+            return message
+
+        await self._respond(scope, limited_receive, send, self.app)
+
+    async def _respond(self, scope, receive, send, asgi_app):
+        metrics.start_request()
+        started = False
+
+        async def tracked_send(message):
+            nonlocal started
+            if message['type'] == 'http.response.start':
+                started = True
+                MutableHeaders(scope=message).update(CORS_HEADERS)
+                await self._record(scope, message['status'])
+            await send(message)
+
+        try:
+            await asgi_app(scope, receive, tracked_send)
+        except BodyTooLarge:
+            if started:
+                raise
+            await _error('Upload too large', 413)(scope, receive, tracked_send)
+
+    async def _record(self, scope, status):
+        seconds, stages = metrics.finish_request()
+        if stages is None:
+            return
+        route = scope.get('route')
+        # Flask's rule syntax, so both modes report the same endpoint labels
+        endpoint = route.path.replace('{', '<').replace('}', '>') if route is not None else 'unmatched'
+        REQUEST_SECONDS.observe(seconds, method=scope['method'], endpoint=endpoint)
+        threshold = core.app.config['SLOW_REQUEST_SECONDS']
+        if threshold and seconds > threshold:
+            query = scope['query_string'].decode('latin-1')
+            path = scope['path'] + (f"?{query}" if query else '')
+            await run_in_threadpool(core.log_slow_request, scope['method'], path, status, seconds, stages)
+
+
+app.add_middleware(RequestMiddleware)
+
+
+@app.get('/')
+async def index():
+    return FlaskJSONResponse({'status': 'resume-matcher API running'})
+
+
+@app.post('/upload_resume')
+async def upload_resume(request: Request):
+    """Same contract as app.upload_resume; the PDF is parsed in the process pool."""
+    form = await request.form()
+    f = form.get('resume')
+    if not isinstance(f, UploadFile):
+        return _error('No resume file provided (field name resume).', 400)
+    if not f.filename:
+        return _error('Empty filename', 400)
+    if not core.allowed_file(f.filename):
+        return _error('Only PDF allowed', 400)
+
+    applicant_name = form.get('applicant_name') or form.get('name') or "Applicant"
+    save_path = upload_path(core.app.config['UPLOAD_FOLDER'], f.filename)
+    digest = await run_in_threadpool(core.save_upload, f.file, save_path)
+    resume_id = await run_in_threadpool(core.new_resume_id, applicant_name)
+
+    parsed = await run_in_threadpool(core.parse_cache.get, digest)
+    if parsed is None and (core.app.config['ASYNC_INGEST'] or request.query_params.get('async') == '1'):
+        try:
+            task_id = await run_in_threadpool(core.queue_resume, save_path, digest, resume_id, applicant_name,
+                                              f.filename)
+        except QueueFull:
+            return _error('Ingestion queue is full, retry later', 429)
+        return FlaskJSONResponse({'task_id': task_id, 'status': 'queued', 'resume_id': resume_id},
+                                 status_code=202, headers={'Location': f"/tasks/{task_id}"})
+    if parsed is None:
+        parsed = await _parse(save_path)
+        await run_in_threadpool(core.parse_cache.put, digest, parsed)
+    result = await run_in_threadpool(core.ingest_resume, resume_id, applicant_name, save_path, parsed, f.filename)
+    return FlaskJSONResponse(result, status_code=201)
+
+
+def _save_bulk_files(files):
+    """Write uploaded PDFs and unpack zips into the upload folder; returns (files for import_pdfs, errors)."""
+    saved, errors = [], []
+    for f in files:
+        filename = secure_filename(f.filename or '')
+        if filename.lower().endswith('.zip'):
+            unpacked, failed = extract_zip(f.file, core.app.config['UPLOAD_FOLDER'])
+            saved += unpacked
+            errors += failed
+        elif core.allowed_file(filename):
+            save_path = upload_path(core.app.config['UPLOAD_FOLDER'], filename)
+            with open(save_path, 'wb') as out:
+                shutil.copyfileobj(f.file, out, 1 << 16)
+            saved.append((save_path, f.filename))
+        else:
+            errors.append({'filename': f.filename, 'status': 'error', 'error': 'Only PDF or zip allowed'})
+    return saved, errors
+
+
+@app.post('/upload_resumes_bulk')
+async def upload_resumes_bulk(request: Request):
+    """Same contract as app.upload_resumes_bulk."""
+    form = await request.form(max_files=100000)
+    files = [f for f in form.getlist('resumes') if isinstance(f, UploadFile)]
+    if not files:
+        return _error('No files provided (field name resumes).', 400)
+    saved, errors = await run_in_threadpool(_save_bulk_files, files)
+    report = await run_in_threadpool(import_pdfs, saved, core.ingest_resumes, core.parse_cache, core.new_resume_id,
+                                     executor=core.ingest_queue.executor())
+    report['results'] += errors
+    report['files'] += len(errors)
+    report['errors'] += len(errors)
+    return FlaskJSONResponse(report, status_code=201)
+
+
+@app.get('/metrics')
+async def prometheus_metrics():
+    return Response(REGISTRY.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.get('/parse_cache/stats')
+async def parse_cache_stats():
+    return FlaskJSONResponse(core.parse_cache.stats())
+
+
+@app.get('/tasks/{task_id}')
+async def task_status(task_id: str):
+    # with MULTI_WORKER, another worker's task is read from disk
+    task = await run_in_threadpool(core.ingest_queue.status, task_id)
+    if task is None:
+        return _error('Unknown task id', 404)
+    return FlaskJSONResponse(task)
+
+
+@app.post('/upload_job')
+async def upload_job(request: Request):
+    """Same contract as app.upload_job; scoring runs in the threadpool."""
+    if _is_json(request):
+        try:
+            data = json.loads(await request.body())
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return _error('Invalid JSON body', 400)
+        title = data.get('title', '')
+        job_text = data.get('job_text', '')
+    else:
+        form = await request.form()
+        title = form.get('title') or form.get('job_title') or ""
+        if isinstance(form.get('job'), UploadFile):
+            job_text = (await form['job'].read()).decode('utf-8', errors='ignore')
+        elif 'job_text' in form:
+            job_text = form.get('job_text')
+        else:
+            return _error('No job text provided: send job_text in form or JSON, or upload job file under "job"', 400)
+    result = await run_in_threadpool(core.create_job, title, job_text)
+    return FlaskJSONResponse(result, status_code=201)
+
+
+async def _list_collection(request: Request, collection: str):
+    etag = await run_in_threadpool(core.collection_etag, collection, request.url.query.encode('latin-1'))
+    if _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': f'"{etag}"'})
+    try:
+        records, next_cursor = await run_in_threadpool(core.collection_page, collection, request.query_params)
+    except ValueError as e:
+        return _error(str(e), 400)
+    headers = {'ETag': f'"{etag}"'}
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return FlaskJSONResponse(records, headers=headers)
+
+
+@app.get('/jobs')
+async def list_jobs(request: Request):
+    return await _list_collection(request, 'jobs')
+
+
+@app.get('/resumes')
+async def list_resumes(request: Request):
+    return await _list_collection(request, 'resumes')
+
+
+@app.get('/job_matches/{job_id}')
+async def job_matches(job_id: str, request: Request):
+    try:
+        entries, next_cursor = await run_in_threadpool(core.job_matches_page, job_id, request.query_params)
+    except ValueError as e:
+        return _error(str(e), 400)
+    return FlaskJSONResponse(entries, headers={'X-Next-Cursor': next_cursor} if next_cursor else None)
+
+
+@app.get('/resume_matches/{resume_id}')
+async def resume_matches(resume_id: str):
+    return FlaskJSONResponse(await run_in_threadpool(core.resume_matches_list, resume_id))
+
+
+async def _poll_changes(query, wait=0.0):
+    """app.poll_changes without holding a thread while it waits."""
+    deadline = time.monotonic() + wait
+    while True:
+        version = await run_in_threadpool(core.store.version, 'matches')
+        body = await run_in_threadpool(core.next_changes, query)
+        if body['changes'] or time.monotonic() >= deadline:
+            return body
+        while time.monotonic() < deadline:
+            await asyncio.sleep(core.CHANGES_POLL_SECONDS)
+            if await run_in_threadpool(core.store.version, 'matches') != version:
+                break
+
+
+async def _change_events(query):
+    more = False
+    while True:
+        body = await _poll_changes(query, 0 if more else core.app.config['CHANGES_HEARTBEAT_SECONDS'])
+        more = body['more']
+        if not body['changes']:
+            yield ": keep-alive\n\n"
+        for entry in body['changes']:
+            yield core.change_event(entry)
+
+
+@app.get('/matches/changes')
+async def matches_changes(request: Request):
+    """Same contract as app.matches_changes; waiting holds no thread."""
+    stream = core.wants_event_stream(request.headers.get('accept'))
+    try:
+        query = await run_in_threadpool(core.changes_query, request.query_params,
+                                        request.headers.get('last-event-id') if stream else None)
+        wait = core.changes_wait(request.query_params)
+    except ValueError as e:
+        return _error(str(e), 400)
+    if stream:
+        return StreamingResponse(_change_events(query), media_type='text/event-stream',
+                                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    return FlaskJSONResponse(await _poll_changes(query, wait))
+
+
+@app.get('/rescore')
+async def rescore_status():
+    return FlaskJSONResponse(await run_in_threadpool(core.rescore_report))
+
+
+@app.post('/rescore')
+async def rescore_start():
+    if not core.rescorer.start():
+        return _error('a rescore pass is already running', 409)
+    return FlaskJSONResponse(core.rescorer.stats(), status_code=202)
+
+
+@app.get('/chatbot_questions')
+async def chatbot_questions():
+    return FlaskJSONResponse(core.questions.describe())
+
+
+@app.post('/chatbot_score')
+async def chatbot_score(request: Request):
+    try:
+        data = json.loads(await request.body())
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return _error('Invalid JSON body', 400)
+    try:
+        return FlaskJSONResponse(core.questionnaire_score(data.get('answers', [])))
+    except ValueError as e:
+        return _error(str(e), 400)
+
+
+@app.post('/chatbot_score/batch')
+async def chatbot_score_batch(request: Request):
+    """Same contract as app.chatbot_score_batch; persisting runs in the threadpool."""
+    try:
+        data = json.loads(await request.body())
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return _error('Invalid JSON body', 400)
+    try:
+        result = await run_in_threadpool(core.questionnaire_batch, data.get('applicants'), bool(data.get('persist')))
+    except ValueError as e:
+        return _error(str(e), 400)
+    return FlaskJSONResponse(result)
+
+
+@app.get('/employability_ranking/{job_id}')
+async def employability_ranking(job_id: str, request: Request):
+    try:
+        entries = await run_in_threadpool(core.employability_ranking_page, job_id, request.query_params)
+    except ValueError as e:
+        return _error(str(e), 400)
+    return FlaskJSONResponse(entries)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
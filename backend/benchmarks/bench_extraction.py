@@ -0,0 +1,88 @@
+"""
+Latency and peak memory of each available PDF text backend over the
+sample corpus.
+
+    python benchmarks/bench_extraction.py [--pdfs uploads/resumes] [--repeat 3]
+
+Each backend runs in its own freshly spawned process so the resident-set
+peak (ru_maxrss, which includes native allocations by C engines) is its
+own; tracemalloc reports the Python-heap peak per document. Prints a
+JSON report.
+"""
+import argparse
+import glob
+import json
+import mmap
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extractor
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+def _run_backend(backend, paths, repeat, max_pages, queue):
+    extractor.PDF_BACKEND = backend
+    latencies, heap_peaks, chars = [], [], 0
+    for _ in range(repeat):
+        for path in paths:
+            tracemalloc.start()
+            started = time.perf_counter()
+            with open(path, 'rb') as fh:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                    text, _ = extractor.extract_pdf_text(source, max_pages=max_pages, time_budget=0, backend=backend)
+            latencies.append(time.perf_counter() - started)
+            heap_peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            chars += len(text)
+    queue.put({
+        'backend': backend,
+        'documents': len(latencies),
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies) * 1000, 3),
+            'p50': round(_percentile(latencies, 50) * 1000, 3),
+            'p95': round(_percentile(latencies, 95) * 1000, 3),
+            'max': round(max(latencies) * 1000, 3),
+        },
+        'docs_per_sec': round(len(latencies) / sum(latencies), 2),
+        'python_heap_peak_kb': {'mean': round(statistics.mean(heap_peaks) / 1024, 1),
+                                'max': round(max(heap_peaks) / 1024, 1)},
+        'process_max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'chars_extracted': chars // repeat,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pdfs', default='uploads/resumes', help='folder of PDFs (searched recursively)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-pages', type=int, default=0, help='0 reads every page')
+    parser.add_argument('--backends', nargs='*', default=sorted(extractor.PDF_BACKENDS))
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.pdfs, '**', '*.pdf'), recursive=True))
+    if not paths:
+        parser.error(f"no PDFs under {args.pdfs}")
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for backend in args.backends:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_backend, args=(backend, paths, args.repeat, args.max_pages, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+    print(json.dumps({'pdfs': len(paths), 'repeat': args.repeat, 'backends': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Memory and overlap throughput of the resident skill bitsets against the
+per-record skill lists they replace.
+
+    python benchmarks/bench_feature_store.py --resumes 100000 [--jobs 20]
+
+Memory is what tracemalloc sees for each representation: the resumes'
+feature skill lists and title masks as loaded from JSON, and a SkillMatrix
+built from them. Throughput is shared-skill counts (and lower-bound scores,
+which need nothing else) of one job against every resume, in resumes/sec.
+Prints a JSON report.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from feature_store import SkillMatrix, SkillVocabulary
+from generators import synthetic_jobs, synthetic_resumes
+from scoring import _indicator_matrix, job_features, resume_features, score_counts_for_job, score_resumes_for_job
+
+
+def _traced(fn):
+    """(result, bytes still allocated by fn when it returns)."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def _best(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resumes', type=int, default=100000)
+    parser.add_argument('--jobs', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    parsed = synthetic_resumes(args.resumes, args.seed)
+    # features as JsonStorage keeps them: id -> record, loaded from JSON
+    serialized = json.dumps({f"r{i}": {'id': f"r{i}", 'features': resume_features(p)} for i, p in enumerate(parsed)})
+    del parsed
+    records, records_bytes = _traced(lambda: {k: {'skills': v['features']['skills'],
+                                                   'title_mask': v['features']['title_mask']}
+                                              for k, v in json.loads(serialized).items()})
+    started = time.perf_counter()
+    matrix, matrix_bytes = _traced(lambda: SkillMatrix.build(
+        {k: {'id': k, 'features': f} for k, f in records.items()}, SkillVocabulary()))
+    build_seconds = time.perf_counter() - started
+
+    ids = list(records)
+    feats = [records[k] for k in ids]
+    rows = matrix.rows(ids)
+    jobs = [job_features(j['job_text']) for j in synthetic_jobs(args.jobs, seed=args.seed)]
+
+    def list_counts():
+        out = []
+        for job in jobs:
+            vocab = {s: i for i, s in enumerate(job['skills'])}
+            out.append(np.asarray(_indicator_matrix([f['skills'] for f in feats], vocab).sum(axis=1)).ravel())
+        return out
+
+    def bitset_counts():
+        return [matrix.shared_counts(rows, job['skills']) for job in jobs]
+
+    def list_scores():
+        return [score_resumes_for_job(job, None, feats, None) for job in jobs]
+
+    def bitset_scores():
+        masks = matrix.title_masks(rows)
+        return [score_counts_for_job(job, None, matrix.shared_counts(rows, job['skills']), masks, None) for job in jobs]
+
+    expected, list_seconds = _best(list_counts, args.repeat)
+    got, bitset_seconds = _best(bitset_counts, args.repeat)
+    expected_scores, list_score_seconds = _best(list_scores, args.repeat)
+    got_scores, bitset_score_seconds = _best(bitset_scores, args.repeat)
+    mismatches = sum(int((e != g).sum()) for e, g in zip(expected, got))
+    mismatches += sum(e != g for es, gs in zip(expected_scores, got_scores) for e, g in zip(es, gs))
+
+    pairs = len(ids) * len(jobs)
+    print(json.dumps({
+        'resumes': len(ids),
+        'jobs': len(jobs),
+        'matrix': matrix.stats(),
+        'build_seconds': round(build_seconds, 3),
+        'bytes_per_resume': {
+            'skill_lists': round(records_bytes / len(ids), 1),
+            'bitset': round(matrix_bytes / len(ids), 1),
+        },
+        'resumes_per_sec': {
+            'overlap_skill_lists': round(pairs / list_seconds),
+            'overlap_bitset': round(pairs / bitset_seconds),
+            'lower_bound_skill_lists': round(pairs / list_score_seconds),
+            'lower_bound_bitset': round(pairs / bitset_score_seconds),
+        },
+        'mismatches': mismatches,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Pairs/sec for scoring one job against a synthetic resume collection.
+
+    python benchmarks/bench_scoring.py --resumes 5000
+
+Compares the per-pair loop (two-document TF-IDF fit per pair, as before the
+corpus model), the per-pair loop over corpus vectors, and the batched path
+used by upload_job over precomputed feature records. Prints a JSON report.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from corpus import CorpusModel, cosine
+from generators import synthetic_resumes
+from scoring import job_features, resume_features, score_pair, score_resumes_for_job
+
+def score_from_text(resume, job_text, cos):
+    """Per-pair scoring that derives both feature records on every call."""
+    return score_pair(job_features(job_text), resume_features(resume), cos)
+
+
+def legacy_cos(job_text, resume_text):
+    try:
+        X = TfidfVectorizer(stop_words='english', max_features=2000).fit_transform([job_text, resume_text])
+        return float(cosine_similarity(X[0], X[1])[0, 0])
+    except Exception:
+        return 0.0
+
+
+def rate(pairs, seconds):
+    return round(pairs / seconds, 1) if seconds else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resumes', type=int, default=5000)
+    parser.add_argument('--legacy-sample', type=int, default=300,
+                        help='resumes scored with the per-pair TF-IDF fit (it is slow)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    resumes = synthetic_resumes(args.resumes, args.seed)
+    job_text = "Senior Python Developer: Django, Flask, PostgreSQL, Docker, AWS, REST API, Agile teamwork"
+
+    docs = {f"resume:{i}": r['combined_text'] for i, r in enumerate(resumes)}
+    docs['job:0'] = job_text
+    with tempfile.TemporaryDirectory() as tmp:
+        model = CorpusModel(os.path.join(tmp, 'model.pkl'), lambda: docs)
+        model.fit()
+        keys = [f"resume:{i}" for i in range(len(resumes))]
+        job_vec = model.vector('job:0')
+
+        sample = resumes[:args.legacy_sample]
+        t0 = time.perf_counter()
+        for r in sample:
+            score_from_text(r, job_text, legacy_cos(job_text, r['combined_text']))
+        legacy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        pairwise = [score_from_text(r, job_text, cosine(job_vec, model.vector(k))) for r, k in zip(resumes, keys)]
+        per_pair = time.perf_counter() - t0
+
+        # feature records are computed once at ingest, outside the timed section
+        job_feat = job_features(job_text)
+        features = [resume_features(r) for r in resumes]
+        t0 = time.perf_counter()
+        matrix = model.matrix(keys, [r['combined_text'] for r in resumes])
+        batched = score_resumes_for_job(job_feat, job_vec, features, matrix)
+        batch = time.perf_counter() - t0
+
+    mismatches = sum(1 for a, b in zip(pairwise, batched) if abs(a - b) > 0.011)
+    print(json.dumps({
+        'resumes': len(resumes),
+        'pairs_per_sec': {
+            'per_pair_tfidf_fit': rate(len(sample), legacy),
+            'per_pair_corpus_vectors': rate(len(resumes), per_pair),
+            'batched': rate(len(resumes), batch),
+        },
+        'seconds': {'per_pair_tfidf_fit': legacy, 'per_pair_corpus_vectors': per_pair, 'batched': batch},
+        'score_mismatches': mismatches,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+How closely candidate blocking's rankings match exhaustive scoring.
+
+    python benchmarks/blocking_recall.py [--resumes 5000] [--jobs 20] [--k 10,50]
+    python benchmarks/blocking_recall.py --data data     # the stored resumes and jobs
+
+For every job, ranks all resumes exhaustively and again with blocking
+(exact scores for candidates, lower bounds or nothing for pruned pairs),
+for each --min-shared / --top-m setting. Reports recall@k of the
+exhaustive top k, the share of pairs fully scored and the scoring time.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blocking import SkillIndex, partition
+from corpus import CorpusModel, job_key, resume_key
+from generators import synthetic_jobs, synthetic_resumes
+from scoring import ensure_job_features, ensure_resume_features, score_resumes_for_job
+from storage import JsonStorage
+
+
+def _records(args):
+    if args.data:
+        store = JsonStorage(args.data)
+        resumes = {k: dict(v) for k, v in store.list_resumes().items()}
+        jobs = {k: dict(v) for k, v in store.list_jobs().items()}
+    else:
+        resumes = {f"r{i}": {'id': f"r{i}", 'parsed': parsed}
+                   for i, parsed in enumerate(synthetic_resumes(args.resumes, seed=args.seed))}
+        jobs = {f"j{i}": {'id': f"j{i}", **job}
+                for i, job in enumerate(synthetic_jobs(args.jobs, seed=args.seed))}
+    for record in resumes.values():
+        ensure_resume_features(record)
+    for record in jobs.values():
+        ensure_job_features(record)
+    return resumes, jobs
+
+
+def _ranking(ids, scores):
+    order = sorted(range(len(ids)), key=lambda i: -scores[i])
+    return [ids[i] for i in order]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resumes', type=int, default=5000)
+    parser.add_argument('--jobs', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data', help='use the resumes and jobs stored in this JSON data folder')
+    parser.add_argument('--k', default='10,50')
+    parser.add_argument('--min-shared', default='1,2,3')
+    parser.add_argument('--top-m', default='0,500')
+    parser.add_argument('--pruned', default='lower_bound', choices=['lower_bound', 'skip'])
+    args = parser.parse_args()
+    ks = [int(k) for k in args.k.split(',')]
+
+    resumes, jobs = _records(args)
+    docs = {resume_key(r): rec['parsed'].get('combined_text', '') or '' for r, rec in resumes.items()}
+    docs.update({job_key(j): rec.get('job_text', '') or '' for j, rec in jobs.items()})
+    corpus = CorpusModel(os.path.join(tempfile.mkdtemp(), 'model.pkl'), lambda: docs)
+    corpus.fit()
+    index = SkillIndex.build(resumes, jobs)
+    resume_ids = list(resumes)
+    resume_texts = [docs[resume_key(r)] for r in resume_ids]
+
+    exhaustive = {}
+    started = time.perf_counter()
+    for job_id, job in jobs.items():
+        matrix = corpus.matrix([job_key(job_id)] + [resume_key(r) for r in resume_ids],
+                               [docs[job_key(job_id)]] + resume_texts)
+        scores = score_resumes_for_job(job['features'], matrix[0], [resumes[r]['features'] for r in resume_ids],
+                                       matrix[1:])
+        exhaustive[job_id] = _ranking(resume_ids, scores)
+    exhaustive_seconds = time.perf_counter() - started
+
+    runs = []
+    for min_shared in (int(n) for n in args.min_shared.split(',')):
+        for top_m in (int(m) for m in args.top_m.split(',')):
+            recall = {k: [] for k in ks}
+            scored = 0
+            started = time.perf_counter()
+            for job_id, job in jobs.items():
+                feats = job['features']
+                if feats['skills']:
+                    keep = index.candidates('resumes', feats['skills'], min_shared, top_m)
+                    kept, pruned = partition(resume_ids, keep)
+                else:
+                    kept, pruned = resume_ids, []
+                matrix = corpus.matrix([job_key(job_id)] + [resume_key(r) for r in kept],
+                                       [docs[job_key(job_id)]] + [docs[resume_key(r)] for r in kept])
+                ids = list(kept)
+                scores = score_resumes_for_job(feats, matrix[0], [resumes[r]['features'] for r in kept], matrix[1:])
+                if pruned and args.pruned == 'lower_bound':
+                    ids += pruned
+                    scores += score_resumes_for_job(feats, None, [resumes[r]['features'] for r in pruned], None)
+                scored += len(kept)
+                ranking = _ranking(ids, scores)
+                for k in ks:
+                    top = set(exhaustive[job_id][:k])
+                    recall[k].append(len(top & set(ranking[:k])) / max(1, len(top)))
+            runs.append({
+                'min_shared': min_shared,
+                'top_m': top_m,
+                'pairs_scored_fraction': round(scored / max(1, len(jobs) * len(resume_ids)), 4),
+                'seconds': round(time.perf_counter() - started, 3),
+                **{f"recall@{k}": {'mean': round(sum(v) / max(1, len(v)), 4), 'min': round(min(v, default=0), 4)}
+                   for k, v in recall.items()},
+            })
+
+    print(json.dumps({
+        'resumes': len(resumes),
+        'jobs': len(jobs),
+        'pruned': args.pruned,
+        'exhaustive_seconds': round(exhaustive_seconds, 3),
+        'runs': runs,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
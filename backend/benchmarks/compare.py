@@ -0,0 +1,59 @@
+"""
+Compare two run_benchmarks.py reports and flag regressions.
+
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.2] [--metric p50_ms]
+
+Exits with status 1 when any benchmark present in both reports got slower
+by more than the threshold (a fraction of the baseline).
+"""
+import argparse
+import json
+import sys
+
+
+def _flatten(report: dict, metric: str) -> dict:
+    out = {}
+    for name, stats in report.get('micro', {}).items():
+        out[f"micro/{name}"] = stats[metric]
+    for size, results in report.get('endpoints', {}).items():
+        for name, stats in results.items():
+            if isinstance(stats, dict):
+                out[f"{size}/{name}"] = stats[metric]
+    return out
+
+
+def compare(baseline: dict, candidate: dict, threshold: float, metric: str):
+    old, new = _flatten(baseline, metric), _flatten(candidate, metric)
+    rows, regressions = [], []
+    for key in sorted(old.keys() & new.keys()):
+        change = (new[key] - old[key]) / old[key] if old[key] else 0.0
+        rows.append((key, old[key], new[key], change))
+        if change > threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown, 0.2 = 20%%')
+    parser.add_argument('--metric', default='p50_ms', choices=['mean_ms', 'p50_ms', 'p95_ms', 'max_ms'])
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+    rows, regressions = compare(baseline, candidate, args.threshold, args.metric)
+    width = max((len(r[0]) for r in rows), default=10)
+    for key, old, new, change in rows:
+        flag = '  REGRESSION' if key in regressions else ''
+        print(f"{key:<{width}}  {old:>10.3f}  {new:>10.3f}  {change:>+8.1%}{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%} ({args.metric})")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Synthetic jobs and parsed resumes for the benchmarks (deterministic for a given seed)."""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractor import COMMON_SKILLS
+
+FILLER = ("worked team project delivered built maintained system customers improved "
+          "process managed reports designed tested deployed supported users data").split()
+TITLES = ['Developer', 'Engineer', 'Manager', 'Analyst', 'Designer', 'Consultant']
+SCHOOLS = ['State University', 'Institute of Technology', 'City College', 'Polytechnic University']
+
+
+def synthetic_resume(rng: random.Random) -> dict:
+    """A parsed resume, shaped like extract_sections_from_pdf_bytes output."""
+    skills = rng.sample(COMMON_SKILLS, rng.randint(3, 15))
+    experience = " ".join(rng.choices(FILLER, k=rng.randint(60, 220)) + rng.sample(skills, min(3, len(skills))))
+    education = f"BS Computer Science, {rng.choice(SCHOOLS)}"
+    summary = f"{rng.choice(TITLES)} with {rng.randint(1, 15)} years of experience"
+    raw_text = (f"{summary}\nExperience\n{experience}\nEducation\n{education}\n"
+                f"Skills: {', '.join(skills)}")
+    return {
+        'raw_text': raw_text,
+        'experience': experience,
+        'education': education,
+        'skills': skills,
+        'combined_text': " ".join([summary, experience, education]),
+    }
+
+
+def synthetic_job(rng: random.Random) -> dict:
+    """A job posting as accepted by /upload_job."""
+    title = f"{rng.choice(['Junior', 'Senior', 'Lead'])} {rng.choice(TITLES)}"
+    skills = rng.sample(COMMON_SKILLS, rng.randint(3, 10))
+    text = (f"{title}. We are looking for someone with {', '.join(skills)}. "
+            + " ".join(rng.choices(FILLER, k=rng.randint(30, 80))))
+    return {'title': title, 'job_text': text}
+
+
+def synthetic_resumes(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [synthetic_resume(rng) for _ in range(n)]
+
+
+def synthetic_jobs(n: int, seed: int = 0):
+    rng = random.Random(seed + 1)
+    return [synthetic_job(rng) for _ in range(n)]
@@ -0,0 +1,193 @@
+"""
+Mixed-load comparison of the Flask app and the async (asgi.py) mode.
+
+    python benchmarks/load_test.py [--resumes 2000] [--concurrency 8,32,64] [--seconds 15]
+
+Seeds one data folder, then for each mode starts the server on a fresh
+copy of it (Flask's threaded server, uvicorn with one worker) and runs
+--concurrency client threads against it for --seconds each. Every client
+mostly reads (/job_matches, /resume_matches, /jobs) and, with probability
+--upload-share, uploads a sample PDF instead (made unique so it is really
+parsed) or a job. Prints requests/sec, latency percentiles per request kind
+and errors as JSON.
+"""
+import argparse
+import glob
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+from generators import synthetic_jobs
+from run_benchmarks import _stats
+
+SERVERS = {
+    'flask': [sys.executable, '-c', "import app, sys; app.app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--log-level', 'warning', '--port'],
+}
+
+SEED = """
+import sys
+sys.path.insert(0, 'benchmarks_dir')
+import app
+from generators import synthetic_jobs, synthetic_resumes
+from run_benchmarks import _seed
+for job in synthetic_jobs(JOBS):
+    app.create_job(job['title'], job['job_text'])
+assert len(app.store.list_jobs()) == JOBS
+_seed(app, synthetic_resumes(RESUMES), 0)
+app.corpus.save()
+"""
+
+
+def _seed_folder(folder, resumes, jobs):
+    script = (SEED.replace('benchmarks_dir', os.path.join(BACKEND, 'benchmarks'))
+              .replace('JOBS', str(jobs)).replace('RESUMES', str(resumes)))
+    subprocess.run([sys.executable, '-c', script], cwd=folder, check=True, env=_env())
+
+
+def _env():
+    return dict(os.environ, PYTHONPATH=BACKEND, RESCORE_ON_STARTUP='0')
+
+
+def _request(port, method, path, body=None, headers=None, timeout=120):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def _wait_ready(port, proc, seconds=120):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            if _request(port, 'GET', '/', timeout=2)[0] == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def _multipart(field, filename, data):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, {'Content-Type': f"multipart/form-data; boundary={boundary}"}
+
+
+def _client(port, plan, stop, samples, errors, seed):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        kind, method, path, body, headers = plan(rng)
+        started = time.perf_counter()
+        try:
+            status, _ = _request(port, method, path, body, headers)
+        except (OSError, http.client.HTTPException):
+            status = None
+        samples.setdefault(kind, []).append(time.perf_counter() - started)
+        if status is None or status >= 400:
+            errors[kind] = errors.get(kind, 0) + 1
+
+
+def _phase(port, plan, concurrency, seconds):
+    stop = threading.Event()
+    samples = [{} for _ in range(concurrency)]
+    errors = [{} for _ in range(concurrency)]
+    threads = [threading.Thread(target=_client, args=(port, plan, stop, samples[i], errors[i], i))
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    by_kind = {}
+    for per_thread in samples:
+        for kind, values in per_thread.items():
+            by_kind.setdefault(kind, []).extend(values)
+    report = {'concurrency': concurrency, 'requests': sum(len(v) for v in by_kind.values())}
+    report['requests_per_sec'] = round(report['requests'] / elapsed, 1)
+    for kind, values in sorted(by_kind.items()):
+        values.sort()
+        stats = _stats(values)
+        stats['p99_ms'] = round(values[min(len(values) - 1, int(round(0.99 * (len(values) - 1))))] * 1000, 3)
+        report[kind] = stats
+    report['errors'] = {k: sum(e.get(k, 0) for e in errors) for k in {k for e in errors for k in e}}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resumes', type=int, default=2000)
+    parser.add_argument('--jobs', type=int, default=3)
+    parser.add_argument('--concurrency', default='8,32,64')
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--upload-share', type=float, default=0.05)
+    parser.add_argument('--pdfs', default=os.path.join(BACKEND, 'uploads', 'resumes'))
+    parser.add_argument('--modes', default='flask,asgi')
+    parser.add_argument('--port', type=int, default=5230)
+    parser.add_argument('--keep', action='store_true', help='keep the data folders and server logs')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='capstone-load-')
+    seeded = os.path.join(root, 'seed')
+    os.makedirs(os.path.join(seeded, 'uploads'))
+    _seed_folder(seeded, args.resumes, args.jobs)
+    with open(os.path.join(seeded, 'data', 'jobs.json'), encoding='utf-8') as f:
+        job_ids = list(json.load(f))
+    pdfs = [open(p, 'rb').read() for p in sorted(glob.glob(os.path.join(args.pdfs, '*.pdf')))]
+    new_jobs = synthetic_jobs(200, seed=11)
+
+    def plan(rng):
+        if rng.random() < args.upload_share:
+            if rng.random() < 0.8:
+                # a trailing comment changes the digest, so the parse cache cannot answer it
+                body, headers = _multipart('resume', f"load_{uuid.uuid4().hex[:12]}.pdf", rng.choice(pdfs) + f"\n%{uuid.uuid4().hex}\n".encode())
+                return 'upload_resume', 'POST', '/upload_resume', body, headers
+            job = rng.choice(new_jobs)
+            return 'upload_job', 'POST', '/upload_job', json.dumps(job).encode(), {'Content-Type': 'application/json'}
+        pick = rng.random()
+        if pick < 0.5:
+            return 'read', 'GET', f"/job_matches/{rng.choice(job_ids)}?limit=20", None, None
+        if pick < 0.9:
+            return 'read', 'GET', f"/resume_matches/bench_{rng.randrange(args.resumes)}", None, None
+        return 'read', 'GET', '/jobs?fields=title', None, None
+
+    results = {}
+    for n, mode in enumerate(args.modes.split(',')):
+        folder = os.path.join(root, mode)
+        shutil.copytree(seeded, folder)
+        port = args.port + n
+        log = open(os.path.join(root, f"{mode}.log"), 'wb')
+        proc = subprocess.Popen(SERVERS[mode] + [str(port)], cwd=folder, env=_env(), stdout=log, stderr=log)
+        try:
+            _wait_ready(port, proc)
+            results[mode] = [_phase(port, plan, int(c), args.seconds) for c in args.concurrency.split(',')]
+        finally:
+            proc.terminate()
+            proc.wait(30)
+            log.close()
+    if not args.keep:
+        shutil.rmtree(root, ignore_errors=True)
+    print(json.dumps({'args': vars(args), 'cpus': os.cpu_count(), 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
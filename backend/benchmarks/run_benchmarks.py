@@ -0,0 +1,171 @@
+"""
+Reproducible benchmark suite for the extraction and matching pipeline.
+
+    python benchmarks/run_benchmarks.py [--sizes 1000,10000,100000] [--output run.json]
+
+Per-stage microbenchmarks run over the PDFs in uploads/resumes; endpoint
+latency is measured through the Flask test client against a fresh data
+folder seeded with synthetic resumes and jobs, growing through each size.
+The report is JSON; compare two runs with benchmarks/compare.py.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from generators import synthetic_jobs, synthetic_resumes
+
+
+def _stats(samples):
+    samples = sorted(samples)
+    pick = lambda pct: samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+    return {
+        'n': len(samples),
+        'mean_ms': round(statistics.mean(samples) * 1000, 3),
+        'p50_ms': round(pick(50) * 1000, 3),
+        'p95_ms': round(pick(95) * 1000, 3),
+        'max_ms': round(samples[-1] * 1000, 3),
+    }
+
+
+def _timed(fn, inputs, repeat=1):
+    samples = []
+    for _ in range(repeat):
+        for item in inputs:
+            started = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - started)
+    return _stats(samples)
+
+
+def micro_benchmarks(app_module, pdf_paths, repeat):
+    import extractor
+
+    pdfs = [open(p, 'rb').read() for p in pdf_paths]
+    texts = [extractor.extract_text_from_pdf(io.BytesIO(b)) for b in pdfs]
+    resumes = synthetic_resumes(200, seed=7)
+    job = synthetic_jobs(1, seed=7)[0]['job_text']
+    return {
+        'extract_text_from_pdf': _timed(lambda b: extractor.extract_text_from_pdf(io.BytesIO(b)), pdfs, repeat),
+        'split_by_header': _timed(extractor.split_by_header, texts, repeat),
+        'extract_skills_from_text': _timed(extractor.extract_skills_from_text, texts, repeat),
+        'compute_employability_score': _timed(lambda r: app_module.compute_employability_score(r, job), resumes, repeat),
+    }
+
+
+def _seed(app_module, resumes, start, batch=5000):
+    """Ingest resumes[start:] with generated ids, in batches."""
+    for i in range(start, len(resumes), batch):
+        chunk = resumes[i:i + batch]
+        app_module.ingest_resumes([{'resume_id': f"bench_{i + k}", 'name': f"Applicant {i + k}",
+                                    'filename': 'synthetic.pdf', 'parsed': parsed}
+                                   for k, parsed in enumerate(chunk)])
+
+
+def endpoint_benchmarks(app_module, size, job_ids, sample_pdf, repeat):
+    client = app_module.app.test_client()
+    job_id = job_ids[0]
+    resume_id = f"bench_{size // 2}"
+    out = {}
+
+    def get(path):
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.status_code)
+
+    out['GET /jobs'] = _timed(lambda _: get('/jobs'), range(repeat))
+    out['GET /resumes'] = _timed(lambda _: get('/resumes'), range(max(1, repeat // 5)))
+    out['GET /job_matches (all)'] = _timed(lambda _: get(f'/job_matches/{job_id}'), range(repeat))
+    out['GET /job_matches (limit=20)'] = _timed(lambda _: get(f'/job_matches/{job_id}?limit=20'), range(repeat))
+    out['GET /resume_matches'] = _timed(lambda _: get(f'/resume_matches/{resume_id}'), range(repeat))
+
+    jobs = synthetic_jobs(repeat, seed=size)
+    out['POST /upload_job'] = _timed(
+        lambda job: client.post('/upload_job', json=job), jobs)
+    if sample_pdf:
+        pdf = open(sample_pdf, 'rb').read()
+        out['POST /upload_resume'] = _timed(
+            lambda i: client.post('/upload_resume', content_type='multipart/form-data',
+                                  data={'resume': (io.BytesIO(pdf), 'bench.pdf'), 'applicant_name': f'bench upload {size} {i}'}),
+            range(repeat))
+    return out
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,10000,100000', help='resume counts for the endpoint runs')
+    parser.add_argument('--jobs', type=int, default=5, help='jobs seeded before the resumes')
+    parser.add_argument('--repeat', type=int, default=10, help='samples per endpoint')
+    parser.add_argument('--micro-repeat', type=int, default=1)
+    parser.add_argument('--storage', default='json', choices=['json', 'sqlite'])
+    parser.add_argument('--pdfs', default=os.path.join(BACKEND_DIR, 'uploads', 'resumes'))
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON report here as well as to stdout')
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    pdf_paths = sorted(glob.glob(os.path.join(args.pdfs, '**', '*.pdf'), recursive=True))
+
+    report = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': vars(args),
+        },
+        'micro': {},
+        'endpoints': {},
+    }
+
+    # the app keeps its data relative to the working directory
+    workdir = tempfile.mkdtemp(prefix='capstone-bench-')
+    os.chdir(workdir)
+    os.environ['STORAGE_BACKEND'] = args.storage
+    import app as app_module
+
+    if not args.skip_micro and pdf_paths:
+        report['micro'] = micro_benchmarks(app_module, pdf_paths, args.micro_repeat)
+
+    client = app_module.app.test_client()
+    job_ids = [client.post('/upload_job', json=job).get_json()['job_id']
+               for job in synthetic_jobs(args.jobs, seed=args.seed)]
+    assert len(set(job_ids)) == len(app_module.store.list_jobs()) == args.jobs, 'seeded jobs overwrote each other'
+    resumes = synthetic_resumes(sizes[-1], seed=args.seed)
+    seeded = 0
+    for size in sizes:
+        started = time.perf_counter()
+        _seed(app_module, resumes[:size], seeded)
+        seeded = size
+        result = endpoint_benchmarks(app_module, size, job_ids, pdf_paths[0] if pdf_paths else None, args.repeat)
+        result['seed_seconds'] = round(time.perf_counter() - started, 3)
+        report['endpoints'][str(size)] = result
+
+    report['meta']['finished_at'] = datetime.utcnow().isoformat()
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Read latency while uploads are running.
+
+    python benchmarks/stress_reads.py [--resumes 5000] [--readers 4] [--seconds 10]
+
+Seeds a fresh data folder, then measures GET /job_matches?limit=20,
+/resume_matches and /jobs from reader threads twice: once alone and once
+while writer threads keep uploading jobs and ingesting resumes (each of
+which scores against the whole corpus). Prints p50/p99 per phase as JSON.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators import synthetic_jobs, synthetic_resumes
+from run_benchmarks import _seed, _stats
+
+
+def _reader(client, paths, stop, samples, pause):
+    rng = random.Random(threading.get_ident())
+    while not stop.is_set():
+        path = rng.choice(paths)
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, (path, response.status_code)
+        time.sleep(pause)
+
+
+def _writer(app_module, stop, counts, seed):
+    client = app_module.app.test_client()
+    rng_jobs = iter(synthetic_jobs(10000, seed=seed))
+    resumes = synthetic_resumes(200, seed=seed)
+    n = 0
+    while not stop.is_set():
+        if n % 2:
+            client.post('/upload_job', json=next(rng_jobs))
+            counts['jobs'] += 1
+        else:
+            batch = resumes[(n * 5) % 200:(n * 5) % 200 + 5]
+            app_module.ingest_resumes([{'resume_id': f"stress_{seed}_{n}_{k}", 'name': 'Stress',
+                                        'filename': 'synthetic.pdf', 'parsed': parsed}
+                                       for k, parsed in enumerate(batch)])
+            counts['resumes'] += len(batch)
+        n += 1
+
+
+def _phase(app_module, paths, readers, writers, seconds, pause):
+    stop = threading.Event()
+    samples = [[] for _ in range(readers)]
+    counts = {'jobs': 0, 'resumes': 0}
+    threads = [threading.Thread(target=_reader, args=(app_module.app.test_client(), paths, stop, samples[i], pause))
+               for i in range(readers)]
+    threads += [threading.Thread(target=_writer, args=(app_module, stop, counts, i + 1)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    flat = sorted(s for per_thread in samples for s in per_thread)
+    stats = _stats(flat)
+    stats['p99_ms'] = round(flat[min(len(flat) - 1, int(round(0.99 * (len(flat) - 1))))] * 1000, 3)
+    stats['uploads'] = counts
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resumes', type=int, default=5000)
+    parser.add_argument('--jobs', type=int, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=1)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--pause', type=float, default=0.005, help='think time between reads per reader')
+    parser.add_argument('--storage', default='json', choices=['json', 'sqlite'])
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='capstone-stress-'))
+    os.environ['STORAGE_BACKEND'] = args.storage
+    import app as app_module
+
+    client = app_module.app.test_client()
+    job_ids = [client.post('/upload_job', json=job).get_json()['job_id'] for job in synthetic_jobs(args.jobs)]
+    _seed(app_module, synthetic_resumes(args.resumes), 0)
+    paths = ([f'/job_matches/{j}?limit=20' for j in job_ids]
+             + [f'/resume_matches/bench_{i}' for i in range(0, args.resumes, max(1, args.resumes // 50))]
+             + ['/jobs'])
+
+    report = {
+        'args': vars(args),
+        'reads_alone': _phase(app_module, paths, args.readers, 0, args.seconds, args.pause),
+        'reads_during_uploads': _phase(app_module, paths, args.readers, args.writers, args.seconds, args.pause),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
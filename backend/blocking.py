@@ -0,0 +1,77 @@
+"""
+Candidate blocking: an inverted index from skill to the resumes and the
+jobs that list it, so a new document gets the full score (TF-IDF cosine
+included) only against documents sharing enough skills with it.
+
+Pairs left out can still be given a lower bound: the same score with the
+cosine term taken as 0, which needs no TF-IDF at all.
+"""
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+
+SIDES = ('resumes', 'jobs')
+
+
+class SkillIndex:
+    """skill -> ids postings for resumes and for jobs, safe to update from several threads."""
+
+    def __init__(self):
+        self._postings = {side: {} for side in SIDES}
+        self._skills = {side: {} for side in SIDES}  # id -> skills, so re-adding an id replaces it
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, resumes: Dict[str, dict], jobs: Dict[str, dict]) -> 'SkillIndex':
+        """Index stored records by their features' skills."""
+        index = cls()
+        for record in resumes.values():
+            index.add('resumes', record['id'], record['features']['skills'])
+        for record in jobs.values():
+            index.add('jobs', record['id'], record['features']['skills'])
+        return index
+
+    def add(self, side: str, doc_id: str, skills: Iterable[str]):
+        skills = frozenset(skills)
+        with self._lock:
+            postings = self._postings[side]
+            for skill in self._skills[side].get(doc_id, ()):
+                postings[skill].discard(doc_id)
+            for skill in skills:
+                postings.setdefault(skill, set()).add(doc_id)
+            self._skills[side][doc_id] = skills
+
+    def missing(self, side: str, ids: Iterable[str]) -> List[str]:
+        """The ids not indexed on `side` yet."""
+        with self._lock:
+            indexed = self._skills[side]
+            return [doc_id for doc_id in ids if doc_id not in indexed]
+
+    def shared_counts(self, side: str, skills: Iterable[str]) -> Counter:
+        """Number of `skills` each document on `side` shares (documents sharing none are absent)."""
+        counts = Counter()
+        with self._lock:
+            for skill in set(skills):
+                counts.update(self._postings[side].get(skill, ()))
+        return counts
+
+    def candidates(self, side: str, skills: Iterable[str], min_shared: int = 1, top_m: int = 0) -> Set[str]:
+        """Documents sharing at least min_shared skills; only the top_m by overlap when top_m > 0."""
+        counts = self.shared_counts(side, skills)
+        if top_m:
+            return {doc_id for doc_id, n in counts.most_common(top_m) if n >= min_shared}
+        return {doc_id for doc_id, n in counts.items() if n >= min_shared}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {side: {'documents': len(self._skills[side]), 'skills': len(self._postings[side]),
+                           'postings': sum(len(ids) for ids in self._postings[side].values())}
+                    for side in SIDES}
+
+
+def partition(ids: List[str], keep: Set[str]) -> Tuple[List[str], List[str]]:
+    """Split ids (order kept) into those in keep and the rest."""
+    kept, pruned = [], []
+    for doc_id in ids:
+        (kept if doc_id in keep else pruned).append(doc_id)
+    return kept, pruned
@@ -0,0 +1,180 @@
+"""
+Bulk resume import shared by /upload_resumes_bulk and the command line:
+
+    python bulk_import.py resumes/ more.zip one.pdf [--workers 8]
+
+PDFs are parsed across a process pool (files already in the parse cache
+are not parsed again), then every new resume is stored and scored against
+all jobs in one batch.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, List, Tuple
+
+from werkzeug.utils import secure_filename
+
+import metrics
+from extractor import extract_sections_from_pdf_file
+from parse_cache import ParseCache, file_digest
+
+# zip members larger than this are skipped (same limit as a single upload)
+MAX_MEMBER_BYTES = 15 * 1024 * 1024
+
+
+def timed_extract(path: str) -> Tuple[dict, dict]:
+    """extract_sections_from_pdf_file plus its stage timings (pdf_parse is the total)."""
+    timings = {}
+    started = time.perf_counter()
+    parsed = extract_sections_from_pdf_file(path, timings)
+    timings['pdf_parse'] = time.perf_counter() - started
+    return parsed, timings
+
+
+def upload_path(folder: str, filename: str) -> str:
+    """
+    Where to store an upload named filename: its secured name plus a random
+    suffix, so uploads sharing a name never overwrite each other.
+    """
+    stem, ext = os.path.splitext(secure_filename(os.path.basename(filename)))
+    return os.path.join(folder, f"{stem or 'upload'}_{uuid.uuid4().hex[:12]}{ext}")
+
+
+def extract_zip(archive, dest_folder: str) -> Tuple[List[Tuple[str, str]], List[dict]]:
+    """
+    Unpack the PDFs of a zip (path or file object) into dest_folder; returns
+    (files, errors), files as (path, name of the member in the zip) pairs.
+    """
+    files, errors = [], []
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile as e:
+        return files, [{'filename': getattr(archive, 'filename', str(archive)), 'status': 'error', 'error': f"bad zip: {e}"}]
+    with zf:
+        for member in zf.infolist():
+            if member.is_dir() or not member.filename.lower().endswith('.pdf'):
+                continue
+            if member.file_size > MAX_MEMBER_BYTES:
+                errors.append({'filename': member.filename, 'status': 'error', 'error': 'file too large'})
+                continue
+            path = upload_path(dest_folder, member.filename)
+            with zf.open(member) as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            files.append((path, member.filename))
+    return files, errors
+
+
+def import_pdfs(files: List[Tuple[str, str]], ingest: Callable[[List[dict]], List[dict]], cache: ParseCache,
+                new_id: Callable[[str], str], executor: Executor = None, workers: int = None) -> dict:
+    """
+    Parse files, (path, name it was uploaded as) pairs, in parallel, then
+    hand every parsed resume to `ingest` in one call. new_id(name) gives
+    each resume its id. Returns a per-file report with timings and errors,
+    by uploaded name.
+    """
+    started = time.perf_counter()
+    report = []
+    todo = []  # (report entry, path, digest)
+    for path, original in files:
+        name = os.path.splitext(os.path.basename(original))[0] or 'Applicant'
+        entry = {'filename': original, 'resume_id': new_id(name), 'name': name,
+                 'status': 'ok', 'cached': False, 'parse_seconds': 0.0}
+        report.append(entry)
+        try:
+            digest = file_digest(path)
+        except OSError as e:
+            entry.update(status='error', error=str(e))
+            continue
+        parsed = cache.get(digest)
+        if parsed is not None:
+            entry.update(cached=True, parsed=parsed)
+        else:
+            todo.append((entry, path, digest))
+
+    if todo:
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [(entry, digest, executor.submit(timed_extract, path)) for entry, path, digest in todo]
+            for entry, digest, future in futures:
+                try:
+                    parsed, timings = future.result()
+                except Exception as e:
+                    entry.update(status='error', error=f"{type(e).__name__}: {e}")
+                    continue
+                metrics.observe_stages(timings)
+                cache.put(digest, parsed)
+                entry.update(parsed=parsed, parse_seconds=round(timings['pdf_parse'], 4))
+        finally:
+            if own_executor:
+                executor.shutdown()
+    parse_done = time.perf_counter()
+
+    ok = [(e, path) for e, (path, _) in zip(report, files) if e['status'] == 'ok']
+    items = [{'resume_id': e['resume_id'], 'name': e['name'], 'filename': os.path.basename(path),
+              'original_filename': e['filename'], 'parsed': e.pop('parsed')} for e, path in ok]
+    results = ingest(items) if items else []
+    for (entry, _), result in zip(ok, results):
+        entry['matches_created'] = len(result['matches_created'])
+    finished = time.perf_counter()
+
+    return {
+        'files': len(report),
+        'imported': len(ok),
+        'errors': len(report) - len(ok),
+        'parse_seconds': round(parse_done - started, 4),
+        'score_and_store_seconds': round(finished - parse_done, 4),
+        'total_seconds': round(finished - started, 4),
+        'results': report,
+    }
+
+
+def _collect(inputs: List[str], upload_folder: str) -> Tuple[List[Tuple[str, str]], List[dict]]:
+    """PDFs from files, directories (recursively) and zips, as import_pdfs files stored in upload_folder."""
+    files, errors = [], []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                for f in sorted(names):
+                    if f.lower().endswith('.pdf'):
+                        files.append((os.path.join(root, f), os.path.join(root, f)))
+        elif item.lower().endswith('.zip'):
+            unpacked, failed = extract_zip(item, upload_folder)
+            files += unpacked
+            errors += failed
+        elif item.lower().endswith('.pdf') and os.path.isfile(item):
+            files.append((item, item))
+        else:
+            errors.append({'filename': item, 'status': 'error', 'error': 'not a PDF, zip or directory'})
+    stored = []
+    for path, original in files:
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(upload_folder):
+            target = upload_path(upload_folder, path)
+            shutil.copyfile(path, target)
+            path = target
+        stored.append((path, original))
+    return stored, errors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import many resume PDFs at once.')
+    parser.add_argument('inputs', nargs='+', help='PDF files, directories or zip archives')
+    parser.add_argument('--workers', type=int, default=None, help='parser processes (default: cpu count)')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app
+
+    files, errors = _collect(args.inputs, app.app.config['UPLOAD_FOLDER'])
+    report = import_pdfs(files, app.ingest_resumes, app.parse_cache, app.new_resume_id, workers=args.workers)
+    report['results'] += errors
+    report['files'] += len(errors)
+    report['errors'] += len(errors)
+    print(json.dumps(report, indent=2))
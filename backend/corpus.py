@@ -0,0 +1,246 @@
+import os
+import pickle
+import threading
+from typing import Callable, Dict, List, Optional
+
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from storage import FileLock, SharedCounters
+
+TFIDF_MAX_FEATURES = 20000
+# Refit once this fraction of the corpus was added after the last fit
+REFIT_DRIFT = 0.2
+REFIT_MIN_NEW_DOCS = 5
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def resume_key(resume_id: str) -> str:
+    return f"resume:{resume_id}"
+
+
+class CorpusModel:
+    """
+    TF-IDF model fitted over every stored job text and resume combined_text.
+
+    Each document's (l2-normalized) sparse vector is kept by key, so the
+    cosine between a job and a resume is a single sparse dot product.
+    Documents added after the last fit are transformed with the current
+    vocabulary; once they make up REFIT_DRIFT of the corpus the model is
+    refit in a background thread and swapped in. A refit can land between
+    any two calls, so vectors meant to be multiplied together must come
+    from one matrix() call.
+
+    shared: several processes use the model file. One of them fits at a
+    time and bumps a version shared with the others, which reload the model
+    before their next use, so every process scores with the same vocabulary
+    and IDF.
+    """
+
+    def __init__(self, path: str, corpus_source: Callable[[], Dict[str, str]],
+                 refit_drift: float = REFIT_DRIFT, max_features: int = TFIDF_MAX_FEATURES, shared: bool = False):
+        self.path = path
+        self.corpus_source = corpus_source
+        self.refit_drift = refit_drift
+        self.max_features = max_features
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.vectors = {}
+        self.fitted_docs = 0
+        self._added = {}  # key -> text added since the last fit
+        self._lock = threading.Lock()
+        self._refit_thread = None
+        self._fit_lock = FileLock(path + '.lock', 'corpus_fit') if shared else None
+        self._counters = SharedCounters(path + '.version', ['model']) if shared else None
+        self._version = None  # shared: the version of the model held here
+
+    def _new_vectorizer(self):
+        return TfidfVectorizer(stop_words='english', max_features=self.max_features)
+
+    def load(self) -> bool:
+        # read first: a model saved after it is loaded again next time
+        version = self._counters.get('model') if self._counters is not None else None
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            print(f"Error loading corpus model: {e}")
+            return False
+        with self._lock:
+            self.vectorizer = state['vectorizer']
+            self.vectors = state['vectors']
+            self.fitted_docs = state['fitted_docs']
+            # documents added here that the saved model does not have
+            self._added = {k: t for k, t in self._added.items() if k not in self.vectors}
+            for key, text in self._added.items():
+                self.vectors[key] = self._transform(text)
+            self._version = version
+        return True
+
+    def _sync(self):
+        """shared: load the model if another process fitted one since this one last loaded or fitted."""
+        if self._counters is not None and self._counters.get('model') != self._version:
+            self.load()
+
+    def save(self):
+        with self._lock:
+            state = {'vectorizer': self.vectorizer, 'vectors': dict(self.vectors),
+                     'fitted_docs': self.fitted_docs}
+        # per writer, so workers saving at once never interleave one file
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def load_or_fit(self):
+        if self._fit_lock is None:
+            if not self.load():
+                self.fit()
+            return
+        # processes starting together: the first one fits, the others load its model
+        with self._fit_lock:
+            if not self.load():
+                self._fit()
+
+    def fit(self, documents: Dict[str, str] = None):
+        """Fit on the whole corpus and recompute every stored vector."""
+        if self._fit_lock is None:
+            return self._fit(documents)
+        with self._fit_lock:
+            self._fit(documents)
+
+    def _fit(self, documents: Dict[str, str] = None):
+        if documents is None:
+            documents = self.corpus_source()
+        keys = list(documents.keys())
+        vectorizer = self._new_vectorizer()
+        try:
+            X = vectorizer.fit_transform([documents[k] or "" for k in keys]).tocsr()
+        except ValueError:
+            # empty corpus or vocabulary (e.g. only stop words)
+            vectorizer, X = None, None
+        vectors = {k: X[i] for i, k in enumerate(keys)} if X is not None else {}
+        with self._lock:
+            self.vectorizer = vectorizer
+            self.vectors = vectors
+            self.fitted_docs = len(keys)
+            # documents that arrived while we were fitting
+            late = {k: t for k, t in self._added.items() if k not in documents}
+            for key, text in late.items():
+                self.vectors[key] = self._transform(text)
+            self._added = late
+        if vectorizer is not None:
+            self.save()
+            if self._counters is not None:
+                # under the fit lock, which serializes the writers of the version
+                self._version = self._counters.bump('model')
+
+    def _transform(self, text: str):
+        if self.vectorizer is None:
+            return None
+        return self.vectorizer.transform([text or ""]).tocsr()
+
+    def _drifted(self) -> bool:
+        """Whether enough documents were added since the last fit to refit (lock held)."""
+        return (len(self._added) >= REFIT_MIN_NEW_DOCS
+                and len(self._added) > self.refit_drift * max(1, self.fitted_docs))
+
+    def add(self, key: str, text: str):
+        """Vectorize a new document with the current model and store its vector."""
+        self._sync()
+        with self._lock:
+            vec = self._transform(text)
+            self.vectors[key] = vec
+            self._added[key] = text
+            drifted = self._drifted()
+        if self.vectorizer is None:
+            # nothing to transform with yet; the corpus is tiny so fit inline
+            self.fit()
+            return self.vector(key)
+        if drifted:
+            self.refit_async()
+        return vec
+
+    def add_many(self, keys: List[str], texts: List[str]):
+        """Vectorize a batch of new documents in one transform (score them through matrix())."""
+        self._sync()
+        with self._lock:
+            for key, text in zip(keys, texts):
+                self.vectors.pop(key, None)
+        self.matrix(keys, texts)
+        with self._lock:
+            drifted = self._drifted()
+        if self.vectorizer is None:
+            self.fit()
+        elif drifted:
+            self.refit_async()
+
+    def ensure(self, key: str, text: str):
+        """Return the stored vector for key, vectorizing text if it is missing."""
+        with self._lock:
+            if key in self.vectors:
+                return self.vectors[key]
+        return self.add(key, text)
+
+    def matrix(self, keys: List[str], texts: List[str]):
+        """
+        Stack the vectors for keys into one CSR matrix (one row per key),
+        vectorizing the matching entry of texts for keys not seen yet.
+        Returns None while the model has no vocabulary.
+        """
+        self._sync()
+        with self._lock:
+            if self.vectorizer is None:
+                return None
+            missing = [i for i, k in enumerate(keys) if self.vectors.get(k) is None]
+            if missing:
+                X = self.vectorizer.transform([texts[i] or "" for i in missing]).tocsr()
+                for row, i in enumerate(missing):
+                    self.vectors[keys[i]] = X[row]
+                    self._added[keys[i]] = texts[i]
+            rows = [self.vectors[k] for k in keys]
+            n_features = len(self.vectorizer.vocabulary_)
+        if not rows:
+            return sp.csr_matrix((0, n_features))
+        return sp.vstack(rows, format='csr')
+
+    def vector(self, key: str):
+        self._sync()
+        with self._lock:
+            return self.vectors.get(key)
+
+    def refit_async(self):
+        with self._lock:
+            if self._refit_thread is not None and self._refit_thread.is_alive():
+                return
+            self._refit_thread = threading.Thread(target=self._refit, daemon=True)
+            self._refit_thread.start()
+
+    def _refit(self):
+        try:
+            if self._fit_lock is None:
+                self.fit()
+            elif self._fit_lock.acquire(blocking=False):
+                try:
+                    # another process may have refit while this one was deciding to
+                    self._sync()
+                    with self._lock:
+                        drifted = self._drifted()
+                    if drifted:
+                        self._fit()
+                finally:
+                    self._fit_lock.release()
+            # else another process is refitting: its model is loaded once saved
+        except Exception as e:
+            print(f"Error refitting corpus model: {e}")
+
+
+def cosine(a, b) -> float:
+    """Cosine of two l2-normalized sparse row vectors."""
+    if a is None or b is None:
+        return 0.0
+    return float(a.multiply(b).sum())
@@ -1,9 +1,31 @@
 import os
 import io
+import mmap
 import re
-from typing import Dict, List
+import time
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, List, Tuple
 import PyPDF2
 
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+# Bump when extraction rules change so cached parse results are invalidated
+# (edits to COMMON_SKILLS and the settings below are picked up automatically,
+# see parse_cache.py)
+EXTRACTOR_VERSION = 1
+
+# Text extraction engine, pages read per document (0 = all) and seconds
+# spent on one document before the remaining pages are skipped (0 = no limit).
+# The time budget is a soft limit: it is checked between pages, so opening the
+# file and the page being read when it runs out are never cut short
+PDF_BACKEND = os.environ.get('PDF_BACKEND', 'pypdf2')
+PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', 50))
+PDF_TIME_BUDGET = float(os.environ.get('PDF_TIME_BUDGET', 20))
+
 # Enhanced COMMON_SKILLS list
 COMMON_SKILLS = [
 # Programming Languages
@@ -113,20 +135,127 @@ HEADER_PATTERNS = [
     r'(?i)certifications', r'(?i)projects', r'(?i)summary', r'(?i)objective'
 ]
 
-def extract_text_from_pdf(file_stream: io.BytesIO) -> str:
+class PdfTextBackend:
+    """
+    A text extraction engine. load() opens a binary stream (a BytesIO or a
+    read-only mmap); pages are then extracted one at a time so callers can
+    stop after a page or time limit.
+    """
+    name = None
+
+    def load(self, source):
+        raise NotImplementedError
+
+    def page_count(self, doc) -> int:
+        raise NotImplementedError
+
+    def page_text(self, doc, index: int) -> str:
+        raise NotImplementedError
+
+    def close(self, doc):
+        pass
+
+
+class PyPDF2Backend(PdfTextBackend):
+    name = 'pypdf2'
+
+    def load(self, source):
+        return PyPDF2.PdfReader(source)
+
+    def page_count(self, doc):
+        return len(doc.pages)
+
+    def page_text(self, doc, index):
+        try:
+            return doc.pages[index].extract_text() or ""
+        except Exception:
+            return ""
+
+
+class PyMuPDFBackend(PdfTextBackend):
+    """MuPDF engine, several times faster than PyPDF2 (optional: pip install pymupdf)."""
+    name = 'pymupdf'
+
+    def load(self, source):
+        if isinstance(source, io.BytesIO):
+            data = source.getbuffer()
+        elif isinstance(source, mmap.mmap):
+            data = memoryview(source)
+        else:
+            data = source.read()
+        return pymupdf.open(stream=data, filetype='pdf')
+
+    def page_count(self, doc):
+        return doc.page_count
+
+    def page_text(self, doc, index):
+        try:
+            return doc[index].get_text() or ""
+        except Exception:
+            return ""
+
+    def close(self, doc):
+        doc.close()
+
+
+PDF_BACKENDS = {PyPDF2Backend.name: PyPDF2Backend}
+if pymupdf is not None:
+    PDF_BACKENDS[PyMuPDFBackend.name] = PyMuPDFBackend
+
+
+def register_pdf_backend(backend_cls):
+    """Make a PdfTextBackend subclass selectable by its name (PDF_BACKEND)."""
+    PDF_BACKENDS[backend_cls.name] = backend_cls
+    return backend_cls
+
+
+def get_pdf_backend(name: str = None) -> PdfTextBackend:
+    name = name or PDF_BACKEND
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"Unknown or unavailable PDF backend {name!r}, choose from {sorted(PDF_BACKENDS)}")
+    return PDF_BACKENDS[name]()
+
+
+def extract_pdf_text(source, max_pages: int = None, time_budget: float = None,
+                     backend: str = None) -> Tuple[str, Dict]:
+    """
+    Text of the first max_pages pages, stopping early once time_budget
+    seconds are spent. The budget is soft: it is checked before each page
+    after the first, so the first page is always read and neither load()
+    nor a single slow page is interrupted; a document can overrun it by
+    that much. Returns (text, info) where info has the pages read, the page
+    count and 'truncated': None, 'max_pages' or 'time_budget'. Raises
+    ValueError for an unknown backend.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    time_budget = PDF_TIME_BUDGET if time_budget is None else time_budget
+    started = time.perf_counter()
+    pages = []
+    truncated = None
+    # outside the try: a misconfigured backend is an error, not an empty document
+    engine = get_pdf_backend(backend)
     try:
-        reader = PyPDF2.PdfReader(file_stream)
-        pages = []
-        for p in reader.pages:
-            try:
-                text = p.extract_text() or ""
-            except Exception:
-                text = ""
-            pages.append(text)
-        return "\n".join(pages)
+        doc = engine.load(source)
+        try:
+            total = engine.page_count(doc)
+            for index in range(total):
+                if max_pages and index >= max_pages:
+                    truncated = 'max_pages'
+                    break
+                if time_budget and index and time.perf_counter() - started > time_budget:
+                    truncated = 'time_budget'
+                    break
+                pages.append(engine.page_text(doc, index))
+        finally:
+            engine.close(doc)
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
-        return ""
+        return "", {'pages': 0, 'page_count': 0, 'truncated': None}
+    return "\n".join(pages), {'pages': len(pages), 'page_count': total, 'truncated': truncated}
+
+def extract_text_from_pdf(file_stream: io.BytesIO, max_pages: int = None, time_budget: float = None,
+                          backend: str = None) -> str:
+    return extract_pdf_text(file_stream, max_pages, time_budget, backend)[0]
 
 def split_by_header(full_text: str) -> Dict[str, str]:
     """
@@ -160,66 +289,186 @@ def split_by_header(full_text: str) -> Dict[str, str]:
                 keys['Other'] += "\n" + block if keys['Other'] else block
     return keys
 
+_WORD_BOUNDARY = re.compile(r'\b')
+_SKILLS_SECTION = re.compile(r'(?i)(?:skills?|technical skills?|competencies?|expertise)[:\-]\s*([^\n]+(?:\n[^\n]+)*)')
+_SKILL_SEPARATORS = re.compile(r'[,\|;/•\-•\n]')
+_TERMINAL = None  # trie key marking the end of a skill
+_SEPARATOR = '\x00'
+
+
+class SkillMatcher:
+    """
+    Precompiled matcher over a skills vocabulary.
+
+    Whole-word matching walks a character trie from every word boundary of
+    the lowercased text, so one pass finds every skill (including ones that
+    overlap, e.g. "React" inside "React Native"). Skills-section candidates
+    are resolved with the same first-match-in-list-order rule as before,
+    memoized per candidate.
+    """
+
+    def __init__(self, skills_list: List[str]):
+        self.skills = list(skills_list)
+        self.lowered = [s.lower() for s in self.skills]
+        self.trie = {}
+        for idx, skill_lower in enumerate(self.lowered):
+            node = self.trie
+            for ch in skill_lower:
+                node = node.setdefault(ch, {})
+            node.setdefault(_TERMINAL, []).append(idx)
+        # All lowercased skills joined in list order: the first occurrence of a
+        # candidate in this string is the first skill that contains it.
+        self._joined = _SEPARATOR.join(self.lowered)
+        self._offsets = []
+        pos = 0
+        for skill_lower in self.lowered:
+            self._offsets.append(pos)
+            pos += len(skill_lower) + 1
+        self._candidate_cache = {}
+
+    def _walk(self, text: str, start: int, boundaries=None):
+        """Yield indexes of skills that start at `start` in text."""
+        node = self.trie
+        j = start
+        n = len(text)
+        while j < n:
+            node = node.get(text[j])
+            if node is None:
+                return
+            j += 1
+            hits = node.get(_TERMINAL)
+            if hits and (boundaries is None or j in boundaries):
+                yield from hits
+
+    def match_words(self, text_lower: str) -> set:
+        """Return the skills appearing as whole words in an already-lowercased text."""
+        boundaries = set(m.start() for m in _WORD_BOUNDARY.finditer(text_lower))
+        found = set()
+        for start in boundaries:
+            for idx in self._walk(text_lower, start, boundaries):
+                found.add(self.skills[idx])
+        return found
+
+    def match_candidate(self, skill_lower: str):
+        """
+        Return the first skill (in list order) that contains or is contained in
+        the lowercased candidate, or None.
+        """
+        if skill_lower in self._candidate_cache:
+            return self._candidate_cache[skill_lower]
+        if _SEPARATOR in skill_lower:
+            best = next((i for i, cs in enumerate(self.lowered)
+                         if cs in skill_lower or skill_lower in cs), None)
+        else:
+            best = None
+            # skills contained in the candidate
+            for start in range(len(skill_lower)):
+                for idx in self._walk(skill_lower, start):
+                    if best is None or idx < best:
+                        best = idx
+            # skills containing the candidate
+            pos = self._joined.find(skill_lower)
+            if pos != -1:
+                idx = bisect_right(self._offsets, pos) - 1
+                if best is None or idx < best:
+                    best = idx
+        result = self.skills[best] if best is not None else None
+        if len(self._candidate_cache) < 50000:
+            self._candidate_cache[skill_lower] = result
+        return result
+
+
+_DEFAULT_MATCHER = SkillMatcher(COMMON_SKILLS)
+
+
+@lru_cache(maxsize=32)
+def _matcher_for(skills: tuple) -> SkillMatcher:
+    return SkillMatcher(list(skills))
+
+
+def get_skill_matcher(skills_list: List[str] = None) -> SkillMatcher:
+    if skills_list is None or skills_list is COMMON_SKILLS:
+        return _DEFAULT_MATCHER
+    return _matcher_for(tuple(skills_list))
+
+
 def extract_skills_from_text(text: str, skills_list: List[str] = None) -> List[str]:
-    if skills_list is None:
-        skills_list = COMMON_SKILLS
-    
-    found = set()
-    text_lower = text.lower()
-    
-    # Direct skill matching from common skills list
-    for skill in skills_list:
-        skill_lower = skill.lower()
-        # Match whole words only
-        if re.search(r'\b' + re.escape(skill_lower) + r'\b', text_lower):
-            found.add(skill)
-    
+    matcher = get_skill_matcher(skills_list)
+
+    # Direct skill matching from common skills list (whole words only)
+    found = matcher.match_words(text.lower())
+
     # Extract from skills sections more aggressively
-    skills_sections = re.findall(r'(?i)(?:skills?|technical skills?|competencies?|expertise)[:\-]\s*([^\n]+(?:\n[^\n]+)*)', text)
+    skills_sections = _SKILLS_SECTION.findall(text)
     for section in skills_sections:
         # Split by common separators
-        potential_skills = re.split(r'[,\|;/•\-•\n]', section)
+        potential_skills = _SKILL_SEPARATORS.split(section)
         for potential in potential_skills:
             skill_candidate = potential.strip()
             if len(skill_candidate) > 2 and skill_candidate not in ['', 'and', 'or']:
                 # Check if it matches any common skill
-                skill_lower = skill_candidate.lower()
-                for common_skill in skills_list:
-                    if common_skill.lower() in skill_lower or skill_lower in common_skill.lower():
-                        found.add(common_skill)
-                        break
-                else:
+                common_skill = matcher.match_candidate(skill_candidate.lower())
+                if common_skill is not None:
+                    found.add(common_skill)
+                elif len(skill_candidate) < 50 and not skill_candidate[0].isdigit():
                     # If not in common list but looks like a skill, add it
-                    if len(skill_candidate) < 50 and not skill_candidate[0].isdigit():
-                        found.add(skill_candidate)
-    
-    # Also look for skills in the entire text using keyword patterns
-    for skill in skills_list:
-        if skill not in found:
-            # More flexible matching for the entire text
-            pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-            if re.search(pattern, text_lower):
-                found.add(skill)
-    
+                    found.add(skill_candidate)
+
     return sorted(list(found))
 
-def extract_sections_from_pdf_bytes(pdf_bytes: bytes) -> Dict[str, str]:
-    stream = io.BytesIO(pdf_bytes)
-    full_text = extract_text_from_pdf(stream)
+def resume_skills(full_text: str, sections: Dict[str, str] = None) -> List[str]:
+    """Skills of a resume: from its Skills section if it has one, else from the whole text."""
+    if sections is None:
+        sections = split_by_header(full_text)
+    skills_text = sections.get('Skills', '') or ""
+    return extract_skills_from_text(skills_text or full_text)
+
+def extract_sections_from_stream(source, max_pages: int = None, time_budget: float = None,
+                                 backend: str = None, timings: dict = None) -> Dict[str, str]:
+    """
+    Parse a resume PDF into sections and skills. Pass a dict as `timings` to
+    get the seconds spent in pdf_text, split_sections and skill_extraction.
+    """
+    started = time.perf_counter()
+    full_text, info = extract_pdf_text(source, max_pages, time_budget, backend)
+    text_done = time.perf_counter()
     sections = split_by_header(full_text)
+    split_done = time.perf_counter()
     # Normalize output
     experience = sections.get('Experience', '')
     education = sections.get('Education', '')
-    skills_text = sections.get('Skills', '') or ""
-    # If no explicit skills header, search whole text
-    skills = extract_skills_from_text(full_text) if not skills_text else extract_skills_from_text(skills_text)
+    skills = resume_skills(full_text, sections)
+    if timings is not None:
+        timings['pdf_text'] = text_done - started
+        timings['split_sections'] = split_done - text_done
+        timings['skill_extraction'] = time.perf_counter() - split_done
     # Compose concise combined text for similarity checks
     combined = " ".join([sections.get('Summary',''), experience, education])
     combined = combined.strip() or full_text[:1000]
-    return {
+    parsed = {
         'raw_text': full_text,
         'experience': experience.strip(),
         'education': education.strip(),
         'skills': skills,
         'combined_text': combined
-    }
\ No newline at end of file
+    }
+    if info['truncated']:
+        parsed['truncated'] = info['truncated']
+    return parsed
+
+def extract_sections_from_pdf_bytes(pdf_bytes: bytes, timings: dict = None) -> Dict[str, str]:
+    return extract_sections_from_stream(io.BytesIO(pdf_bytes), timings=timings)
+
+def extract_sections_from_pdf_file(path: str, timings: dict = None) -> Dict[str, str]:
+    """
+    Same as extract_sections_from_pdf_bytes for a file on disk, read through
+    a memory map instead of a copy (picklable for process pools).
+    """
+    with open(path, 'rb') as fh:
+        try:
+            source = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            return extract_sections_from_pdf_bytes(b'', timings)
+        with source:
+            return extract_sections_from_stream(source, timings=timings)
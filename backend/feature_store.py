@@ -0,0 +1,154 @@
+"""
+Resident skill features: every resume (or job) is a row of a packed bit
+matrix over an integer skill vocabulary, so the shared-skill counts of
+one job against all resumes are one AND + popcount per row instead of a
+Python set intersection per pair.
+"""
+import threading
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from extractor import COMMON_SKILLS
+
+# set bits per byte value, for NumPy < 2.0 (no np.bitwise_count)
+_BYTE_BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits of each uint64 in words."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    words = np.ascontiguousarray(words)
+    return _BYTE_BITS[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+class SkillVocabulary:
+    """Skill -> integer id: COMMON_SKILLS (lowercased) first, then custom skills as they are seen."""
+
+    def __init__(self, base: List[str] = None):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for skill in (COMMON_SKILLS if base is None else base):
+            self._ids.setdefault(skill.lower(), len(self._ids))
+        self.base_size = len(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def ids(self, skills: Iterable[str], add: bool = False) -> List[int]:
+        """Ids of skills (lowercase, as in feature records); unknown ones are added or skipped."""
+        out = []
+        for skill in skills:
+            skill_id = self._ids.get(skill)
+            if skill_id is None and add:
+                with self._lock:
+                    skill_id = self._ids.setdefault(skill, len(self._ids))
+            if skill_id is not None:
+                out.append(skill_id)
+        return out
+
+    @property
+    def overflow(self) -> int:
+        return len(self._ids) - self.base_size
+
+
+class SkillMatrix:
+    """
+    Skills and title masks of one collection, one row per document: bit i
+    of a row is set when the document lists vocabulary skill i.
+
+    Rows are only appended (re-adding an id points it at a new row), so a
+    reader working on the arrays it was handed is never disturbed by writers.
+    """
+
+    def __init__(self, vocabulary: SkillVocabulary, capacity: int = 1024):
+        self.vocabulary = vocabulary
+        self._bits = np.zeros((capacity, self._words_for(len(vocabulary))), dtype=np.uint64)
+        self._masks = np.zeros(capacity, dtype=np.int64)
+        self._n = 0
+        self._row: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _words_for(n_skills: int) -> int:
+        return max(1, (n_skills + 63) // 64)
+
+    @classmethod
+    def build(cls, records: Dict[str, dict], vocabulary: SkillVocabulary) -> 'SkillMatrix':
+        """From stored records that carry a 'features' entry."""
+        matrix = cls(vocabulary, capacity=max(1024, len(records)))
+        matrix.add_records(records.values())
+        return matrix
+
+    def _mask(self, skill_ids: List[int], words: int) -> np.ndarray:
+        row = np.zeros(words, dtype=np.uint64)
+        for skill_id in skill_ids:
+            row[skill_id >> 6] |= np.uint64(1) << np.uint64(skill_id & 63)
+        return row
+
+    def add(self, doc_id: str, skills: Iterable[str], title_mask: int = 0):
+        self.add_records([{'id': doc_id, 'features': {'skills': list(skills), 'title_mask': title_mask}}])
+
+    def add_records(self, records: Iterable[dict]):
+        records = list(records)
+        encoded = [(r['id'], self.vocabulary.ids(r['features']['skills'], add=True), r['features']['title_mask'])
+                   for r in records]
+        with self._lock:
+            words = self._words_for(len(self.vocabulary))
+            needed = self._n + len(encoded)
+            if needed > len(self._bits) or words > self._bits.shape[1]:
+                # grow into new arrays; readers keep the old ones
+                capacity = max(needed, 2 * len(self._bits))
+                bits = np.zeros((capacity, max(words, self._bits.shape[1])), dtype=np.uint64)
+                bits[:self._n, :self._bits.shape[1]] = self._bits[:self._n]
+                masks = np.zeros(capacity, dtype=np.int64)
+                masks[:self._n] = self._masks[:self._n]
+                self._bits, self._masks = bits, masks
+            start = self._n
+            rows = np.repeat(np.arange(start, start + len(encoded)), [len(ids) for _, ids, _ in encoded])
+            skill_ids = np.fromiter((i for _, ids, _ in encoded for i in ids), dtype=np.int64, count=len(rows))
+            np.bitwise_or.at(self._bits, (rows, skill_ids >> 6),
+                             np.left_shift(np.uint64(1), (skill_ids & 63).astype(np.uint64)))
+            self._masks[start:start + len(encoded)] = [mask for _, _, mask in encoded]
+            for offset, (doc_id, _, _) in enumerate(encoded):
+                self._row[doc_id] = start + offset
+            self._n = start + len(encoded)
+
+    def rows(self, ids: List[str], records: Dict[str, dict] = None) -> np.ndarray:
+        """Row numbers of ids; ids not added yet are added from records (id -> stored record)."""
+        missing = [i for i in ids if i not in self._row]
+        if missing:
+            if records is None:
+                raise KeyError(missing[0])
+            self.add_records(records[i] for i in missing)
+        row = self._row
+        return np.fromiter((row[i] for i in ids), dtype=np.int64, count=len(ids))
+
+    def shared_counts(self, rows: np.ndarray, skills: Iterable[str]) -> np.ndarray:
+        """How many of `skills` each row lists."""
+        with self._lock:
+            bits = self._bits
+        query = self._mask(self.vocabulary.ids(skills), bits.shape[1])
+        words = np.flatnonzero(query)
+        if len(words) == 0 or len(rows) == 0:
+            return np.zeros(len(rows), dtype=np.int64)
+        block = bits[np.ix_(rows, words)] & query[words]
+        return popcount(block).sum(axis=1, dtype=np.int64)
+
+    def title_masks(self, rows: np.ndarray) -> np.ndarray:
+        with self._lock:
+            masks = self._masks
+        return masks[rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            n, bits, masks = self._n, self._bits, self._masks
+        return {
+            'rows': n,
+            'documents': len(self._row),
+            'vocabulary': len(self.vocabulary),
+            'overflow_skills': self.vocabulary.overflow,
+            'bytes_per_row': bits.shape[1] * 8 + masks.itemsize,
+            'allocated_bytes': bits.nbytes + masks.nbytes,
+        }
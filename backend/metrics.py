@@ -0,0 +1,269 @@
+"""
+In-process latency histograms and counters, rendered in the Prometheus
+text format by /metrics.
+
+    with stage('tfidf'):
+        ...
+
+times a block into resume_matcher_stage_seconds{stage="tfidf"} and, while
+a request is being tracked in this context (start_request/finish_request),
+adds it to that request's per-stage breakdown.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+PREFIX = 'resume_matcher'
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, '') for n in self.labelnames), 0)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}  # labels -> [per-bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels.get(n, '') for n in self.labelnames))
+        return series[-1] if series else 0
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = _labels(self.labelnames, key, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = _labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {series[-1]}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}"
+
+
+class Gauge:
+    """A value read from a callback at scrape time (e.g. cache statistics)."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float], kind: str = 'gauge'):
+        self.name, self.help, self.fn, self.kind = name, help, fn, kind
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield f"{self.name} {_number(self.fn())}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._add(Counter(f"{PREFIX}_{name}", help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(f"{PREFIX}_{name}", help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, kind='gauge') -> Gauge:
+        return self._add(Gauge(f"{PREFIX}_{name}", help, fn, kind))
+
+    def render(self) -> str:
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram('stage_seconds', 'Time spent per pipeline stage.', ('stage',))
+REQUEST_SECONDS = REGISTRY.histogram('request_seconds', 'Request latency by endpoint.', ('method', 'endpoint'))
+DOCUMENTS = REGISTRY.counter('documents_total', 'Documents ingested.', ('kind',))
+PAIRS_SCORED = REGISTRY.counter('pairs_scored_total', 'Resume/job pairs scored.')
+PAIRS_PRUNED = REGISTRY.counter('pairs_pruned_total', 'Resume/job pairs left out by candidate blocking.')
+MATCHES_RESCORED = REGISTRY.counter('matches_rescored_total', 'Stale matches rescored with the current SCORE_VERSION.')
+
+# (started, per-stage seconds) of the request being tracked. A context
+# variable rather than a thread-local, so that an async request's breakdown
+# follows it into the worker threads it hands work to.
+_request = contextvars.ContextVar('metrics_request', default=None)
+
+
+def observe(name: str, seconds: float):
+    """Record a stage duration measured elsewhere (e.g. in a worker process)."""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    tracked = _request.get()
+    if tracked is not None:
+        breakdown = tracked[1]
+        breakdown[name] = breakdown.get(name, 0.0) + seconds
+
+
+def observe_stages(timings: Dict[str, float]):
+    for name, seconds in timings.items():
+        observe(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def start_request():
+    _request.set((time.perf_counter(), {}))
+
+
+def finish_request() -> Tuple[float, Optional[Dict[str, float]]]:
+    """(elapsed seconds, per-stage seconds) of the request tracked in this context."""
+    tracked = _request.get()
+    _request.set(None)
+    if tracked is None:
+        return 0.0, None
+    return time.perf_counter() - tracked[0], tracked[1]
+
+
+class TimedLock:
+    """A threading.Lock that records how long callers wait for it and hold it."""
+
+    def __init__(self, name: str = 'lock'):
+        self._lock = threading.Lock()
+        self._wait_stage = f"{name}_wait"
+        self._hold_stage = f"{name}_hold"
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        started = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            self._acquired_at = time.perf_counter()
+            observe(self._wait_stage, self._acquired_at - started)
+        return acquired
+
+    def release(self):
+        held = time.perf_counter() - self._acquired_at
+        self._lock.release()
+        observe(self._hold_stage, held)
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class RWLock:
+    """
+    Many readers or one writer. A waiting writer holds off new readers so
+    writes are not starved; not reentrant. Records read and write wait
+    times and write hold times.
+    """
+
+    def __init__(self, name: str = 'rwlock'):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+        self._read_wait_stage = f"{name}_read_wait"
+        self._write_wait_stage = f"{name}_write_wait"
+        self._write_hold_stage = f"{name}_write_hold"
+
+    @contextmanager
+    def read(self):
+        started = time.perf_counter()
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        observe(self._read_wait_stage, time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        started = time.perf_counter()
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        acquired = time.perf_counter()
+        observe(self._write_wait_stage, acquired - started)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+            observe(self._write_hold_stage, time.perf_counter() - acquired)
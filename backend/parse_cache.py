@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import extractor
+from extractor import COMMON_SKILLS, EXTRACTOR_VERSION, extract_sections_from_pdf_bytes
+
+
+def extractor_fingerprint() -> str:
+    """EXTRACTOR_VERSION plus a hash of the skills vocabulary and the text extraction settings."""
+    settings = [extractor.PDF_BACKEND, str(extractor.PDF_MAX_PAGES)] + COMMON_SKILLS
+    settings_hash = hashlib.sha256("\n".join(settings).encode('utf-8')).hexdigest()[:12]
+    return f"v{EXTRACTOR_VERSION}-{settings_hash}"
+
+
+def pdf_digest(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """pdf_digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    extract_sections_from_pdf_bytes results keyed by the SHA-256 of the PDF.
+
+    Entries live on disk under <folder>/<extractor fingerprint>/, so a change
+    to the extractor or its vocabulary starts a fresh cache, and the most
+    recently used `max_entries` are also kept in memory.
+    """
+
+    def __init__(self, folder: str, max_entries: int = 256, fingerprint: str = None):
+        self.folder = os.path.join(folder, fingerprint or extractor_fingerprint())
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.folder, digest[:2], digest + '.json')
+
+    def _remember(self, digest: str, parsed: dict):
+        with self._lock:
+            self._memory[digest] = parsed
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, digest: str) -> Optional[dict]:
+        with self._lock:
+            parsed = self._memory.get(digest)
+            if parsed is not None:
+                self._memory.move_to_end(digest)
+                self.hits += 1
+                self.memory_hits += 1
+                return parsed
+        try:
+            with open(self._path(digest), 'r', encoding='utf-8') as f:
+                parsed = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        self._remember(digest, parsed)
+        return parsed
+
+    def put(self, digest: str, parsed: dict):
+        if parsed.get('truncated') == 'time_budget':
+            # depends on machine load, parse it again next time
+            return
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(parsed, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._remember(digest, parsed)
+
+    def extract(self, pdf_bytes: bytes) -> dict:
+        """Cached extract_sections_from_pdf_bytes."""
+        digest = pdf_digest(pdf_bytes)
+        parsed = self.get(digest)
+        if parsed is None:
+            parsed = extract_sections_from_pdf_bytes(pdf_bytes)
+            self.put(digest, parsed)
+        return parsed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'fingerprint': os.path.basename(self.folder),
+                'hits': self.hits,
+                'memory_hits': self.memory_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+            }
@@ -0,0 +1,86 @@
+"""
+Questionnaire (chatbot) scoring. QuestionIndex is built once from the
+question list: a question is found by its text or its short id in one dict
+lookup, option values sit in a padded matrix and the maximum score is
+computed up front, so a batch of many applicants' answers is scored with
+one gather and one bincount.
+"""
+import hashlib
+import json
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def question_id(text: str) -> str:
+    """Stable short id of a question: a hash of its text."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]
+
+
+class QuestionIndex:
+    """
+    Questions as dicts with 'q', 'options' and 'values' (points per
+    option). `version` changes whenever a question or its values do, so
+    stored scores can tell which question set produced them.
+    """
+
+    def __init__(self, questions: List[dict]):
+        self.questions = questions
+        self.ids = [question_id(q['q']) for q in questions]
+        self._row = {}
+        for row, (question, qid) in enumerate(zip(questions, self.ids)):
+            self._row[question['q']] = row
+            self._row[qid] = row
+        self._n_options = [len(q['values']) for q in questions]
+        self._values = np.zeros((len(questions), max(self._n_options, default=1)), dtype=np.float64)
+        for row, question in enumerate(questions):
+            self._values[row, :len(question['values'])] = question['values']
+        self.max_score = float(sum(max(q['values']) for q in questions))
+        self.version = hashlib.sha1(json.dumps([[q['q'], q['values']] for q in questions]).encode()).hexdigest()[:10]
+
+    def describe(self) -> List[dict]:
+        """The questions as clients see them (no values), with their ids."""
+        return [{'id': qid, 'q': q['q'], 'type': q.get('type', 'choice'), 'options': q['options']}
+                for qid, q in zip(self.ids, self.questions)]
+
+    def score(self, answer_sets: List[list]) -> Tuple[List[float], List[Optional[str]]]:
+        """
+        Score answer sets, each a list of {"question" (text) or "question_id",
+        "option_index"}. Returns the normalized scores (0..100, 2 decimals)
+        and, per set, an error message or None. Answers to unknown questions
+        count for nothing; an answer set with a malformed answer (not an
+        object, or without a string question / question_id) or an
+        option_index out of range gets an error (and a score of 0).
+        """
+        rows, options, owners = [], [], []
+        errors = [None] * len(answer_sets)
+        for n, answers in enumerate(answer_sets):
+            if not isinstance(answers, list):
+                errors[n] = 'answers must be a list'
+                continue
+            for item in answers:
+                if not isinstance(item, dict):
+                    errors[n] = 'each answer must be an object'
+                    break
+                key = item.get('question_id', item.get('question'))
+                if not isinstance(key, str):
+                    errors[n] = 'each answer needs a question or question_id string'
+                    break
+                row = self._row.get(key)
+                if row is None:
+                    continue
+                option = item.get('option_index', 0)
+                if (not isinstance(option, int) or isinstance(option, bool)
+                        or not 0 <= option < self._n_options[row]):
+                    errors[n] = f"invalid option_index for question {self.ids[row]}: {option!r}"
+                    break
+                rows.append(row)
+                options.append(option)
+                owners.append(n)
+        if rows:
+            values = self._values[np.array(rows), np.array(options)]
+            totals = np.bincount(np.array(owners), weights=values, minlength=len(answer_sets))
+        else:
+            totals = np.zeros(len(answer_sets))
+        return [0.0 if error else round(float(total) / self.max_score * 100, 2)
+                for total, error in zip(totals, errors)], errors
@@ -0,0 +1,428 @@
+"""
+Offline rebuild of the data set from the PDFs in the upload folder:
+
+    python reindex.py [--workers 4] [--chunk 500] [--backend sqlite] [--restart]
+
+Every PDF under uploads/ is re-extracted on a process pool (a bounded
+number in flight; files the parse cache already knows under the current
+extractor are not parsed again), resume and job features are recomputed,
+the corpus TF-IDF model is refit and every job x resume pair is scored
+again. Everything is written to a SQLite staging database under
+data/reindex/ one chunk at a time, next to a checkpoint, so only one chunk
+of parses and scores is held in memory and an interrupted run carries on
+from the last chunk when started again. The finished data set replaces
+the old one with one rename per file; the old files are kept in
+data/previous/, and a swap cut short is finished by the next run. A
+throughput report is printed as JSON.
+
+A stored resume keeps its id, name, upload time and questionnaire score
+when its file is still in the upload folder (if several resumes name the
+same file, the newest one gets it); a PDF no resume names becomes a new
+resume; a resume whose file is gone keeps its stored text. Match seqs
+start again from 1, so /matches/changes clients resync with no since.
+
+Run it with the server stopped, or restart the server afterwards.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Iterator
+
+from bulk_import import timed_extract
+from corpus import CorpusModel, job_key, resume_key
+from parse_cache import ParseCache, file_digest
+from scoring import SCORE_VERSION, job_features, resume_features, score_matrix
+from storage import FileLock, SqliteStorage, make_storage
+
+WORK_FOLDER = 'reindex'
+PREVIOUS_FOLDER = 'previous'
+# parses queued on the pool per worker; caps how many results wait in memory
+IN_FLIGHT_PER_WORKER = 4
+DATA_FILES = {'json': ['resumes.json', 'jobs.json', 'matches.json'], 'sqlite': ['app.db']}
+
+
+def _pdf_files(folder: str, root: str = None) -> Iterator[str]:
+    """PDF paths under folder, relative to it, one directory at a time in name order (no .tmp uploads)."""
+    root = folder if root is None else root
+    with os.scandir(folder) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _pdf_files(entry.path, root)
+        elif entry.is_file() and entry.name.lower().endswith('.pdf'):
+            yield os.path.relpath(entry.path, root).replace(os.sep, '/')
+
+
+def _records(store, collection: str, page: int) -> Iterator[dict]:
+    """Every resume or job, read `page` records at a time."""
+    cursor = None
+    while True:
+        records, cursor = store.records_page(collection, page, cursor)
+        yield from records.values()
+        if cursor is None:
+            return
+
+
+def _unique_id(name: str, stamp: int, taken: set) -> str:
+    """<name>_<stamp>, or <name>_<stamp>_2, _3, ... when taken (which it is added to)."""
+    resume_id = f"{name}_{stamp}"
+    n = 2
+    while resume_id in taken:
+        resume_id = f"{name}_{stamp}_{n}"
+        n += 1
+    taken.add(resume_id)
+    return resume_id
+
+
+def _save_checkpoint(path: str, checkpoint: dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _rate(n: int, seconds: float) -> float:
+    return round(n / seconds, 1) if seconds > 0 else 0.0
+
+
+class Reindexer:
+    """One rebuild of a data folder; every phase picks up from the checkpoint."""
+
+    def __init__(self, data_folder: str, upload_folder: str, backend: str, workers: int = None,
+                 chunk: int = 500, parse_cache: bool = True):
+        self.data_folder = data_folder
+        self.upload_folder = upload_folder
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk = chunk
+        self.work_folder = os.path.join(data_folder, WORK_FOLDER)
+        self.checkpoint_path = os.path.join(self.work_folder, 'checkpoint.json')
+        self.cache = ParseCache(os.path.join(data_folder, 'parse_cache'), max_entries=0) if parse_cache else None
+        self.checkpoint = None
+        self.staging = None
+        self.corpus = None
+        self._old_ids = set()
+        self._phase = None
+        self._phase_base = 0.0
+        self._phase_started = None
+        self._staged = 0
+
+    def start(self, restart: bool = False):
+        """Load the checkpoint of an interrupted run (unless restart), or begin a new one."""
+        if restart:
+            shutil.rmtree(self.work_folder, ignore_errors=True)
+        os.makedirs(self.work_folder, exist_ok=True)
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                self.checkpoint = json.load(f)
+            if self.checkpoint['backend'] != self.backend or self.checkpoint['uploads'] != self.upload_folder:
+                raise ValueError(f"{self.checkpoint_path} is from a run with other settings; use --restart")
+            print(f"Resuming from phase {self.checkpoint['phase']}", flush=True)
+        else:
+            self.checkpoint = {'backend': self.backend, 'uploads': self.upload_folder, 'phase': 'extract',
+                               'started_at': datetime.utcnow().isoformat(), 'stamp': int(time.time()),
+                               'match_cursor': None, 'seconds': {}, 'counts': {}, 'errors': []}
+        # once the swap is planned the staged files are being moved away: never recreate them
+        if 'swap' not in self.checkpoint:
+            self.staging = SqliteStorage(os.path.join(self.work_folder, 'staging.db'))
+        self.corpus = CorpusModel(os.path.join(self.work_folder, 'corpus_model.pkl'), self._documents)
+
+    def _save(self, **changes):
+        if self._phase is not None:
+            self._clock()
+        self.checkpoint.update(changes)
+        _save_checkpoint(self.checkpoint_path, self.checkpoint)
+
+    def _count(self, name: str, n: int = 1):
+        counts = self.checkpoint['counts']
+        counts[name] = counts.get(name, 0) + n
+
+    def _timed(self, phase: str, fn):
+        self._phase = phase
+        self._phase_base = self.checkpoint['seconds'].get(phase, 0.0)
+        self._phase_started = time.perf_counter()
+        fn()
+        self._clock()
+        self._phase = None
+
+    def _clock(self):
+        """Record the time spent in the current phase, including earlier runs' checkpointed time."""
+        self.checkpoint['seconds'][self._phase] = round(self._phase_base + time.perf_counter() - self._phase_started, 3)
+
+    def _progress(self, message: str, n: int):
+        """A progress line with the rate of this run of the phase (n done since it started)."""
+        print(f"{message} ({_rate(n, time.perf_counter() - self._phase_started)}/s)", flush=True)
+
+    def run(self) -> dict:
+        phases = ['extract', 'fit', 'match', 'swap', 'done']
+        steps = {'extract': self.extract, 'fit': self.fit, 'match': self.match, 'swap': self.swap}
+        while self.checkpoint['phase'] != 'done':
+            phase = self.checkpoint['phase']
+            self._timed(phase, steps[phase])
+            self._save(phase=phases[phases.index(phase) + 1])
+        return self.report()
+
+    def extract(self):
+        """Parse the upload folder into staging resumes, then carry over the rest and recompute job features."""
+        old = make_storage(self.backend, self.data_folder)
+        # the newest resume naming each file gets it
+        owners = {}
+        for record in _records(old, 'resumes', self.chunk):
+            self._old_ids.add(record['id'])
+            owner = owners.get(record.get('filename'))
+            if owner is None or record.get('uploaded_at', '') >= owner[0]:
+                owners[record.get('filename')] = (record.get('uploaded_at', ''), record['id'])
+        # staged by an interrupted run
+        done_files, taken = set(), set(self._old_ids)
+        for record in _records(self.staging, 'resumes', self.chunk):
+            done_files.add(record.get('filename'))
+            taken.add(record['id'])
+
+        pending, chunk = {}, []
+        in_flight = self.workers * IN_FLIGHT_PER_WORKER
+        # spawned, not forked: workers must not inherit the reindex lock, or a killed run would leave it held
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            for filename in _pdf_files(self.upload_folder):
+                if filename in done_files:
+                    continue
+                record = self._new_record(old, owners, filename, taken)
+                path = os.path.join(self.upload_folder, filename)
+                try:
+                    digest = file_digest(path)
+                except OSError as e:
+                    self._failed(filename, e)
+                    continue
+                parsed = self.cache.get(digest) if self.cache else None
+                if parsed is not None:
+                    self._count('parse_cache_hits')
+                    chunk.append(self._parsed(record, parsed))
+                else:
+                    pending[pool.submit(timed_extract, path)] = (record, digest)
+                    if len(pending) >= in_flight:
+                        chunk += self._collect(pending, FIRST_COMPLETED)
+                if len(chunk) >= self.chunk:
+                    self._put_resumes(chunk)
+                    chunk = []
+            chunk += self._collect(pending, ALL_COMPLETED)
+        self._put_resumes(chunk)
+
+        # resumes whose file is gone (or was overwritten by a newer upload)
+        staged = {r['id'] for r in _records(self.staging, 'resumes', self.chunk)}
+        carried = []
+        for record in _records(old, 'resumes', self.chunk):
+            if record['id'] not in staged:
+                carried.append(dict(record, features=resume_features(record.get('parsed', {}))))
+                if len(carried) >= self.chunk:
+                    self._put_resumes(carried, carried_over=True)
+                    carried = []
+        self._put_resumes(carried, carried_over=True)
+        jobs = [dict(job, features=job_features(job.get('job_text', '') or '')) for job in _records(old, 'jobs', self.chunk)]
+        self.staging.put_jobs(jobs)
+        self._count('jobs', len(jobs))
+        old.close()
+
+    def _new_record(self, old, owners, filename, taken) -> dict:
+        """The record a PDF (path relative to the upload folder) is parsed into, still without parsed/features."""
+        owner = owners.get(filename)
+        if owner is not None:
+            return old.get_resume(owner[1])
+        name = os.path.splitext(os.path.basename(filename))[0] or 'Applicant'
+        return {'id': _unique_id(name, self.checkpoint['stamp'], taken), 'name': name, 'filename': filename,
+                'uploaded_at': datetime.utcnow().isoformat()}
+
+    def _parsed(self, record: dict, parsed: dict) -> dict:
+        return dict(record, parsed=parsed, features=resume_features(parsed))
+
+    def _failed(self, filename: str, error: Exception):
+        self._count('errors')
+        # the first ones are enough to go on
+        if len(self.checkpoint['errors']) < 100:
+            self.checkpoint['errors'].append({'filename': filename, 'error': f"{type(error).__name__}: {error}"})
+
+    def _collect(self, pending: dict, return_when) -> list:
+        """Wait for one (FIRST_COMPLETED) or all (ALL_COMPLETED) queued parses; returns the parsed records."""
+        done, _ = wait(list(pending), return_when=return_when)
+        out = []
+        for future in done:
+            record, digest = pending.pop(future)
+            try:
+                parsed, timings = future.result()
+            except Exception as e:
+                self._failed(record['filename'], e)
+                continue
+            self._count('parsed')
+            if self.cache:
+                self.cache.put(digest, parsed)
+            out.append(self._parsed(record, parsed))
+        return out
+
+    def _put_resumes(self, records: list, carried_over: bool = False):
+        """Stage a chunk of resumes and checkpoint it."""
+        if not records:
+            return
+        self.staging.put_resumes(records)
+        if carried_over:
+            self._count('carried_over', len(records))
+        else:
+            reparsed = sum(r['id'] in self._old_ids for r in records)
+            self._count('reparsed', reparsed)
+            self._count('new_resumes', len(records) - reparsed)
+        self._count('resumes', len(records))
+        self._save()
+        self._staged += len(records)
+        self._progress(f"extract: {self.checkpoint['counts']['resumes']} resumes staged", self._staged)
+
+    def _documents(self) -> dict:
+        docs = {}
+        for job in _records(self.staging, 'jobs', self.chunk):
+            docs[job_key(job['id'])] = job.get('job_text', '') or ''
+        for record in _records(self.staging, 'resumes', self.chunk):
+            docs[resume_key(record['id'])] = record.get('parsed', {}).get('combined_text', '') or ''
+        return docs
+
+    def fit(self):
+        self.corpus.fit()
+
+    def match(self):
+        """Score every staged resume against every job, one chunk of resumes per transaction."""
+        self.corpus.load()
+        jobs = list(_records(self.staging, 'jobs', self.chunk))
+        job_matrix = self.corpus.matrix([job_key(j['id']) for j in jobs], [j.get('job_text', '') or '' for j in jobs])
+        cursor = self.checkpoint['match_cursor']
+        scored = 0
+        while jobs:
+            page, next_cursor = self.staging.records_page('resumes', self.chunk, cursor)
+            records = list(page.values())
+            matrix = self.corpus.matrix([resume_key(r['id']) for r in records],
+                                        [r.get('parsed', {}).get('combined_text', '') or '' for r in records])
+            scores = score_matrix([r['features'] for r in records], matrix, [j['features'] for j in jobs], job_matrix)
+            timestamp = datetime.utcnow().isoformat()
+            self.staging.put_matches([{
+                'resume_id': record['id'],
+                'job_id': job['id'],
+                'applicant_name': record.get('name', ''),
+                'score': score,
+                'timestamp': timestamp,
+                'score_version': SCORE_VERSION
+            } for record, row in zip(records, scores) for job, score in zip(jobs, row)])
+            self._count('matches', len(records) * len(jobs))
+            if next_cursor is None:
+                return
+            cursor = next_cursor
+            self._save(match_cursor=cursor)
+            scored += len(records) * len(jobs)
+            self._progress(f"match: {self.checkpoint['counts']['matches']} pairs scored", scored)
+
+    def swap(self):
+        """
+        Move the staged data set (and corpus model) into the data folder, one
+        rename per file, keeping the old files in previous/. The plan and
+        every rename are checkpointed, so a run interrupted part way (which
+        leaves a mix of old and new files) finishes the swap when started
+        again, without touching previous/ or the files already moved.
+        """
+        if 'swap' not in self.checkpoint:
+            self._plan_swap()
+        plan = self.checkpoint['swap']
+        for name, path in plan['files'].items():
+            if name in plan['moved']:
+                continue
+            target = os.path.join(self.data_folder, name)
+            if os.path.exists(path):
+                os.replace(path, target)
+            elif not os.path.exists(target):
+                raise RuntimeError(f"{path} is gone and {target} was never swapped in; rerun with --restart")
+            # else: renamed by the interrupted run just before it could checkpoint
+            plan['moved'].append(name)
+            self._save()
+        print(f"Swapped in {sorted(plan['files'])}; the old files are in {plan['previous']}", flush=True)
+
+    def _plan_swap(self):
+        """Build the files to swap in and keep the old ones in previous/; nothing is renamed yet."""
+        previous = os.path.join(self.data_folder, PREVIOUS_FOLDER)
+        shutil.rmtree(previous, ignore_errors=True)
+        os.makedirs(previous)
+        if self.backend == 'json':
+            built = self._export_json()
+        else:
+            # closing the last connection folds the WAL back into the file
+            self.staging.close()
+            built = {'app.db': self.staging.db_path}
+            for suffix in ('-wal', '-shm'):
+                if os.path.exists(os.path.join(self.data_folder, 'app.db' + suffix)):
+                    raise RuntimeError(f"app.db{suffix} exists: stop the server before swapping")
+        if os.path.exists(self.corpus.path):
+            built['corpus_model.pkl'] = self.corpus.path
+        for name in built:
+            target = os.path.join(self.data_folder, name)
+            if os.path.exists(target):
+                # linked rather than moved, so the old file stays in place until the rename replaces it
+                try:
+                    os.link(target, os.path.join(previous, name))
+                except OSError:
+                    shutil.copy2(target, os.path.join(previous, name))
+        self._save(swap={'files': built, 'moved': [], 'previous': previous})
+
+    def _export_json(self) -> dict:
+        """The staged data set as resumes.json, jobs.json and matches.json; returns name -> path."""
+        folder = os.path.join(self.work_folder, 'json')
+        shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder)
+        # JSON storage holds (and writes) the whole data set at once, as the server does
+        target = make_storage('json', folder)
+        target.put_resumes(list(_records(self.staging, 'resumes', self.chunk)))
+        target.put_jobs(list(_records(self.staging, 'jobs', self.chunk)))
+        entries, after, more = [], 0, True
+        while more:
+            batch, after, more = self.staging.match_changes(after, self.chunk * 100)
+            entries += batch
+        target.put_matches(entries)
+        return {name: os.path.join(folder, name) for name in DATA_FILES['json']}
+
+    def report(self) -> dict:
+        counts, seconds = self.checkpoint['counts'], self.checkpoint['seconds']
+        parsed = counts.get('parsed', 0) + counts.get('parse_cache_hits', 0)
+        return {
+            'counts': counts,
+            'seconds': seconds,
+            'files_per_sec': _rate(parsed, seconds.get('extract', 0)),
+            'pairs_per_sec': _rate(counts.get('matches', 0), seconds.get('match', 0)),
+            'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'errors': self.checkpoint['errors'],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild resumes, jobs and matches from the uploaded PDFs.')
+    parser.add_argument('--data', default='data', help='data folder to rebuild')
+    parser.add_argument('--uploads', default='uploads', help='folder with the resume PDFs')
+    parser.add_argument('--backend', default=os.environ.get('STORAGE_BACKEND', 'json'), choices=sorted(DATA_FILES))
+    parser.add_argument('--workers', type=int, default=None, help='parser processes (default: cpu count)')
+    parser.add_argument('--chunk', type=int, default=500, help='resumes per staged write and checkpoint')
+    parser.add_argument('--no-parse-cache', action='store_true', help='parse every file again')
+    parser.add_argument('--restart', action='store_true', help='discard the checkpoint of an interrupted run')
+    args = parser.parse_args()
+
+    lock = FileLock(os.path.join(args.data, 'reindex.lock'), 'reindex')
+    if not lock.acquire(blocking=False):
+        sys.exit('Another reindex is running on this data folder')
+    try:
+        reindexer = Reindexer(args.data, args.uploads, args.backend, args.workers, args.chunk,
+                              parse_cache=not args.no_parse_cache)
+        reindexer.start(args.restart)
+        report = reindexer.run()
+        shutil.rmtree(reindexer.work_folder, ignore_errors=True)
+    finally:
+        lock.release()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Rescoring of matches stamped with an older scoring.SCORE_VERSION, after
+an edit to the score weights, TITLE_KEYWORDS, COMMON_SKILLS or the
+extractor. Reads rescore the matches they are about to return, and a
+background pass works through the rest one job and one batch at a time,
+so an upgrade needs neither downtime nor re-uploads.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from corpus import job_key, resume_key
+from metrics import MATCHES_RESCORED, stage
+from scoring import SCORE_VERSION, score_resumes_for_job
+
+
+def _restamped(entry: dict, score: float, lower_bound: bool) -> dict:
+    out = {k: v for k, v in entry.items() if k != 'lower_bound'}
+    out['score'] = score
+    out['score_version'] = SCORE_VERSION
+    if lower_bound:
+        out['lower_bound'] = True
+    return out
+
+
+class Rescorer:
+    """
+    Brings stale matches up to SCORE_VERSION from the stored features and
+    the corpus model. `blocked(side, skills)` is the candidate blocking in
+    use (None: score everything): lower-bound entries whose resume is now a
+    candidate get an exact score. With a `lock` (a storage.FileLock shared
+    by several worker processes) only one of them runs the background pass;
+    the others wait for it, then find nothing stale and stop checking.
+    """
+
+    def __init__(self, store, corpus, blocked: Callable = None, batch_size: int = 2000, pause: float = 0.01,
+                 lock=None):
+        self.store = store
+        self.corpus = corpus
+        self.blocked = blocked
+        self.batch_size = batch_size
+        self.pause = pause
+        self.lock = lock
+        # ids known to have no stale matches left; every new match is current
+        self._current_jobs = set()
+        self._current_resumes = set()
+        self._all_current = False
+        self._lock = threading.Lock()
+        self._thread = None
+        self._progress = {'running': False, 'stale_at_start': None, 'rescored': 0,
+                          'jobs_done': 0, 'jobs_total': 0, 'started_at': None, 'finished_at': None}
+
+    def ensure_job(self, job_id: str) -> int:
+        """Rescore a job's stale matches; returns how many were rescored."""
+        if self._all_current or job_id in self._current_jobs:
+            return 0
+        n = self._rescore(self.store.stale_matches(SCORE_VERSION, job_id=job_id))
+        # only ids that exist: requests for made-up ones must not grow the set
+        if self.store.get_job(job_id) is not None:
+            self._current_jobs.add(job_id)
+        return n
+
+    def ensure_resume(self, resume_id: str) -> int:
+        """Rescore a resume's stale matches; returns how many were rescored."""
+        if self._all_current or resume_id in self._current_resumes:
+            return 0
+        n = self._rescore(self.store.stale_matches(SCORE_VERSION, resume_id=resume_id))
+        if self.store.get_resume(resume_id) is not None:
+            self._current_resumes.add(resume_id)
+        return n
+
+    def _rescore(self, entries: List[dict]) -> int:
+        """Rescore entries (of any jobs) and store them; ones whose job or resume is gone are left."""
+        if not entries:
+            return 0
+        by_job = {}
+        for entry in entries:
+            by_job.setdefault(entry['job_id'], []).append(entry)
+        jobs = self.store.list_jobs()
+        resumes = self.store.list_resumes()
+        updated = []
+        for job_id, job_entries in by_job.items():
+            job = jobs.get(job_id)
+            job_entries = [e for e in job_entries if e['resume_id'] in resumes]
+            if job is None or not job_entries:
+                continue
+            keep = self.blocked('resumes', job['features']['skills']) if self.blocked else None
+            exact, bounds = [], []
+            for entry in job_entries:
+                pruned = entry.get('lower_bound') and keep is not None and entry['resume_id'] not in keep
+                (bounds if pruned else exact).append(entry)
+            if exact:
+                with stage('tfidf'):
+                    matrix = self.corpus.matrix(
+                        [job_key(job_id)] + [resume_key(e['resume_id']) for e in exact],
+                        [job.get('job_text', '') or '']
+                        + [resumes[e['resume_id']].get('parsed', {}).get('combined_text', '') or '' for e in exact])
+                with stage('scoring'):
+                    scores = score_resumes_for_job(job['features'], matrix[0] if matrix is not None else None,
+                                                   [resumes[e['resume_id']]['features'] for e in exact],
+                                                   matrix[1:] if matrix is not None else None)
+                updated += [_restamped(e, s, False) for e, s in zip(exact, scores)]
+            if bounds:
+                with stage('scoring'):
+                    scores = score_resumes_for_job(job['features'], None,
+                                                   [resumes[e['resume_id']]['features'] for e in bounds], None)
+                updated += [_restamped(e, s, True) for e, s in zip(bounds, scores)]
+        self.store.put_matches(updated)
+        MATCHES_RESCORED.inc(len(updated))
+        with self._lock:
+            self._progress['rescored'] += len(updated)
+        return len(updated)
+
+    def start(self) -> bool:
+        """Start a background pass over every job; False if one is already running."""
+        with self._lock:
+            if self._progress['running']:
+                return False
+            self._progress.update(running=True, started_at=datetime.utcnow().isoformat(), finished_at=None,
+                                  jobs_done=0, jobs_total=0)
+        self._thread = threading.Thread(target=self._run, daemon=True, name='rescore')
+        self._thread.start()
+        return True
+
+    def _run(self):
+        if self.lock is not None and not self.lock.acquire(blocking=False):
+            # wait for it; the pass below then finds nothing stale and marks this worker all current
+            print("Rescore pass already running in another worker process, waiting for it")
+            self.lock.acquire()
+        try:
+            versions = self.store.match_versions()
+            stale = sum(n for version, n in versions.items() if version != SCORE_VERSION)
+            job_ids = list(self.store.list_jobs()) if stale else []
+            with self._lock:
+                self._progress.update(stale_at_start=stale, rescored=0, jobs_total=len(job_ids))
+            for job_id in job_ids:
+                if job_id not in self._current_jobs:
+                    entries = self.store.stale_matches(SCORE_VERSION, job_id=job_id)
+                    for i in range(0, len(entries), self.batch_size):
+                        self._rescore(entries[i:i + self.batch_size])
+                        # give request threads a turn between batches
+                        time.sleep(self.pause)
+                    self._current_jobs.add(job_id)
+                with self._lock:
+                    self._progress['jobs_done'] += 1
+            self._all_current = True
+            # no longer consulted
+            self._current_jobs.clear()
+            self._current_resumes.clear()
+        except Exception as e:
+            print(f"Rescore pass failed: {e}")
+        finally:
+            if self.lock is not None:
+                self.lock.release()
+            with self._lock:
+                self._progress.update(running=False, finished_at=datetime.utcnow().isoformat())
+
+    def stale_estimate(self) -> int:
+        """Stale matches left, from the count taken when the last pass started."""
+        with self._lock:
+            if self._all_current or self._progress['stale_at_start'] is None:
+                return 0
+            return max(0, self._progress['stale_at_start'] - self._progress['rescored'])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            progress = dict(self._progress)
+        return dict(progress, score_version=SCORE_VERSION, stale_estimate=self.stale_estimate())
@@ -0,0 +1,233 @@
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+import scipy.sparse as sp
+
+from extractor import COMMON_SKILLS, EXTRACTOR_VERSION, extract_skills_from_text, resume_skills
+
+SKILL_WEIGHT = 0.6
+COSINE_WEIGHT = 0.35
+TITLE_BOOST = 0.1
+TITLE_KEYWORDS = ['developer', 'engineer', 'manager', 'analyst', 'designer', 'scientist', 'administrator', 'consultant']
+# one capture group per keyword, so a single scan tells which ones occur
+_TITLE_PATTERN = re.compile(r'\b(?:' + '|'.join('(' + re.escape(tk) + ')' for tk in TITLE_KEYWORDS) + r')\b', re.IGNORECASE)
+_TOKEN = re.compile(r'\w+')
+
+# Bump when the feature record layout or how it is derived changes;
+# stored records with another version are recomputed when next touched.
+FEATURES_VERSION = 1
+
+
+def _digest(parts) -> str:
+    return hashlib.sha256("\n".join(str(p) for p in parts).encode('utf-8')).hexdigest()[:10]
+
+
+# Stamped on feature records: the extractor and skills vocabulary their
+# skills come from. Records with another stamp are refreshed at startup.
+SKILLS_VERSION = f"{EXTRACTOR_VERSION}-{_digest(COMMON_SKILLS)}"
+# Stamped on match entries: everything a score depends on. Edits to the
+# weights or TITLE_KEYWORDS change it by themselves; matches with another
+# stamp are rescored lazily (see rescore.py).
+SCORE_VERSION = f"{FEATURES_VERSION}-{_digest([SKILLS_VERSION, SKILL_WEIGHT, COSINE_WEIGHT, TITLE_BOOST] + TITLE_KEYWORDS)}"
+
+
+def skill_set(skills: List[str]) -> set:
+    return set([s.lower() for s in (skills or [])])
+
+
+def title_flags(text: str) -> List[bool]:
+    """Which TITLE_KEYWORDS appear as whole words in text."""
+    flags = [False] * len(TITLE_KEYWORDS)
+    for m in _TITLE_PATTERN.finditer(text or ''):
+        flags[m.lastindex - 1] = True
+    return flags
+
+
+def title_mask(text: str) -> int:
+    """title_flags packed into an int, bit i set for TITLE_KEYWORDS[i]."""
+    mask = 0
+    for i, flag in enumerate(title_flags(text)):
+        if flag:
+            mask |= 1 << i
+    return mask
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256((text or '').encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+def _features(text: str, skills: List[str], title_text: str) -> dict:
+    tokens = _TOKEN.findall((text or '').lower())
+    return {
+        'version': FEATURES_VERSION,
+        'skills_version': SKILLS_VERSION,
+        'skills': sorted(skill_set(skills)),
+        'title_mask': title_mask(title_text),
+        'tokens': len(tokens),
+        'unique_tokens': len(set(tokens)),
+        'text_hash': text_hash(text),
+    }
+
+
+def resume_features(parsed: dict) -> dict:
+    """Feature record for a parsed resume; title keywords are searched in raw_text."""
+    raw_text = parsed.get('raw_text', '') or ''
+    return _features(raw_text, parsed.get('skills', []), raw_text)
+
+
+def job_features(job_text: str) -> dict:
+    """Feature record for a job posting; its skills are extracted from job_text."""
+    return _features(job_text, extract_skills_from_text(job_text or ''), job_text)
+
+
+def features_current(features: dict) -> bool:
+    return bool(features) and features.get('version') == FEATURES_VERSION \
+        and features.get('skills_version') == SKILLS_VERSION
+
+
+def ensure_resume_features(record: dict) -> bool:
+    """
+    Backfill record['features'] if missing or outdated. Returns True if it
+    changed. parsed['skills'] is re-extracted from raw_text first, in case
+    the skills vocabulary changed since the upload.
+    """
+    if features_current(record.get('features')):
+        return False
+    parsed = record.get('parsed', {})
+    if parsed.get('raw_text'):
+        parsed = record['parsed'] = dict(parsed, skills=resume_skills(parsed['raw_text']))
+    record['features'] = resume_features(parsed)
+    return True
+
+
+def ensure_job_features(record: dict) -> bool:
+    """Backfill record['features'] if missing or outdated. Returns True if it changed."""
+    if features_current(record.get('features')):
+        return False
+    record['features'] = job_features(record.get('job_text', ''))
+    return True
+
+
+def title_boost(job_mask: int, resume_mask: int) -> float:
+    return TITLE_BOOST if job_mask & resume_mask else 0.0
+
+
+def final_score(skill_overlap: float, cos: float, boost: float) -> float:
+    score_raw = SKILL_WEIGHT*skill_overlap + COSINE_WEIGHT*cos + boost
+    score = max(0.0, min(1.0, score_raw))
+    return round(score * 100.0, 2)
+
+
+def score_pair(job_feat: dict, resume_feat: dict, cos: float) -> float:
+    job_skills = set(job_feat['skills'])
+    matched = job_skills.intersection(resume_feat['skills'])
+    skill_overlap = (len(matched) / max(1, len(job_skills))) if job_skills else 0.0
+    return final_score(skill_overlap, cos, title_boost(job_feat['title_mask'], resume_feat['title_mask']))
+
+
+def _final_scores(skill_overlap: np.ndarray, cos: np.ndarray, boost: np.ndarray) -> List[float]:
+    score = np.clip(SKILL_WEIGHT*skill_overlap + COSINE_WEIGHT*cos + boost, 0.0, 1.0)
+    # python's round() rather than np.round so results match final_score exactly
+    return [round(s * 100.0, 2) for s in score.tolist()]
+
+
+def _indicator_matrix(skill_lists: List[List[str]], vocab: dict) -> sp.csr_matrix:
+    """Binary rows x vocab matrix; skills outside vocab are ignored."""
+    indptr = [0]
+    indices = []
+    for skills in skill_lists:
+        indices.extend(vocab[s] for s in skills if s in vocab)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float64)
+    return sp.csr_matrix((data, indices, indptr), shape=(len(skill_lists), len(vocab)))
+
+
+def _cosines(matrix, vec, n: int) -> np.ndarray:
+    if matrix is None or vec is None or n == 0:
+        return np.zeros(n)
+    return np.asarray((matrix @ vec.T).todense()).ravel()
+
+
+def _boosts(masks: List[int], mask: int) -> np.ndarray:
+    return np.where(np.array(masks, dtype=np.int64) & mask, TITLE_BOOST, 0.0)
+
+
+def score_resumes_for_job(job_feat: dict, job_vec, resume_feats: List[dict], resume_matrix) -> List[float]:
+    """
+    Score one job against many resumes in one vectorized step, from their
+    feature records. resume_matrix holds the resumes' corpus TF-IDF rows in
+    the same order.
+    """
+    job_skills = job_feat['skills']
+    if job_skills:
+        vocab = {s: i for i, s in enumerate(job_skills)}
+        M = _indicator_matrix([f['skills'] for f in resume_feats], vocab)
+        shared = np.asarray(M.sum(axis=1)).ravel()
+    else:
+        shared = np.zeros(len(resume_feats))
+    return score_counts_for_job(job_feat, job_vec, shared,
+                                np.array([f['title_mask'] for f in resume_feats], dtype=np.int64), resume_matrix)
+
+
+def score_counts_for_job(job_feat: dict, job_vec, shared: np.ndarray, title_masks: np.ndarray,
+                         resume_matrix) -> List[float]:
+    """
+    Like score_resumes_for_job, from each resume's number of shared job
+    skills and its title mask (e.g. from a feature_store.SkillMatrix).
+    """
+    n = len(shared)
+    overlap = np.asarray(shared, dtype=np.float64) / max(1, len(job_feat['skills']))
+    cos = _cosines(resume_matrix, job_vec, n)
+    boost = np.where(np.asarray(title_masks, dtype=np.int64) & job_feat['title_mask'], TITLE_BOOST, 0.0)
+    return _final_scores(overlap, cos, boost)
+
+
+def score_jobs_for_resume(resume_feat: dict, resume_vec, job_feats: List[dict], job_matrix) -> List[float]:
+    """
+    Score one resume against many jobs in one vectorized step, from their
+    feature records. job_matrix holds the jobs' corpus TF-IDF rows in the
+    same order.
+    """
+    n = len(job_feats)
+    vocab = {s: i for i, s in enumerate(resume_feat['skills'])}
+    M = _indicator_matrix([f['skills'] for f in job_feats], vocab)
+    matched = np.asarray(M.sum(axis=1)).ravel()
+    required = np.array([len(f['skills']) for f in job_feats], dtype=np.float64)
+    overlap = np.where(required > 0, matched / np.maximum(1, required), 0.0)
+    cos = _cosines(job_matrix, resume_vec, n)
+    boost = _boosts([f['title_mask'] for f in job_feats], resume_feat['title_mask'])
+    return _final_scores(overlap, cos, boost)
+
+
+def score_matrix(resume_feats: List[dict], resume_matrix, job_feats: List[dict], job_matrix) -> List[List[float]]:
+    """
+    Score many resumes against many jobs at once; returns one row of job
+    scores per resume. The TF-IDF matrices hold corpus rows in the same
+    order as the feature lists.
+    """
+    n_resumes, n_jobs = len(resume_feats), len(job_feats)
+    if n_resumes == 0 or n_jobs == 0:
+        return [[] for _ in range(n_resumes)]
+    vocab = {}
+    for f in job_feats:
+        for s in f['skills']:
+            vocab.setdefault(s, len(vocab))
+    J = _indicator_matrix([f['skills'] for f in job_feats], vocab)
+    R = _indicator_matrix([f['skills'] for f in resume_feats], vocab)
+    matched = np.asarray((R @ J.T).todense())
+    required = np.diff(J.indptr).astype(np.float64)
+    overlap = np.where(required > 0, matched / np.maximum(1, required), 0.0)
+
+    if resume_matrix is None or job_matrix is None:
+        cos = np.zeros((n_resumes, n_jobs))
+    else:
+        cos = np.asarray((resume_matrix @ job_matrix.T).todense())
+
+    resume_masks = np.array([f['title_mask'] for f in resume_feats], dtype=np.int64)
+    job_masks = np.array([f['title_mask'] for f in job_feats], dtype=np.int64)
+    boost = np.where(resume_masks[:, None] & job_masks[None, :], TITLE_BOOST, 0.0)
+
+    flat = _final_scores(overlap.ravel(), cos.ravel(), boost.ravel())
+    return [flat[i * n_jobs:(i + 1) * n_jobs] for i in range(n_resumes)]
@@ -0,0 +1,998 @@
+import argparse
+import base64
+import heapq
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right, insort
+from contextlib import nullcontext
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import RWLock, TimedLock, observe, stage
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locks, so no shared JSON storage
+    fcntl = None
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            return json.load(f)
+        except:
+            return {}
+
+def _save_json(path, data):
+    """Write a temporary file and rename it over path, so no reader (or crash) sees a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class FileLock:
+    """
+    Exclusive flock() on a lock file, held across processes as well as
+    threads (every acquire opens its own descriptor). Records wait times
+    as <name>_wait.
+    """
+
+    def __init__(self, path: str, name: str = 'file_lock'):
+        self.path = path
+        self._wait_stage = f"{name}_wait"
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        started = time.perf_counter()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        observe(self._wait_stage, time.perf_counter() - started)
+        return True
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedCounters:
+    """
+    A 64-bit counter per name in a small file shared by every process
+    serving one data folder. get() is a single pread and takes no lock;
+    bump() must run under a lock that serializes the writers of that name.
+    Counters start at random values, so a recreated file never repeats
+    versions handed out before.
+    """
+
+    def __init__(self, path: str, names):
+        self._offsets = {name: 8 * i for i, name in enumerate(names)}
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < 8 * len(self._offsets):
+                os.pwrite(self._fd, os.urandom(8 * len(self._offsets)), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def get(self, name: str) -> int:
+        return struct.unpack('<Q', os.pread(self._fd, 8, self._offsets[name]))[0]
+
+    def bump(self, name: str) -> int:
+        value = (self.get(name) + 1) & 0xFFFFFFFFFFFFFFFF
+        os.pwrite(self._fd, struct.pack('<Q', value), self._offsets[name])
+        return value
+
+    def close(self):
+        os.close(self._fd)
+
+
+def _by_score(entries: List[dict]) -> List[dict]:
+    return sorted(entries, key=lambda x: x.get('score',0), reverse=True)
+
+
+def encode_cursor(score: float, tiebreak: int) -> str:
+    """Opaque page cursor: the (score, tiebreak) of the last entry returned."""
+    return base64.urlsafe_b64encode(json.dumps([score, tiebreak]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        score, tiebreak = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(tiebreak)
+    except Exception:
+        raise ValueError('invalid cursor')
+
+
+def encode_position(position: int) -> str:
+    """Opaque cursor for record listings: where the next page starts."""
+    return base64.urlsafe_b64encode(json.dumps([position]).encode()).decode()
+
+
+def decode_position(cursor: str) -> int:
+    try:
+        position, = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(position)
+    except Exception:
+        raise ValueError('invalid cursor')
+
+
+def top_k(entries, limit: Optional[int], offset: int = 0, min_score: Optional[float] = None) -> List[dict]:
+    """Best-first page of unindexed entries, using a heap when only a page is needed."""
+    if min_score is not None:
+        entries = [e for e in entries if e.get('score',0) >= min_score]
+    if limit is None:
+        return _by_score(entries)[offset:]
+    # nlargest is stable for ties, like sorted(reverse=True)
+    return heapq.nlargest(offset + limit, entries, key=lambda x: x.get('score',0))[offset:]
+
+
+class Storage(ABC):
+    """
+    Persistence for resumes, jobs and matches.
+
+    Resumes and jobs are plain record dicts keyed by their 'id'. Match entries
+    are dicts with resume_id, job_id, applicant_name, score, timestamp,
+    score_version (see scoring.SCORE_VERSION) and seq. put_matches stamps
+    every entry it writes with the next seq, so seq orders match inserts
+    and updates (see match_changes).
+    All put_* methods take a batch and commit it as one write.
+
+    Backends are safe to share between threads, and reads never wait for a
+    write to reach disk. Returned records may be shared snapshots: treat
+    them as read-only. SqliteStorage and a shared JsonStorage are also safe
+    to share between processes.
+
+    Every write bumps its collection's version(), so callers can tell a
+    collection is unchanged without reading it. By default it is an
+    in-memory counter; backends shared between processes keep it where
+    all of them see it.
+    """
+
+    COLLECTIONS = ('resumes', 'jobs', 'matches')
+
+    def __init__(self):
+        # the epoch keeps versions handed out by an earlier process from matching
+        self._epoch = os.urandom(4).hex()
+        self._versions = dict.fromkeys(self.COLLECTIONS, 0)
+
+    def version(self, collection: str) -> str:
+        return f"{self._epoch}-{self._versions[collection]}"
+
+    def _bump(self, collection: str):
+        """Called by writers, under the lock that serializes writes to collection."""
+        self._versions[collection] += 1
+
+    @abstractmethod
+    def list_resumes(self) -> Dict[str, dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_jobs(self) -> Dict[str, dict]:
+        raise NotImplementedError
+
+    def get_resume(self, resume_id: str):
+        return self.list_resumes().get(resume_id)
+
+    def get_job(self, job_id: str):
+        return self.list_jobs().get(job_id)
+
+    @abstractmethod
+    def put_resumes(self, records: List[dict]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_jobs(self, records: List[dict]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_matches(self, entries: List[dict]):
+        raise NotImplementedError
+
+    def records_page(self, collection: str, limit: int = None,
+                     cursor: str = None) -> Tuple[Dict[str, dict], Optional[str]]:
+        """
+        Resumes or jobs in insertion order: at most `limit` records after
+        `cursor` (from a previous page). Returns (records, next_cursor);
+        next_cursor is None on the last page.
+        """
+        records = self.list_resumes() if collection == 'resumes' else self.list_jobs()
+        start = decode_position(cursor) if cursor else 0
+        stop = None if limit is None else start + limit
+        page = dict(islice(records.items(), start, stop))
+        more = bool(page) and stop is not None and stop < len(records)
+        return page, (encode_position(stop) if more else None)
+
+    def job_matches(self, job_id: str) -> List[dict]:
+        """Matches for a job, best score first."""
+        return self.job_matches_page(job_id)[0]
+
+    def job_matches_page(self, job_id: str, limit: int = None, offset: int = 0,
+                         min_score: float = None, cursor: str = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        One page of a job's matches, best score first: entries scoring at
+        least min_score, after `cursor` (from a previous page) and `offset`,
+        at most `limit` of them. Returns (entries, next_cursor); next_cursor
+        is None on the last page.
+
+        This default ranks all_matches() with a heap; the cursor is a position.
+        """
+        start = decode_cursor(cursor)[1] + 1 if cursor else 0
+        entries = top_k(self.all_matches().get(job_id, {}).values(),
+                        None if limit is None else limit + 1, start + offset, min_score)
+        if limit is None or len(entries) <= limit:
+            return entries, None
+        entries = entries[:limit]
+        # limit=0 asks for no entries, and gets no cursor to page on with
+        if not entries:
+            return entries, None
+        return entries, encode_cursor(entries[-1].get('score',0), start + offset + limit - 1)
+
+    @abstractmethod
+    def resume_matches(self, resume_id: str) -> List[dict]:
+        """Matches for a resume, best score first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def all_matches(self) -> Dict[str, Dict[str, dict]]:
+        """Every match as {job_id: {resume_id: entry}}."""
+        raise NotImplementedError
+
+    def stale_matches(self, version: str, job_id: str = None, resume_id: str = None) -> List[dict]:
+        """A job's (or a resume's) matches whose score_version is not `version`."""
+        if job_id is not None:
+            entries = self.all_matches().get(job_id, {}).values()
+        else:
+            entries = self.resume_matches(resume_id)
+        return [e for e in entries if e.get('score_version') != version]
+
+    def match_versions(self) -> Dict[Optional[str], int]:
+        """How many matches carry each score_version (None: stored before versioning)."""
+        counts = {}
+        for entries in self.all_matches().values():
+            for entry in entries.values():
+                version = entry.get('score_version')
+                counts[version] = counts.get(version, 0) + 1
+        return counts
+
+    def match_changes(self, after: int = 0, limit: int = None, job_id: str = None,
+                      resume_id: str = None) -> Tuple[List[dict], int, bool]:
+        """
+        Matches written (inserted or updated) after seq `after`, oldest first,
+        at most `limit` of them, optionally only one job's or one resume's.
+        A pair written several times shows up once, at its latest seq.
+        Returns (entries, seq to pass as `after` next time, more).
+        """
+        entries = [e for job_matches in self.all_matches().values() for e in job_matches.values()
+                   if e.get('seq', 0) > after and (job_id is None or e['job_id'] == job_id)
+                   and (resume_id is None or e['resume_id'] == resume_id)]
+        entries.sort(key=lambda e: e['seq'])
+        if limit is not None and len(entries) > limit:
+            return entries[:limit], entries[limit - 1]['seq'] if limit else after, True
+        return entries, entries[-1]['seq'] if entries else after, False
+
+    def last_change_seq(self) -> int:
+        """The seq of the latest match write (0 before the first one)."""
+        return max((e.get('seq', 0) for m in self.all_matches().values() for e in m.values()), default=0)
+
+    def put_resume(self, record: dict):
+        self.put_resumes([record])
+
+    def put_job(self, record: dict):
+        self.put_jobs([record])
+
+    def close(self):
+        pass
+
+
+class MatchIndex:
+    """
+    Match entries indexed both ways, job -> resume and resume -> job, so
+    either lookup only touches its own results. by_job is also the
+    {job_id: {resume_id: entry}} layout of matches.json.
+
+    Also a change log by entry 'seq' (see Storage.match_changes). Entries
+    must be added in seq order; loaded entries without one (stored before
+    seqs existed) get the next ones in file order.
+    """
+
+    def __init__(self, matches: Dict[str, Dict[str, dict]] = None):
+        self.by_job = {}
+        self.by_resume = {}
+        # per job, (-score, seq) kept sorted as entries come in; this seq is
+        # the pair's insertion order (not its 'seq'), so ties rank like a
+        # stable sort of by_job
+        self.ranking = {}
+        self._seq = {}  # (job_id, resume_id) -> seq
+        self._by_seq = {}  # seq -> resume_id
+        self._next_seq = 0
+        # change log: entry seqs in write order, and the entries still at that seq
+        self._changes = array('q')
+        self._changed = {}
+        self.last_seq = 0
+        entries = [e for job_matches in (matches or {}).values() for e in job_matches.values()]
+        last_seq = max((e.get('seq', 0) for e in entries), default=0)
+        for entry in entries:
+            if 'seq' not in entry:
+                last_seq += 1
+                entry['seq'] = last_seq
+            self._index(entry)
+        for entry in sorted(entries, key=lambda e: e['seq']):
+            self._log(entry, None)
+
+    def add(self, entry: dict):
+        """Index an entry whose seq is above every one added before (the next one if it has none)."""
+        if 'seq' not in entry:
+            entry = dict(entry, seq=self.last_seq + 1)
+        self._log(entry, self._index(entry))
+
+    def _log(self, entry: dict, old: Optional[dict]):
+        if old is not None:
+            self._changed.pop(old.get('seq'), None)
+        self._changes.append(entry['seq'])
+        self._changed[entry['seq']] = entry
+        self.last_seq = max(self.last_seq, entry['seq'])
+        if len(self._changes) > 2 * len(self._changed) + 1024:
+            # drop the seqs of superseded writes; _changed is in seq order
+            self._changes = array('q', self._changed)
+
+    def changes(self, after: int, limit: int = None, job_id: str = None,
+                resume_id: str = None) -> Tuple[List[dict], int, bool]:
+        """Storage.match_changes from the log: only entries written after `after` are looked at."""
+        out, last = [], after
+        changes, changed = self._changes, self._changed
+        for i in range(bisect_right(changes, after), len(changes)):
+            entry = changed.get(changes[i])
+            if entry is not None and (job_id is None or entry['job_id'] == job_id) \
+                    and (resume_id is None or entry['resume_id'] == resume_id):
+                if limit is not None and len(out) >= limit:
+                    return out, last, True
+                out.append(entry)
+            last = changes[i]
+        return out, last, False
+
+    def _index(self, entry: dict) -> Optional[dict]:
+        """Add to by_job, by_resume and the ranking; returns the entry it replaces."""
+        job_id, resume_id = entry['job_id'], entry['resume_id']
+        ranking = self.ranking.setdefault(job_id, [])
+        old = self.by_job.get(job_id, {}).get(resume_id)
+        if old is not None:
+            seq = self._seq[(job_id, resume_id)]
+            del ranking[bisect_right(ranking, (-old.get('score',0), seq)) - 1]
+        else:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._seq[(job_id, resume_id)] = seq
+            self._by_seq[seq] = resume_id
+        insort(ranking, (-entry.get('score',0), seq))
+        self.by_job.setdefault(job_id, {})[resume_id] = entry
+        self.by_resume.setdefault(resume_id, {})[job_id] = entry
+        return old
+
+    def page(self, job_id: str, limit: int = None, offset: int = 0, min_score: float = None,
+             after: Tuple[float, int] = None) -> Tuple[List[dict], Optional[Tuple[float, int]]]:
+        """Walk a job's ranking from `after` (score, seq); returns entries and the last position."""
+        ranking = self.ranking.get(job_id, [])
+        entries = self.by_job.get(job_id, {})
+        i = bisect_right(ranking, (-after[0], after[1])) if after else 0
+        i += offset
+        out = []
+        last = None
+        while i < len(ranking) and (limit is None or len(out) < limit):
+            neg_score, seq = ranking[i]
+            if min_score is not None and -neg_score < min_score:
+                break
+            out.append(entries[self._by_seq[seq]])
+            last = (-neg_score, seq)
+            i += 1
+        more = i < len(ranking) and (min_score is None or -ranking[i][0] >= min_score)
+        return out, (last if more else None)
+
+    def for_job(self, job_id: str) -> List[dict]:
+        return list(self.by_job.get(job_id, {}).values())
+
+    def for_resume(self, resume_id: str) -> List[dict]:
+        return list(self.by_resume.get(resume_id, {}).values())
+
+
+class JsonStorage(Storage):
+    """
+    The original layout: resumes.json, jobs.json and matches.json, rewritten
+    whole on every write. Everything is read once at startup and served from
+    memory.
+
+    Resumes and jobs are copy-on-write: a write publishes a new dict, so a
+    reader's snapshot never changes under it and reads take no lock. The
+    MatchIndex sits behind a reader-writer lock that is held only while the
+    index is updated or read, never while a file is written.
+
+    With shared=True several processes (e.g. gunicorn workers) can serve
+    one data folder. A write takes its collection's lock file, first reloads
+    the file if another process changed it, and then bumps the collection's
+    counter in versions.bin. Before a read uses the in-memory snapshot, it
+    compares that counter with the one the snapshot was loaded at, and
+    reloads the file if they differ. Every write from another process means
+    a full reload, so with many workers or a large corpus the SQLite backend
+    is the better fit.
+    """
+
+    def __init__(self, data_folder: str, shared: bool = False):
+        super().__init__()
+        self.resumes_file = os.path.join(data_folder, 'resumes.json')
+        self.jobs_file = os.path.join(data_folder, 'jobs.json')
+        self.matches_file = os.path.join(data_folder, 'matches.json')
+        self.shared = shared
+        self._files = {'resumes': self.resumes_file, 'jobs': self.jobs_file, 'matches': self.matches_file}
+        if shared:
+            if fcntl is None:
+                raise RuntimeError('shared JSON storage needs fcntl (POSIX)')
+            self._counters = SharedCounters(os.path.join(data_folder, 'versions.bin'), self.COLLECTIONS)
+            self._file_locks = {c: FileLock(path + '.lock', f"{c}_file") for c, path in self._files.items()}
+            # read before the files: a write landing in between is reloaded by the next read
+            self._seen = {c: self._counters.get(c) for c in self.COLLECTIONS}
+        self._resumes = _load_json(self.resumes_file)
+        self._jobs = _load_json(self.jobs_file)
+        self.matches = MatchIndex(_load_json(self.matches_file))
+        # writers of one collection (and its file) take turns; readers never wait on these
+        self._resumes_write = TimedLock('resumes_write')
+        self._jobs_write = TimedLock('jobs_write')
+        self._matches_save = TimedLock('matches_save')
+        self._matches_lock = RWLock('matches')
+        self._write_locks = {'resumes': self._resumes_write, 'jobs': self._jobs_write, 'matches': self._matches_save}
+
+    def version(self, collection):
+        if self.shared:
+            return str(self._counters.get(collection))
+        return super().version(collection)
+
+    def _bump(self, collection):
+        if self.shared:
+            self._seen[collection] = self._counters.bump(collection)
+        else:
+            super()._bump(collection)
+
+    def _file_lock(self, collection):
+        return self._file_locks[collection] if self.shared else nullcontext()
+
+    def _reload(self, collection):
+        """With the collection's write lock held: load the file again if another process wrote it."""
+        if not self.shared:
+            return
+        version = self._counters.get(collection)
+        if version == self._seen[collection]:
+            return
+        with stage('storage_reload'):
+            data = _load_json(self._files[collection])
+            if collection == 'resumes':
+                self._resumes = data
+            elif collection == 'jobs':
+                self._jobs = data
+            else:
+                matches = MatchIndex(data)
+                with self._matches_lock.write():
+                    self.matches = matches
+        self._seen[collection] = version
+
+    def _refresh(self, collection):
+        """Before a read: catch up with other processes' writes (one pread when there are none)."""
+        if self.shared and self._counters.get(collection) != self._seen[collection]:
+            with self._write_locks[collection]:
+                self._reload(collection)
+
+    def list_resumes(self):
+        self._refresh('resumes')
+        return self._resumes
+
+    def list_jobs(self):
+        self._refresh('jobs')
+        return self._jobs
+
+    def get_resume(self, resume_id):
+        self._refresh('resumes')
+        return self._resumes.get(resume_id)
+
+    def get_job(self, job_id):
+        self._refresh('jobs')
+        return self._jobs.get(job_id)
+
+    def put_resumes(self, records):
+        if not records:
+            return
+        with self._resumes_write, self._file_lock('resumes'):
+            self._reload('resumes')
+            resumes = dict(self._resumes)
+            for record in records:
+                resumes[record['id']] = record
+            self._resumes = resumes
+            _save_json(self.resumes_file, resumes)
+            self._bump('resumes')
+
+    def put_jobs(self, records):
+        if not records:
+            return
+        with self._jobs_write, self._file_lock('jobs'):
+            self._reload('jobs')
+            jobs = dict(self._jobs)
+            for record in records:
+                jobs[record['id']] = record
+            self._jobs = jobs
+            _save_json(self.jobs_file, jobs)
+            self._bump('jobs')
+
+    def put_matches(self, entries):
+        if not entries:
+            return
+        if self.shared:
+            # catch up, add and save as one step, or another process's matches would be lost
+            with self._matches_save, self._file_lock('matches'):
+                self._reload('matches')
+                with self._matches_lock.write():
+                    self._add_matches(entries)
+                _save_json(self.matches_file, self._matches_snapshot())
+                self._bump('matches')
+            return
+        with self._matches_lock.write():
+            self._add_matches(entries)
+            self._bump('matches')
+        with self._matches_save:
+            # snapshot inside the save lock so the last file written is the newest
+            _save_json(self.matches_file, self._matches_snapshot())
+
+    def _add_matches(self, entries):
+        """With the matches write lock held: stamp entries with the next seqs and index them."""
+        for entry in entries:
+            self.matches.add(dict(entry, seq=self.matches.last_seq + 1))
+
+    def match_changes(self, after=0, limit=None, job_id=None, resume_id=None):
+        self._refresh('matches')
+        with self._matches_lock.read():
+            return self.matches.changes(after, limit, job_id, resume_id)
+
+    def last_change_seq(self):
+        self._refresh('matches')
+        return self.matches.last_seq
+
+    def job_matches_page(self, job_id, limit=None, offset=0, min_score=None, cursor=None):
+        after = decode_cursor(cursor) if cursor else None
+        self._refresh('matches')
+        with self._matches_lock.read():
+            entries, last = self.matches.page(job_id, limit, offset, min_score, after)
+        return entries, (encode_cursor(*last) if last else None)
+
+    def resume_matches(self, resume_id):
+        self._refresh('matches')
+        with self._matches_lock.read():
+            entries = self.matches.for_resume(resume_id)
+        return _by_score(entries)
+
+    def _matches_snapshot(self):
+        with self._matches_lock.read():
+            return {job_id: dict(entries) for job_id, entries in self.matches.by_job.items()}
+
+    def all_matches(self):
+        self._refresh('matches')
+        return self._matches_snapshot()
+
+    def stale_matches(self, version, job_id=None, resume_id=None):
+        self._refresh('matches')
+        with self._matches_lock.read():
+            index = self.matches.by_job if job_id is not None else self.matches.by_resume
+            entries = index.get(job_id if job_id is not None else resume_id, {})
+            return [e for e in entries.values() if e.get('score_version') != version]
+
+    def match_versions(self):
+        self._refresh('matches')
+        counts = {}
+        with self._matches_lock.read():
+            for entries in self.matches.by_job.values():
+                for entry in entries.values():
+                    version = entry.get('score_version')
+                    counts[version] = counts.get(version, 0) + 1
+        return counts
+
+    def close(self):
+        if self.shared:
+            self._counters.close()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    job_id TEXT NOT NULL,
+    resume_id TEXT NOT NULL,
+    applicant_name TEXT,
+    score REAL NOT NULL,
+    timestamp TEXT,
+    lower_bound INTEGER NOT NULL DEFAULT 0,
+    score_version TEXT,
+    seq INTEGER,
+    PRIMARY KEY (job_id, resume_id)
+);
+CREATE INDEX IF NOT EXISTS idx_matches_job_score ON matches (job_id, score DESC);
+CREATE INDEX IF NOT EXISTS idx_matches_resume ON matches (resume_id, score DESC);
+CREATE INDEX IF NOT EXISTS idx_matches_score ON matches (score DESC);
+CREATE TABLE IF NOT EXISTS versions (
+    collection TEXT PRIMARY KEY,
+    n INTEGER NOT NULL
+);
+"""
+
+_MATCH_COLUMNS = "resume_id, job_id, applicant_name, score, timestamp, lower_bound, score_version, seq"
+# added to matches after the first release; (name, definition)
+_ADDED_MATCH_COLUMNS = [('lower_bound', 'INTEGER NOT NULL DEFAULT 0'), ('score_version', 'TEXT'), ('seq', 'INTEGER')]
+
+
+def _match_row(row) -> dict:
+    entry = {'resume_id': row[0], 'job_id': row[1], 'applicant_name': row[2],
+             'score': row[3], 'timestamp': row[4]}
+    if row[5]:
+        entry['lower_bound'] = True
+    if row[6] is not None:
+        entry['score_version'] = row[6]
+    entry['seq'] = row[7]
+    return entry
+
+
+class SqliteStorage(Storage):
+    """
+    SQLite (stdlib) backend. Records are stored as JSON in a data column;
+    matches get their own indexed columns. One connection per thread, WAL
+    journal so readers don't block the writer; writes from this process
+    queue on a lock rather than on SQLite's busy timeout.
+
+    Collection versions live in the versions table and are bumped in the
+    write's own transaction, so every process sharing the database sees
+    the same ones.
+    """
+
+    def __init__(self, db_path: str):
+        super().__init__()
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = TimedLock('sqlite_write')
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(matches)")}
+            for name, definition in _ADDED_MATCH_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE matches ADD COLUMN {name} {definition}")
+            if 'seq' not in existing:
+                # matches stored before seqs existed: number them in rowid order
+                conn.execute("UPDATE matches SET seq = rowid")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_seq ON matches (seq)")
+            # random start, so a recreated database does not repeat old versions
+            conn.executemany("INSERT OR IGNORE INTO versions (collection, n) VALUES (?, abs(random() % 1000000000000))",
+                             [(c,) for c in self.COLLECTIONS])
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def version(self, collection):
+        row = self._conn().execute("SELECT n FROM versions WHERE collection = ?", (collection,)).fetchone()
+        return str(row[0])
+
+    def _bump_in(self, conn: sqlite3.Connection, collection: str):
+        conn.execute("UPDATE versions SET n = n + 1 WHERE collection = ?", (collection,))
+
+    def _records(self, table: str) -> Dict[str, dict]:
+        rows = self._conn().execute(f"SELECT id, data FROM {table} ORDER BY rowid")
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def _get(self, table: str, key: str):
+        row = self._conn().execute(f"SELECT data FROM {table} WHERE id = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _put(self, table: str, records: List[dict]):
+        if not records:
+            return
+        with self._write_lock:
+            with self._conn() as conn:
+                conn.executemany(
+                    f"INSERT INTO {table} (id, data) VALUES (?, ?) "
+                    f"ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                    [(r['id'], json.dumps(r, ensure_ascii=False)) for r in records])
+                self._bump_in(conn, table)
+
+    def records_page(self, collection, limit=None, cursor=None):
+        # keyset on rowid, which upserts keep, so pages stay stable as records are added
+        if collection not in ('resumes', 'jobs'):
+            raise ValueError(f"not a record collection: {collection}")
+        after = decode_position(cursor) if cursor else 0
+        rows = self._conn().execute(
+            f"SELECT rowid, id, data FROM {collection} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (after, -1 if limit is None else limit + 1)).fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_position(rows[-1][0]) if rows else None
+        return {row[1]: json.loads(row[2]) for row in rows}, next_cursor
+
+    def list_resumes(self):
+        return self._records('resumes')
+
+    def list_jobs(self):
+        return self._records('jobs')
+
+    def get_resume(self, resume_id):
+        return self._get('resumes', resume_id)
+
+    def get_job(self, job_id):
+        return self._get('jobs', job_id)
+
+    def put_resumes(self, records):
+        self._put('resumes', records)
+
+    def put_jobs(self, records):
+        self._put('jobs', records)
+
+    def put_matches(self, entries):
+        if not entries:
+            return
+        with self._write_lock:
+            with self._conn() as conn:
+                # take the write lock before reading the last seq, so no other process can hand out the same ones
+                conn.execute("BEGIN IMMEDIATE")
+                last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM matches").fetchone()[0]
+                conn.executemany(
+                    f"INSERT INTO matches ({_MATCH_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(job_id, resume_id) DO UPDATE SET applicant_name = excluded.applicant_name, "
+                    "score = excluded.score, timestamp = excluded.timestamp, lower_bound = excluded.lower_bound, "
+                    "score_version = excluded.score_version, seq = excluded.seq",
+                    [(e['resume_id'], e['job_id'], e.get('applicant_name'), e.get('score', 0), e.get('timestamp'),
+                      1 if e.get('lower_bound') else 0, e.get('score_version'), last_seq + i)
+                     for i, e in enumerate(entries, 1)])
+                self._bump_in(conn, 'matches')
+
+    def match_changes(self, after=0, limit=None, job_id=None, resume_id=None):
+        sql = f"SELECT {_MATCH_COLUMNS} FROM matches WHERE seq > ?"
+        params = [after]
+        if job_id is not None:
+            sql += " AND job_id = ?"
+            params.append(job_id)
+        if resume_id is not None:
+            sql += " AND resume_id = ?"
+            params.append(resume_id)
+        sql += " ORDER BY seq LIMIT ?"
+        params.append(-1 if limit is None else limit + 1)
+        entries = [_match_row(r) for r in self._conn().execute(sql, params)]
+        more = limit is not None and len(entries) > limit
+        if more:
+            entries = entries[:limit]
+        return entries, entries[-1]['seq'] if entries else after, more
+
+    def last_change_seq(self):
+        return self._conn().execute("SELECT COALESCE(MAX(seq), 0) FROM matches").fetchone()[0]
+
+    def job_matches_page(self, job_id, limit=None, offset=0, min_score=None, cursor=None):
+        sql = f"SELECT {_MATCH_COLUMNS}, rowid FROM matches WHERE job_id = ?"
+        params = [job_id]
+        if min_score is not None:
+            sql += " AND score >= ?"
+            params.append(min_score)
+        if cursor:
+            score, rowid = decode_cursor(cursor)
+            sql += " AND (score < ? OR (score = ? AND rowid > ?))"
+            params += [score, score, rowid]
+        # fetch one extra row to know whether there is a next page
+        sql += " ORDER BY score DESC, rowid LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit + 1, offset]
+        rows = self._conn().execute(sql, params).fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][3], rows[-1][-1]) if rows else None
+        return [_match_row(r) for r in rows], next_cursor
+
+    def resume_matches(self, resume_id):
+        rows = self._conn().execute(
+            f"SELECT {_MATCH_COLUMNS} FROM matches WHERE resume_id = ? ORDER BY score DESC, rowid", (resume_id,))
+        return [_match_row(r) for r in rows]
+
+    def all_matches(self):
+        out = {}
+        for row in self._conn().execute(f"SELECT {_MATCH_COLUMNS} FROM matches ORDER BY rowid"):
+            entry = _match_row(row)
+            out.setdefault(entry['job_id'], {})[entry['resume_id']] = entry
+        return out
+
+    def stale_matches(self, version, job_id=None, resume_id=None):
+        column, key = ('job_id', job_id) if job_id is not None else ('resume_id', resume_id)
+        rows = self._conn().execute(
+            f"SELECT {_MATCH_COLUMNS} FROM matches WHERE {column} = ? AND score_version IS NOT ? ORDER BY rowid",
+            (key, version))
+        return [_match_row(r) for r in rows]
+
+    def match_versions(self):
+        return dict(self._conn().execute("SELECT score_version, COUNT(*) FROM matches GROUP BY score_version"))
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def migrate_json_to_sqlite(data_folder: str, db_path: str) -> Dict[str, int]:
+    """
+    Copy resumes.json, jobs.json and matches.json into a SQLite database.
+    It is built next to db_path and renamed into place once complete, so a
+    crash part way leaves no db_path behind and the next start migrates again.
+    """
+    tmp_path = db_path + '.tmp'
+    for leftover in (tmp_path, tmp_path + '-wal', tmp_path + '-shm'):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    source = JsonStorage(data_folder)
+    target = SqliteStorage(tmp_path)
+    resumes = list(source.list_resumes().values())
+    jobs = list(source.list_jobs().values())
+    # in seq order, so the change log keeps its order (put_matches numbers them afresh)
+    entries = sorted((e for job_matches in source.all_matches().values() for e in job_matches.values()),
+                     key=lambda e: e['seq'])
+    target.put_resumes(resumes)
+    target.put_jobs(jobs)
+    target.put_matches(entries)
+    # fold the WAL into the file, so the rename moves everything
+    target._conn().execute('PRAGMA journal_mode=DELETE')
+    target.close()
+    os.replace(tmp_path, db_path)
+    return {'resumes': len(resumes), 'jobs': len(jobs), 'matches': len(entries)}
+
+
+class TimedStorage:
+    """
+    Wraps a Storage, timing put_* calls as storage_save and every other call
+    (except the in-memory version()) as storage_load.
+    """
+
+    def __init__(self, inner: Storage):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if not callable(attr) or name == 'version':
+            return attr
+        label = 'storage_save' if name.startswith('put_') else 'storage_load'
+
+        def timed(*args, **kwargs):
+            with stage(label):
+                return attr(*args, **kwargs)
+        return timed
+
+
+class BackfillStorage:
+    """
+    Wraps a Storage, upgrading resume and job records the first time they
+    are read rather than all of them up front. stale(record) tells whether
+    a record needs it; upgrades['resumes'] / upgrades['jobs'] update one in
+    place. Upgraded records are returned and written back, so each is
+    upgraded once.
+    """
+
+    def __init__(self, inner: Storage, upgrades: Dict[str, Callable[[dict], object]],
+                 stale: Callable[[dict], bool]):
+        self.inner = inner
+        self.upgrades = upgrades
+        self.stale = stale
+        # collections read in full with nothing left to upgrade: whatever is
+        # written from now on is current, so they need no more checking
+        self._current = set()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def _upgraded(self, collection: str, records: Dict[str, dict]) -> Dict[str, dict]:
+        if collection in self._current:
+            return records
+        stale = [key for key, record in records.items() if self.stale(record)]
+        if not stale:
+            return records
+        get = self.inner.get_resume if collection == 'resumes' else self.inner.get_job
+        latest, changed = {}, []
+        with self._lock:
+            # read again: another thread may have upgraded, then updated, some of them
+            for key in stale:
+                record = get(key)
+                if record is not None and self.stale(record):
+                    record = dict(record)
+                    self.upgrades[collection](record)
+                    changed.append(record)
+                if record is not None:
+                    latest[key] = record
+            if collection == 'resumes':
+                self.inner.put_resumes(changed)
+            else:
+                self.inner.put_jobs(changed)
+        records = dict(records)
+        records.update(latest)
+        return records
+
+    def _listed(self, collection: str, records: Dict[str, dict]) -> Dict[str, dict]:
+        records = self._upgraded(collection, records)
+        self._current.add(collection)
+        return records
+
+    def list_resumes(self):
+        return self._listed('resumes', self.inner.list_resumes())
+
+    def list_jobs(self):
+        return self._listed('jobs', self.inner.list_jobs())
+
+    def get_resume(self, resume_id):
+        record = self.inner.get_resume(resume_id)
+        return record if record is None else self._upgraded('resumes', {resume_id: record})[resume_id]
+
+    def get_job(self, job_id):
+        record = self.inner.get_job(job_id)
+        return record if record is None else self._upgraded('jobs', {job_id: record})[job_id]
+
+    def records_page(self, collection, limit=None, cursor=None):
+        records, next_cursor = self.inner.records_page(collection, limit, cursor)
+        return self._upgraded(collection, records), next_cursor
+
+
+def make_storage(backend: str, data_folder: str, db_path: str = None, shared: bool = False) -> Storage:
+    """
+    'json' keeps the three JSON files; 'sqlite' uses db_path (default
+    data/app.db), migrating the JSON files into it the first time it is created.
+    shared: several processes will use data_folder at once.
+    """
+    if backend == 'json':
+        return JsonStorage(data_folder, shared)
+    if backend == 'sqlite':
+        db_path = db_path or os.path.join(data_folder, 'app.db')
+        # only one of several starting processes migrates, the others wait for it
+        with FileLock(db_path + '.lock', 'migrate') if shared else nullcontext():
+            if not os.path.exists(db_path):
+                counts = migrate_json_to_sqlite(data_folder, db_path)
+                print(f"Migrated JSON data into {db_path}: {counts}")
+        return SqliteStorage(db_path)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migrate the JSON data files into SQLite.')
+    parser.add_argument('command', choices=['migrate'])
+    parser.add_argument('--data', default='data', help='folder with resumes.json, jobs.json, matches.json')
+    parser.add_argument('--db', default=None, help='SQLite file (default: <data>/app.db)')
+    args = parser.parse_args()
+    db_path = args.db or os.path.join(args.data, 'app.db')
+    if os.path.exists(db_path):
+        parser.error(f"{db_path} already exists")
+    print(json.dumps(migrate_json_to_sqlite(args.data, db_path)))
@@ -0,0 +1,162 @@
+import json
+import os
+import signal
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _worker_init(nice: int = 0):
+    # forked from a server that may handle SIGTERM itself (uvicorn only sets
+    # a flag); a worker should just exit
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if nice:
+        os.nice(nice)
+
+
+class TaskQueue:
+    """
+    Bounded background queue: `fn` runs in a process pool (CPU-bound work
+    such as PDF parsing), then `on_result` runs on a single commit thread
+    in this process with its return value (work that needs shared state,
+    such as scoring and storage). Task status is kept for the last
+    `keep_finished` finished tasks. Workers run at `nice` lower priority,
+    so where they share cores with the server, parsing yields to requests.
+
+    With a `status_folder`, queued and finished statuses are also written
+    there (one JSON file per task), so any of several server processes
+    sharing the folder can answer status() for a task another one queued.
+    """
+
+    def __init__(self, workers: int = None, max_pending: int = 64, keep_finished: int = 1000,
+                 status_folder: str = None, nice: int = 0):
+        self.workers = workers or os.cpu_count() or 1
+        self.nice = nice
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self.status_folder = status_folder
+        if status_folder:
+            os.makedirs(status_folder, exist_ok=True)
+        self._tasks = OrderedDict()
+        self._futures = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._commit = ThreadPoolExecutor(max_workers=1, thread_name_prefix='task-commit')
+
+    def executor(self) -> ProcessPoolExecutor:
+        """The worker process pool, also usable for one-off batches."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_worker_init,
+                                             initargs=(self.nice,))
+        return self._pool
+
+    def shutdown(self):
+        """Stop the worker processes, dropping tasks that have not started."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        self._commit.shutdown(wait=True)
+
+    def _status_path(self, task_id: str) -> str:
+        return os.path.join(self.status_folder, f"{task_id}.json")
+
+    def _publish(self, task: dict):
+        """Write a task's status to the status folder, if there is one."""
+        if not self.status_folder:
+            return
+        path = self._status_path(task['id'])
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(task, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error writing task status: {e}")
+
+    def _unpublish(self, task_id: str):
+        if not self.status_folder:
+            return
+        try:
+            os.remove(self._status_path(task_id))
+        except OSError:
+            pass
+
+    def submit(self, fn: Callable, args: tuple, on_result: Callable, info: dict = None) -> str:
+        """Queue fn(*args); raises QueueFull when max_pending tasks are already waiting or running."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} tasks pending")
+            task_id = uuid.uuid4().hex
+            self._tasks[task_id] = dict(info or {}, id=task_id, status='queued',
+                                        submitted_at=datetime.utcnow().isoformat())
+            self._pending += 1
+            task = dict(self._tasks[task_id])
+            pool = self.executor()
+        # before the pool can finish it, so 'done' is never overwritten by 'queued'
+        self._publish(task)
+        try:
+            future = pool.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                del self._tasks[task_id]
+            self._unpublish(task_id)
+            raise
+        with self._lock:
+            self._futures[task_id] = future
+        future.add_done_callback(lambda f: self._commit.submit(self._finish, task_id, f, on_result))
+        return task_id
+
+    def _finish(self, task_id, future, on_result):
+        try:
+            result = on_result(future.result())
+            update = {'status': 'done', 'result': result}
+        except Exception as e:
+            update = {'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+        update['finished_at'] = datetime.utcnow().isoformat()
+        with self._lock:
+            self._tasks[task_id].update(update)
+            task = dict(self._tasks[task_id])
+            self._futures.pop(task_id, None)
+            self._pending -= 1
+            finished = [t for t, task in self._tasks.items() if task['status'] in ('done', 'failed')]
+            evicted = finished[:max(0, len(finished) - self.keep_finished)]
+            for t in evicted:
+                del self._tasks[t]
+        self._publish(task)
+        for t in evicted:
+            self._unpublish(t)
+
+    def status(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return self._published(task_id)
+            task = dict(task)
+            future = self._futures.get(task_id)
+        if task['status'] == 'queued' and future is not None and (future.running() or future.done()):
+            task['status'] = 'running'
+        return task
+
+    def _published(self, task_id: str) -> Optional[dict]:
+        """A task another process queued, from the status folder."""
+        if not self.status_folder or not all(c in '0123456789abcdef' for c in task_id):
+            return None
+        try:
+            with open(self._status_path(task_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'pending': self._pending, 'max_pending': self.max_pending, 'workers': self.workers}
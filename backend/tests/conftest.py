@@ -0,0 +1,67 @@
+"""
+Shared fixtures. app.py keeps its data and uploads in folders relative to
+the working directory and builds its state at import, so the app is
+imported once per session from inside a temporary folder.
+"""
+import importlib
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+RESUMES = [
+    ('Ana Cruz', 'python django sql', ['django', 'python', 'sql']),
+    ('Ben Reyes', 'java spring kubernetes', ['java', 'kubernetes', 'spring']),
+    ('Cora Lim', 'python machine learning pandas', ['machine learning', 'pandas', 'python']),
+]
+
+
+def parsed_resume(text, skills):
+    """A parse result shaped like extractor.extract_sections_from_stream's."""
+    return {'raw_text': text, 'experience': text, 'education': '', 'skills': skills, 'combined_text': text}
+
+
+@pytest.fixture(scope='session')
+def core(tmp_path_factory):
+    """The app module, serving a fresh data folder with two jobs and three resumes."""
+    folder = tmp_path_factory.mktemp('app')
+    cwd = os.getcwd()
+    os.chdir(folder)
+    os.environ['RESCORE_ON_STARTUP'] = '0'
+    os.environ['INGEST_WORKERS'] = '1'
+    try:
+        module = importlib.import_module('app')
+    finally:
+        os.chdir(cwd)
+    # the module's folders are relative: keep them pointing at the temporary one
+    os.chdir(folder)
+    module.create_job('Backend developer', 'python django sql developer')
+    module.create_job('Platform engineer', 'java kubernetes spring engineer')
+    for n, (name, text, skills) in enumerate(RESUMES):
+        module.ingest_resume(f"r{n}", name, f"r{n}.pdf", parsed_resume(text, skills))
+    yield module
+    module.ingest_queue.shutdown()
+    os.chdir(cwd)
+
+
+@pytest.fixture
+def client(core):
+    return core.app.test_client()
+
+
+@pytest.fixture(scope='session')
+def asgi_client(core):
+    from starlette.testclient import TestClient
+    import asgi
+    with TestClient(asgi.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, tmp_path):
+    """An empty store of each backend."""
+    from storage import make_storage
+    return make_storage(request.param, str(tmp_path))
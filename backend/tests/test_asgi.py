@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/upload_job', '/chatbot_score', '/chatbot_score/batch'])
+@pytest.mark.parametrize('body', [b'{"title": "x", "job_text": ', b'[1, 2]', b'"text"', b'null', b'\xff'])
+def test_bad_json_is_rejected_alike(client, asgi_client, path, body):
+    headers = {'Content-Type': 'application/json'}
+    flask_response = client.post(path, data=body, headers=headers)
+    asgi_response = asgi_client.post(path, content=body, headers=headers)
+    assert flask_response.status_code == asgi_response.status_code == 400
+    assert flask_response.data == asgi_response.content == b'{"error":"Invalid JSON body"}\n'
+
+
+@pytest.mark.parametrize('path', ['/jobs?fields=title', '/resumes?limit=2', '/resume_matches/r0',
+                                  '/chatbot_questions', '/job_matches/missing', '/tasks/missing'])
+def test_get_routes_match_flask(client, asgi_client, path):
+    flask_response = client.get(path)
+    asgi_response = asgi_client.get(path)
+    assert flask_response.status_code == asgi_response.status_code
+    assert flask_response.data == asgi_response.content
+    assert flask_response.headers.get('ETag') == asgi_response.headers.get('ETag')
+    assert asgi_response.headers['Access-Control-Allow-Origin'] == '*'
+
+
+def test_chatbot_score_matches_flask(client, asgi_client, core):
+    answers = [{'question_id': qid, 'option_index': 1} for qid in core.questions.ids]
+    body = json.dumps({'answers': answers})
+    headers = {'Content-Type': 'application/json'}
+    flask_response = client.post('/chatbot_score', data=body, headers=headers)
+    asgi_response = asgi_client.post('/chatbot_score', content=body, headers=headers)
+    assert flask_response.status_code == asgi_response.status_code == 200
+    assert flask_response.data == asgi_response.content
+
+
+def _multipart_chunks(filename, size, chunk=64 * 1024):
+    """A multipart upload of `size` bytes, as a generator so it is sent chunked (no Content-Length)."""
+    yield (f"--b\r\nContent-Disposition: form-data; name=\"resume\"; filename=\"{filename}\"\r\n"
+           "Content-Type: application/pdf\r\n\r\n").encode()
+    for _ in range(size // chunk):
+        yield b'%' * chunk
+    yield b"\r\n--b--\r\n"
+
+
+def test_chunked_upload_over_the_limit_is_refused(asgi_client, core, monkeypatch):
+    monkeypatch.setitem(core.app.config, 'MAX_CONTENT_LENGTH', 256 * 1024)
+    response = asgi_client.post('/upload_resume', content=_multipart_chunks('big.pdf', 1024 * 1024),
+                                headers={'Content-Type': 'multipart/form-data; boundary=b'})
+    assert response.status_code == 413
+    assert response.json() == {'error': 'Upload too large'}
+    assert not [name for name in os.listdir(core.app.config['UPLOAD_FOLDER']) if name.startswith('big')]
+
+
+def test_declared_length_over_the_limit_is_refused(asgi_client, core, monkeypatch):
+    monkeypatch.setitem(core.app.config, 'MAX_CONTENT_LENGTH', 1024)
+    response = asgi_client.post('/upload_job', json={'title': 't', 'job_text': 'x' * 4096})
+    assert response.status_code == 413
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
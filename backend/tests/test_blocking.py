@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from blocking import SkillIndex, partition
+
+from conftest import parsed_resume
+
+SKILLS = [f"s{n}" for n in range(30)]
+
+
+@pytest.fixture(scope='module')
+def documents():
+    rng = random.Random(3)
+    resumes = {f"r{n}": rng.sample(SKILLS, rng.randint(0, 6)) for n in range(200)}
+    jobs = {f"j{n}": rng.sample(SKILLS, rng.randint(0, 6)) for n in range(20)}
+    return resumes, jobs
+
+
+def _record(doc_id, skills):
+    return {'id': doc_id, 'features': {'skills': skills}}
+
+
+@pytest.fixture(scope='module')
+def index(documents):
+    resumes, jobs = documents
+    return SkillIndex.build({k: _record(k, v) for k, v in resumes.items()}, {k: _record(k, v) for k, v in jobs.items()})
+
+
+@pytest.mark.parametrize('min_shared', [1, 2, 3])
+def test_candidates_are_every_document_sharing_enough_skills(documents, index, min_shared):
+    resumes, jobs = documents
+    for job_skills in jobs.values():
+        expected = {r for r, skills in resumes.items() if len(set(skills) & set(job_skills)) >= min_shared}
+        assert index.candidates('resumes', job_skills, min_shared) == expected
+    for resume_skills in list(resumes.values())[:50]:
+        expected = {j for j, skills in jobs.items() if len(set(skills) & set(resume_skills)) >= min_shared}
+        assert index.candidates('jobs', resume_skills, min_shared) == expected
+
+
+def test_top_m_keeps_the_largest_overlaps(documents, index):
+    resumes, jobs = documents
+    for job_skills in jobs.values():
+        kept = index.candidates('resumes', job_skills, 1, top_m=10)
+        overlaps = {r: len(set(s) & set(job_skills)) for r, s in resumes.items()}
+        assert len(kept) == min(10, sum(1 for n in overlaps.values() if n))
+        if kept:
+            assert min(overlaps[r] for r in kept) >= max((n for r, n in overlaps.items() if r not in kept), default=0)
+
+
+def test_readding_a_document_replaces_its_skills():
+    index = SkillIndex()
+    index.add('resumes', 'r1', ['python', 'sql'])
+    index.add('resumes', 'r1', ['java'])
+    assert index.candidates('resumes', ['python']) == set()
+    assert index.candidates('resumes', ['java']) == {'r1'}
+    assert index.missing('resumes', ['r1', 'r2']) == ['r2']
+    assert partition(['a', 'b', 'c'], {'c', 'a'}) == (['a', 'c'], ['b'])
+
+
+def test_blocking_keeps_every_pair_with_a_skill_score(core, monkeypatch):
+    """With one shared skill required, only pairs that would score no skill overlap are pruned."""
+    text = 'python sql kubernetes developer'
+    # a resume sharing none of its skills
+    core.ingest_resume('no_overlap', 'Lu Wang', 'lu.pdf', parsed_resume('rust golang', ['rust', 'go']))
+    # no refit between the two jobs
+    core.corpus.fit()
+    exact = {e['resume_id']: e for e in core.store.job_matches(core.create_job('Exact', text)['job_id'])}
+    monkeypatch.setitem(core.app.config, 'CANDIDATE_BLOCKING', True)
+    job_id = core.create_job('Blocked', text)['job_id']
+    job_skills = set(core.store.get_job(job_id)['features']['skills'])
+    pruned = 0
+    for entry in core.store.job_matches(job_id):
+        resume_skills = set(core.store.get_resume(entry['resume_id'])['features']['skills'])
+        if job_skills & resume_skills:
+            assert not entry.get('lower_bound')
+            assert entry['score'] == pytest.approx(exact[entry['resume_id']]['score'], abs=0.01)
+        else:
+            assert entry['lower_bound'] and entry['score'] <= exact[entry['resume_id']]['score']
+            pruned += 1
+    assert pruned
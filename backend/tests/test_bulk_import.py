@@ -0,0 +1,66 @@
+import io
+import os
+import time
+import zipfile
+
+import pytest
+
+from conftest import BACKEND, parsed_resume
+
+PDFS = [os.path.join(BACKEND, 'uploads', name) for name in ('resume.pdf', 'sample_resume.pdf')]
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, path in members:
+            zf.write(path, name)
+    return buffer.getvalue()
+
+
+def _post_flask(client, name, body):
+    response = client.post('/upload_resumes_bulk', data={'resumes': (io.BytesIO(body), name)},
+                           content_type='multipart/form-data')
+    return response.status_code, response.json
+
+
+def _post_asgi(client, name, body):
+    response = client.post('/upload_resumes_bulk', files={'resumes': (name, body)})
+    return response.status_code, response.json()
+
+
+@pytest.mark.parametrize('post', [_post_flask, _post_asgi])
+def test_members_sharing_a_name_are_both_kept(core, client, asgi_client, post):
+    status, report = post(client if post is _post_flask else asgi_client, 'batch.zip',
+                          _zip([('x/resume.pdf', PDFS[0]), ('y/resume.pdf', PDFS[1])]))
+    assert status == 201 and report['imported'] == 2
+    assert [r['filename'] for r in report['results']] == ['x/resume.pdf', 'y/resume.pdf']
+    records = [core.store.get_resume(r['resume_id']) for r in report['results']]
+    assert records[0]['id'] != records[1]['id']
+    assert records[0]['parsed']['raw_text'] != records[1]['parsed']['raw_text']
+    assert [r['original_filename'] for r in records] == ['x/resume.pdf', 'y/resume.pdf']
+    assert records[0]['filename'] != records[1]['filename']
+    assert all(os.path.exists(os.path.join(core.app.config['UPLOAD_FOLDER'], r['filename'])) for r in records)
+
+
+def test_uploads_sharing_a_name_are_both_kept(core, client):
+    ids = []
+    for path in PDFS:
+        with open(path, 'rb') as f:
+            response = client.post('/upload_resume', data={'resume': (f, 'cv.pdf'), 'applicant_name': 'Sam Lee'},
+                                   content_type='multipart/form-data')
+        assert response.status_code == 201
+        ids.append(response.json['resume_id'])
+    records = [core.store.get_resume(resume_id) for resume_id in ids]
+    assert ids[0] != ids[1] and records[0]['filename'] != records[1]['filename']
+    assert records[0]['parsed']['raw_text'] != records[1]['parsed']['raw_text']
+
+
+def test_new_resume_ids_skip_stored_ones(core):
+    stamp = int(time.time())
+    # this second and the next, in case the clock ticks over
+    for s in (stamp, stamp + 1):
+        core.ingest_resume(f"Kim Park_{s}", 'Kim Park', 'kim.pdf', parsed_resume('go developer', ['go']))
+    resume_id = core.new_resume_id('Kim Park')
+    assert core.store.get_resume(resume_id) is None
+    assert resume_id != core.new_resume_id('Kim Park')
@@ -0,0 +1,46 @@
+import pytest
+
+BAD_QUERIES = ['wait=nan', 'wait=inf', 'wait=-1', 'wait=abc', 'limit=0', 'limit=-1', 'limit=x',
+               'since=not-a-cursor']
+
+
+@pytest.mark.parametrize('query', BAD_QUERIES)
+def test_bad_query_is_rejected(client, asgi_client, query):
+    response = client.get(f'/matches/changes?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.json
+    response = asgi_client.get(f'/matches/changes?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'wait=nan'])
+def test_bad_query_is_rejected_for_event_streams(client, query):
+    response = client.get(f'/matches/changes?{query}', headers={'Accept': 'text/event-stream'})
+    assert response.status_code == 400
+
+
+def test_pages_move_the_cursor(client, core):
+    total = len(core.store.match_changes(0, 1000)[0])
+    seen, cursor = [], None
+    while True:
+        body = client.get('/matches/changes?limit=1' + (f'&since={cursor}' if cursor else '')).json
+        assert len(body['changes']) <= 1
+        seen += body['changes']
+        assert body['cursor'] != cursor or not body['more']
+        cursor = body['cursor']
+        if not body['more']:
+            break
+    assert len(seen) == total
+    assert [e['seq'] for e in seen] == sorted(e['seq'] for e in seen)
+
+
+def test_since_now_returns_nothing_yet(client, asgi_client):
+    for body in (client.get('/matches/changes?since=now&wait=0').json,
+                 asgi_client.get('/matches/changes?since=now').json()):
+        assert body['changes'] == []
+        assert body['more'] is False
+
+
+def test_flask_and_asgi_agree(client, asgi_client):
+    assert client.get('/matches/changes?limit=2').json == asgi_client.get('/matches/changes?limit=2').json()
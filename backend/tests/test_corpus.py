@@ -0,0 +1,86 @@
+import pytest
+
+from conftest import parsed_resume
+from corpus import CorpusModel
+
+# enough new words to change the size of the vocabulary when refit on
+OTHER_CORPUS = {f"resume:other{n}": f"rust golang terraform ansible word{n} extra{n}" for n in range(20)}
+
+
+@pytest.fixture
+def refit_after(core, monkeypatch):
+    """Make corpus.<name> refit the model on a different vocabulary right after it returns."""
+    def patch(name):
+        original = getattr(core.corpus, name)
+
+        def then_refit(*args, **kwargs):
+            result = original(*args, **kwargs)
+            core.corpus.fit(dict(core._corpus_documents(), **OTHER_CORPUS))
+            return result
+        monkeypatch.setattr(core.corpus, name, then_refit)
+    yield patch
+    monkeypatch.undo()
+    core.corpus.fit()
+
+
+def test_refit_while_a_job_is_scored(core, refit_after):
+    refit_after('add')
+    result = core.create_job('Data engineer', 'python pandas sql pipelines')
+    assert result['matches_count'] == len(core.store.list_resumes())
+
+
+def test_refit_while_resumes_are_scored(core, refit_after):
+    refit_after('add_many')
+    result = core.ingest_resume('race', 'Dee Santos', 'race.pdf', parsed_resume('python sql analyst', ['python', 'sql']))
+    assert len(result['matches_created']) == len(core.store.list_jobs())
+
+
+DOCS = {f"resume:r{n}": f"python sql pandas analyst word{n}" for n in range(10)}
+
+
+def _workers(tmp_path, documents):
+    path = str(tmp_path / 'corpus_model.pkl')
+    return [CorpusModel(path, lambda: dict(documents), shared=True) for _ in range(2)]
+
+
+def test_workers_score_with_the_refit_model(tmp_path):
+    documents = dict(DOCS)
+    a, b = _workers(tmp_path, documents)
+    a.load_or_fit()
+    b.load_or_fit()
+    assert b.vectorizer.vocabulary_ == a.vectorizer.vocabulary_
+
+    documents.update(OTHER_CORPUS)
+    a.fit()
+    keys = ['resume:r0', 'job:new']
+    texts = ['', 'rust golang python']
+    assert (b.matrix(keys, texts) != a.matrix(keys, texts)).nnz == 0
+    assert b.vectorizer.vocabulary_ == a.vectorizer.vocabulary_
+    assert b.fitted_docs == len(documents)
+
+
+def test_documents_added_before_a_reload_are_kept(tmp_path):
+    a, b = _workers(tmp_path, DOCS)
+    a.load_or_fit()
+    b.load_or_fit()
+    b.add('job:local', 'python analyst')
+    a.fit()
+    assert b.vector('job:local') is not None
+    assert (b.vector('job:local') != a._transform('python analyst')).nnz == 0
+
+
+def test_one_worker_refits_at_a_time(tmp_path):
+    documents = dict(DOCS)
+    a, b = _workers(tmp_path, documents)
+    a.load_or_fit()
+    b.load_or_fit()
+    added = {f"job:j{n}": 'rust golang' for n in range(5)}
+    documents.update(added)
+    b.add_many(list(added), list(added.values()))
+    with a._fit_lock:
+        b._refit()
+    assert len(b._added) == 5
+    b._refit()
+    assert not b._added
+    a.vector('resume:r0')
+    assert a.fitted_docs == b.fitted_docs
@@ -0,0 +1,102 @@
+import random
+import re
+import time
+
+import pytest
+
+import extractor
+from extractor import COMMON_SKILLS, PdfTextBackend, extract_pdf_text, extract_skills_from_text
+
+
+class SlowPages(PdfTextBackend):
+    """Ten pages of fake text, each taking 50 ms to read."""
+    name = 'slow_pages'
+
+    def load(self, source):
+        return source
+
+    def page_count(self, doc):
+        return 10
+
+    def page_text(self, doc, index):
+        time.sleep(0.05)
+        return f"page {index}"
+
+
+@pytest.fixture(autouse=True)
+def slow_backend(monkeypatch):
+    monkeypatch.setitem(extractor.PDF_BACKENDS, SlowPages.name, SlowPages)
+
+
+def test_max_pages():
+    text, info = extract_pdf_text(None, max_pages=3, time_budget=0, backend='slow_pages')
+    assert text == "page 0\npage 1\npage 2"
+    assert info == {'pages': 3, 'page_count': 10, 'truncated': 'max_pages'}
+
+
+def test_time_budget_is_checked_between_pages():
+    text, info = extract_pdf_text(None, max_pages=0, time_budget=0.12, backend='slow_pages')
+    assert info['truncated'] == 'time_budget'
+    assert 2 <= info['pages'] <= 4
+
+
+def test_unknown_backend_is_an_error():
+    with pytest.raises(ValueError):
+        extract_pdf_text(None, backend='no_such_backend')
+
+
+def test_first_page_is_read_whatever_the_budget():
+    text, info = extract_pdf_text(None, max_pages=0, time_budget=1e-9, backend='slow_pages')
+    assert text == "page 0"
+    assert info['truncated'] == 'time_budget'
+
+
+def _regex_skills(text, skills_list=COMMON_SKILLS):
+    """extract_skills_from_text as it was before the trie: one re.search per skill."""
+    found = set()
+    text_lower = text.lower()
+    for skill in skills_list:
+        if re.search(r'\b' + re.escape(skill.lower()) + r'\b', text_lower):
+            found.add(skill)
+    for section in re.findall(r'(?i)(?:skills?|technical skills?|competencies?|expertise)[:\-]\s*([^\n]+(?:\n[^\n]+)*)', text):
+        for potential in re.split(r'[,\|;/•\-•\n]', section):
+            candidate = potential.strip()
+            if len(candidate) > 2 and candidate not in ['', 'and', 'or']:
+                for common_skill in skills_list:
+                    if common_skill.lower() in candidate.lower() or candidate.lower() in common_skill.lower():
+                        found.add(common_skill)
+                        break
+                else:
+                    if len(candidate) < 50 and not candidate[0].isdigit():
+                        found.add(candidate)
+    return sorted(found)
+
+
+def _sample_texts():
+    rng = random.Random(0)
+    glue = [' ', ', ', '. ', ' / ', '\n', ' and ', '(', ') ', '-', 'x']
+    for _ in range(300):
+        words = rng.sample(COMMON_SKILLS, 8) + rng.sample(['team', 'lead', 'c', 'reactive', 'golang', 'r&d', '3 years'], 2)
+        rng.shuffle(words)
+        text = ''.join(w + rng.choice(glue) for w in words)
+        if rng.random() < 0.5:
+            text = f"Summary\n{text}\nTechnical Skills: " + ', '.join(rng.sample(COMMON_SKILLS + ['Excel macros', 'ML'], 5))
+        yield rng.choice([text, text.upper(), text.lower()])
+
+
+@pytest.mark.parametrize('text', ['C++, C# and F# developer', 'React Native and React', 'Skills: java, Excel macros\nreact',
+                                  'node.js; Node.js.', 'expertise- go / rust', 'SQL-Server, R, Go.', ''])
+def test_skill_matcher_matches_the_regex_path(text):
+    assert extract_skills_from_text(text) == _regex_skills(text)
+
+
+def test_skill_matcher_matches_the_regex_path_on_generated_texts():
+    for text in _sample_texts():
+        assert extract_skills_from_text(text) == _regex_skills(text), text
+
+
+def test_custom_skills_list():
+    skills = ['Go', 'Golang', 'Data']
+    text = 'Skills: golang, big data, Cooking'
+    assert extract_skills_from_text(text, skills) == _regex_skills(text, skills)
+    assert 'Golang' in extract_skills_from_text(text, skills) and 'Cooking' in extract_skills_from_text(text, skills)
@@ -0,0 +1,25 @@
+import numpy as np
+
+import feature_store
+from feature_store import SkillMatrix, SkillVocabulary, popcount
+
+
+def test_popcount_fallback_matches_numpy(monkeypatch):
+    words = np.random.default_rng(0).integers(0, 2 ** 63, size=(50, 3), dtype=np.uint64)
+    words[0, 0] = np.uint64(2 ** 64 - 1)
+    expected = np.array([[bin(int(w)).count('1') for w in row] for row in words])
+    assert (popcount(words) == expected).all()
+    monkeypatch.delattr(feature_store.np, 'bitwise_count', raising=False)
+    assert (popcount(words) == expected).all()
+    assert (popcount(words[:, 1:]) == expected[:, 1:]).all()
+
+
+def test_shared_counts(monkeypatch):
+    matrix = SkillMatrix(SkillVocabulary(['python', 'sql', 'java']))
+    matrix.add('a', ['python', 'sql'])
+    matrix.add('b', ['java', 'rust'])
+    matrix.add('c', [])
+    rows = matrix.rows(['a', 'b', 'c'])
+    assert matrix.shared_counts(rows, ['python', 'sql', 'rust']).tolist() == [2, 1, 0]
+    monkeypatch.delattr(feature_store.np, 'bitwise_count', raising=False)
+    assert matrix.shared_counts(rows, ['python', 'sql', 'rust']).tolist() == [2, 1, 0]
@@ -0,0 +1,6 @@
+def test_jobs_created_in_one_second_keep_their_own_ids(core, client):
+    before = len(core.store.list_jobs())
+    ids = [client.post('/upload_job', json={'title': f"Job {n}", 'job_text': 'python sql'}).json['job_id']
+           for n in range(3)]
+    assert len(set(ids)) == 3
+    assert len(core.store.list_jobs()) == before + 3
@@ -0,0 +1,82 @@
+import io
+import os
+
+import pytest
+
+import extractor
+import parse_cache
+from parse_cache import ParseCache, extractor_fingerprint, pdf_digest
+
+from conftest import BACKEND
+
+PARSED = {'raw_text': 'python', 'skills': ['Python']}
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Stand in for the PDF parser; lists the PDFs it was asked to parse."""
+    calls = []
+
+    def parse(pdf_bytes):
+        calls.append(pdf_bytes)
+        return dict(PARSED, raw_text=pdf_bytes.decode())
+    monkeypatch.setattr(parse_cache, 'extract_sections_from_pdf_bytes', parse)
+    return calls
+
+
+def test_hits_and_misses(tmp_path):
+    cache = ParseCache(str(tmp_path), max_entries=1, fingerprint='f1')
+    assert cache.get('a' * 64) is None
+    cache.put('a' * 64, PARSED)
+    cache.put('b' * 64, PARSED)
+    assert cache.get('b' * 64) == PARSED
+    # evicted from memory, still on disk
+    assert cache.get('a' * 64) == PARSED
+    assert cache.stats() == {'fingerprint': 'f1', 'hits': 2, 'memory_hits': 1, 'misses': 1, 'hit_rate': 0.6667,
+                             'memory_entries': 1, 'max_entries': 1}
+    assert ParseCache(str(tmp_path), fingerprint='f1').get('b' * 64) == PARSED
+
+
+def test_extract_parses_each_pdf_once(tmp_path, parses):
+    cache = ParseCache(str(tmp_path))
+    assert cache.extract(b'one') == cache.extract(b'one') == dict(PARSED, raw_text='one')
+    cache.extract(b'two')
+    assert parses == [b'one', b'two']
+    assert os.path.exists(cache._path(pdf_digest(b'one')))
+
+
+def test_time_budget_results_are_not_kept(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    cache.put('a' * 64, dict(PARSED, truncated='time_budget'))
+    cache.put('b' * 64, dict(PARSED, truncated='max_pages'))
+    assert cache.get('a' * 64) is None
+    assert cache.get('b' * 64)['truncated'] == 'max_pages'
+
+
+@pytest.mark.parametrize('setting, value', [('PDF_BACKEND', 'other'), ('PDF_MAX_PAGES', 3),
+                                            ('COMMON_SKILLS', ['Cobol'])])
+def test_extractor_changes_start_a_fresh_cache(tmp_path, parses, monkeypatch, setting, value):
+    before = extractor_fingerprint()
+    ParseCache(str(tmp_path)).extract(b'one')
+    if setting == 'COMMON_SKILLS':
+        monkeypatch.setattr(parse_cache, setting, value)
+    else:
+        monkeypatch.setattr(extractor, setting, value)
+    assert extractor_fingerprint() != before
+    ParseCache(str(tmp_path)).extract(b'one')
+    assert parses == [b'one', b'one']
+    monkeypatch.undo()
+    ParseCache(str(tmp_path)).extract(b'one')
+    assert len(parses) == 2
+
+
+def test_uploading_a_pdf_again_skips_parsing(client, core):
+    with open(os.path.join(BACKEND, 'uploads', 'sample_resume.pdf'), 'rb') as f:
+        pdf = f.read()
+    hits = []
+    for name in ('first.pdf', 'again.pdf'):
+        response = client.post('/upload_resume', data={'resume': (io.BytesIO(pdf), name)},
+                               content_type='multipart/form-data')
+        assert response.status_code == 201
+        hits.append(core.parse_cache.hits)
+    assert hits[1] == hits[0] + 1
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from questionnaire import QuestionIndex, question_id
+
+QUESTIONS = [
+    {'q': 'Education?', 'options': ['School', 'Degree'], 'values': [10, 30]},
+    {'q': 'Experience?', 'options': ['0-1', '2-5', '6+'], 'values': [0, 20, 70]},
+]
+
+
+@pytest.fixture
+def index():
+    return QuestionIndex(QUESTIONS)
+
+
+def test_scores_are_normalized(index):
+    scores, errors = index.score([
+        [{'question': 'Education?', 'option_index': 1}, {'question': 'Experience?', 'option_index': 2}],
+        [{'question': 'Education?', 'option_index': 0}],
+        [],
+    ])
+    assert scores == [100.0, 10.0, 0.0]
+    assert errors == [None, None, None]
+
+
+def test_question_id_or_text(index):
+    by_id = [{'question_id': question_id('Experience?'), 'option_index': 1}]
+    by_text = [{'question': 'Experience?', 'option_index': 1}]
+    assert index.score([by_id, by_text])[0] == [20.0, 20.0]
+    assert [q['id'] for q in index.describe()] == index.ids
+
+
+def test_unknown_questions_count_for_nothing(index):
+    scores, errors = index.score([[{'question': 'Favourite colour?', 'option_index': 3},
+                                   {'question': 'Education?', 'option_index': 1}]])
+    assert scores == [30.0]
+    assert errors == [None]
+
+
+@pytest.mark.parametrize('answers', [
+    {'question': 'Education?'},
+    ['Education?'],
+    [{'question': ['Education?'], 'option_index': 1}],
+    [{'question_id': {'id': 'x'}, 'option_index': 1}],
+    [{'option_index': 1}],
+    [{'question': 'Education?', 'option_index': 2}],
+    [{'question': 'Education?', 'option_index': True}],
+    [{'question': 'Education?', 'option_index': '1'}],
+])
+def test_malformed_answers_fail_only_their_set(index, answers):
+    good = [{'question': 'Education?', 'option_index': 1}]
+    scores, errors = index.score([good, answers, good])
+    assert scores == [30.0, 0.0, 30.0]
+    assert errors[0] is None and errors[2] is None
+    assert isinstance(errors[1], str)
+
+
+def _post(client, asgi_client, path, body):
+    body = json.dumps(body)
+    headers = {'Content-Type': 'application/json'}
+    flask_response = client.post(path, data=body, headers=headers)
+    asgi_response = asgi_client.post(path, content=body, headers=headers)
+    assert flask_response.status_code == asgi_response.status_code
+    assert flask_response.data == asgi_response.content
+    return flask_response
+
+
+@pytest.mark.parametrize('answer', [{'question': ['a']}, {'question_id': {'a': 1}}, {'question_id': 7}])
+def test_bad_question_key_is_a_400(client, asgi_client, answer):
+    response = _post(client, asgi_client, '/chatbot_score', {'answers': [dict(answer, option_index=0)]})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'each answer needs a question or question_id string'}
+
+
+def test_bad_question_key_fails_one_batch_item(client, asgi_client, core):
+    good = [{'question_id': qid, 'option_index': 0} for qid in core.questions.ids]
+    applicants = [{'answers': good}, {'answers': [{'question': ['a'], 'option_index': 0}]}, {'answers': good}]
+    response = _post(client, asgi_client, '/chatbot_score/batch', {'applicants': applicants})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['scored'], body['failed']) == (2, 1)
+    assert 'error' in body['results'][1]
+    assert body['results'][0] == body['results'][2] == core.questionnaire_score(good)
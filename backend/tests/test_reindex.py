@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+import reindex
+from reindex import Reindexer
+from storage import make_storage
+
+
+def _store(folder, backend, suffix):
+    store = make_storage(backend, str(folder))
+    store.put_resumes([{'id': f"r_{suffix}", 'name': suffix}])
+    store.put_jobs([{'id': f"j_{suffix}", 'title': suffix}])
+    store.put_matches([{'job_id': f"j_{suffix}", 'resume_id': f"r_{suffix}", 'score': 1.0}])
+    store.close()
+
+
+def _staged(data, backend):
+    """A reindexer whose run got as far as the swap, with a one-record data set staged."""
+    reindexer = Reindexer(str(data), str(data / 'uploads'), backend)
+    reindexer.start()
+    reindexer.staging.put_resumes([{'id': 'r_new', 'name': 'new'}])
+    reindexer.staging.put_jobs([{'id': 'j_new', 'title': 'new'}])
+    reindexer.staging.put_matches([{'job_id': 'j_new', 'resume_id': 'r_new', 'score': 2.0}])
+    reindexer._save(phase='swap')
+    return reindexer
+
+
+def _killed_after_first_rename(monkeypatch):
+    """Make the next checkpoint after a rename fail, as if the process died between them."""
+    save = Reindexer._save
+
+    def dies(self, **changes):
+        if not changes and self.checkpoint.get('swap', {}).get('moved'):
+            raise KeyboardInterrupt
+        save(self, **changes)
+    monkeypatch.setattr(Reindexer, '_save', dies)
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_swap_resumes_after_a_kill(tmp_path, monkeypatch, backend):
+    _store(tmp_path, backend, 'old')
+    reindexer = _staged(tmp_path, backend)
+    with monkeypatch.context() as patched:
+        _killed_after_first_rename(patched)
+        with pytest.raises(KeyboardInterrupt):
+            reindexer.run()
+    resumed = Reindexer(str(tmp_path), str(tmp_path / 'uploads'), backend)
+    resumed.start()
+    assert resumed.staging is None
+    resumed.run()
+
+    current = make_storage(backend, str(tmp_path))
+    assert list(current.list_resumes()) == ['r_new'] and list(current.list_jobs()) == ['j_new']
+    assert current.job_matches('j_new')[0]['score'] == 2.0
+    previous = make_storage(backend, str(tmp_path / reindex.PREVIOUS_FOLDER))
+    assert list(previous.list_resumes()) == ['r_old'] and list(previous.list_jobs()) == ['j_old']
+
+
+def test_swap_refuses_when_a_staged_file_is_lost(tmp_path):
+    reindexer = _staged(tmp_path, 'sqlite')
+    reindexer._plan_swap()
+    os.remove(reindexer.checkpoint['swap']['files']['app.db'])
+    with pytest.raises(RuntimeError):
+        reindexer.swap()
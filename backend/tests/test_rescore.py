@@ -0,0 +1,36 @@
+from rescore import Rescorer
+from scoring import SCORE_VERSION
+from storage import FileLock
+
+
+def test_unknown_ids_are_not_remembered(core):
+    rescorer = Rescorer(core.store, core.corpus)
+    for n in range(100):
+        assert rescorer.ensure_job(f"missing{n}") == 0
+        assert rescorer.ensure_resume(f"missing{n}") == 0
+    rescorer.ensure_job(next(iter(core.store.list_jobs())))
+    rescorer.ensure_resume('r0')
+    assert len(rescorer._current_jobs) == 1 and rescorer._current_resumes == {'r0'}
+
+
+def test_stale_matches_are_rescored_on_read(core, client):
+    job_id = next(iter(core.store.list_jobs()))
+    entries = core.store.job_matches(job_id)
+    core.store.put_matches([dict(e, score=-1.0, score_version='old') for e in entries])
+    core.rescorer._current_jobs.discard(job_id)
+    ranked = client.get(f'/job_matches/{job_id}').json
+    assert {e['score_version'] for e in ranked} == {SCORE_VERSION}
+    assert len(ranked) == len(entries) and min(e['score'] for e in ranked) >= 0
+
+
+def test_waiting_worker_ends_up_all_current(core, tmp_path):
+    lock_path = str(tmp_path / 'rescore.lock')
+    held = FileLock(lock_path, 'rescore')
+    held.acquire()
+    rescorer = Rescorer(core.store, core.corpus, lock=FileLock(lock_path, 'rescore'))
+    assert rescorer.start()
+    rescorer._thread.join(0.3)
+    assert rescorer.stats()['running'] and not rescorer._all_current
+    held.release()
+    rescorer._thread.join(10)
+    assert rescorer._all_current and not rescorer.stats()['running']
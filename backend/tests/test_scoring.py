@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import feature_store
+from extractor import COMMON_SKILLS
+from feature_store import SkillMatrix, SkillVocabulary
+from scoring import (TITLE_KEYWORDS, job_features, resume_features, score_counts_for_job, score_jobs_for_resume,
+                     score_matrix, score_pair, score_resumes_for_job)
+
+from conftest import parsed_resume
+
+
+def _texts(rng, n):
+    words = [s.lower() for s in COMMON_SKILLS[:60]] + TITLE_KEYWORDS + ['team', 'remote', 'senior', 'data']
+    return [' '.join(rng.sample(words, rng.randint(0, 12))) for _ in range(n)]
+
+
+@pytest.fixture(scope='module')
+def documents():
+    """Features and TF-IDF rows for 12 jobs and 30 resumes, a few of them empty."""
+    rng = random.Random(1)
+    job_texts, resume_texts = _texts(rng, 12), _texts(rng, 30)
+    jobs = [job_features(text) for text in job_texts]
+    resumes = [resume_features(parsed_resume(text, [s for s in COMMON_SKILLS[:60] if s.lower() in text.split()]))
+               for text in resume_texts]
+    tfidf = TfidfVectorizer().fit_transform(job_texts + resume_texts)
+    return jobs, tfidf[:12], resumes, tfidf[12:]
+
+
+def _pairwise(jobs, job_matrix, resumes, resume_matrix):
+    """One score_pair call per pair, the way matches were scored before batching."""
+    return [[score_pair(job, resume, float((job_matrix[j] @ resume_matrix[r].T).toarray()[0, 0]))
+             for j, job in enumerate(jobs)] for r, resume in enumerate(resumes)]
+
+
+def test_score_matrix_matches_pairwise(documents):
+    jobs, job_matrix, resumes, resume_matrix = documents
+    expected = _pairwise(jobs, job_matrix, resumes, resume_matrix)
+    assert np.allclose(score_matrix(resumes, resume_matrix, jobs, job_matrix), expected, atol=0.01)
+    assert score_matrix(resumes, None, jobs, None) == _pairwise(jobs, job_matrix * 0, resumes, resume_matrix)
+    assert score_matrix([], None, jobs, None) == [] and score_matrix(resumes[:2], None, [], None) == [[], []]
+
+
+def test_one_to_many_scores_match_pairwise(documents):
+    jobs, job_matrix, resumes, resume_matrix = documents
+    expected = np.array(_pairwise(jobs, job_matrix, resumes, resume_matrix))
+    for j, job in enumerate(jobs):
+        assert np.allclose(score_resumes_for_job(job, job_matrix[j], resumes, resume_matrix), expected[:, j], atol=0.01)
+    for r, resume in enumerate(resumes):
+        assert np.allclose(score_jobs_for_resume(resume, resume_matrix[r], jobs, job_matrix), expected[r], atol=0.01)
+
+
+def test_skill_matrix_counts_match_pairwise(documents, monkeypatch):
+    jobs, job_matrix, resumes, resume_matrix = documents
+    expected = np.array(_pairwise(jobs, job_matrix, resumes, resume_matrix))
+    # a small base vocabulary, so most skills land in the overflow words
+    matrix = SkillMatrix(SkillVocabulary(['python', 'sql']), capacity=4)
+    matrix.add_records({'id': f"r{n}", 'features': f} for n, f in enumerate(resumes))
+    rows = matrix.rows([f"r{n}" for n in range(len(resumes))])
+    for use_numpy in (True, False):
+        if not use_numpy:
+            monkeypatch.delattr(feature_store.np, 'bitwise_count', raising=False)
+        for j, job in enumerate(jobs):
+            scores = score_counts_for_job(job, job_matrix[j], matrix.shared_counts(rows, job['skills']),
+                                          matrix.title_masks(rows), resume_matrix)
+            assert np.allclose(scores, expected[:, j], atol=0.01)
+
+
+def test_uploads_store_the_pairwise_score(core):
+    # vectors stored before the last fit come from another vocabulary
+    core.corpus.fit()
+    result = core.create_job('Data analyst', 'python sql pandas analyst')
+    job = core.store.get_job(result['job_id'])
+    stored = {e['resume_id']: e['score'] for e in core.store.job_matches(result['job_id'])}
+    for resume_id, resume in core.store.list_resumes().items():
+        expected = core.compute_employability_score(resume['parsed'], job['job_text'])
+        assert stored[resume_id] == pytest.approx(expected, abs=0.01)
+    parsed = parsed_resume('senior python developer sql', ['python', 'sql'])
+    result = core.ingest_resume('pairwise', 'Eve Tan', 'pairwise.pdf', parsed)
+    for match in result['matches_created']:
+        expected = core.compute_employability_score(parsed, core.store.get_job(match['job_id'])['job_text'])
+        assert match['score'] == pytest.approx(expected, abs=0.01)
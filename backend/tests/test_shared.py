@@ -0,0 +1,61 @@
+import multiprocessing
+
+import pytest
+
+from storage import SharedCounters, make_storage
+
+
+def match(job_id, resume_id, score):
+    return {'job_id': job_id, 'resume_id': resume_id, 'applicant_name': resume_id, 'score': score}
+
+
+def _write_matches(backend, folder, worker, n):
+    """One worker process: n single-match writes to its own resumes."""
+    store = make_storage(backend, folder, shared=True)
+    for i in range(n):
+        store.put_matches([match('j1', f"w{worker}_{i}", i)])
+    store.close()
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def backend(request):
+    return request.param
+
+
+def test_counters_are_shared(tmp_path):
+    a = SharedCounters(str(tmp_path / 'versions.bin'), ['x', 'y'])
+    b = SharedCounters(str(tmp_path / 'versions.bin'), ['x', 'y'])
+    start = b.get('x')
+    assert a.get('x') == start
+    a.bump('x')
+    assert b.get('x') == (start + 1) & 0xFFFFFFFFFFFFFFFF
+    assert b.get('y') == a.get('y')
+
+
+def test_writes_reach_other_instances(tmp_path, backend):
+    a = make_storage(backend, str(tmp_path), shared=True)
+    b = make_storage(backend, str(tmp_path), shared=True)
+    version = b.version('resumes')
+    a.put_resumes([{'id': 'r1', 'name': 'A'}])
+    assert b.version('resumes') != version
+    assert b.get_resume('r1') == {'id': 'r1', 'name': 'A'}
+    a.put_matches([match('j1', 'r1', 10)])
+    b.put_matches([match('j1', 'r2', 20)])
+    assert [e['resume_id'] for e in a.job_matches('j1')] == ['r2', 'r1']
+    assert [e['seq'] for e in a.match_changes(0)[0]] == [1, 2]
+    assert b.last_change_seq() == a.last_change_seq() == 2
+
+
+def test_processes_writing_at_once(tmp_path, backend):
+    make_storage(backend, str(tmp_path), shared=True).close()
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_write_matches, args=(backend, str(tmp_path), w, 20)) for w in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+    store = make_storage(backend, str(tmp_path), shared=True)
+    entries, last, more = store.match_changes(0)
+    assert len(store.job_matches('j1')) == len(entries) == 60
+    assert sorted(e['seq'] for e in entries) == list(range(1, 61)) and last == 60 and not more
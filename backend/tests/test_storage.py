@@ -0,0 +1,197 @@
+import os
+
+import pytest
+
+from storage import BackfillStorage, SqliteStorage, Storage, make_storage
+
+
+def match(job_id, resume_id, score):
+    return {'job_id': job_id, 'resume_id': resume_id, 'applicant_name': resume_id, 'score': score,
+            'timestamp': '2024-01-01T00:00:00', 'score_version': 'v1'}
+
+
+@pytest.fixture
+def ranked(storage):
+    """A store whose job j1 has ten matches, two of them tied."""
+    scores = [90, 80, 80, 70, 60, 50, 40, 30, 20, 10]
+    storage.put_matches([match('j1', f"r{n}", score) for n, score in enumerate(scores)])
+    storage.put_matches([match('j2', 'r0', 55)])
+    return storage
+
+
+def test_job_matches_best_first(ranked):
+    assert [e['score'] for e in ranked.job_matches('j1')] == [90, 80, 80, 70, 60, 50, 40, 30, 20, 10]
+    assert ranked.job_matches('missing') == []
+
+
+@pytest.mark.parametrize('limit', [1, 3, 4, 10])
+def test_cursor_pages_cover_the_ranking_once(ranked, limit):
+    seen, cursor = [], None
+    while True:
+        page, cursor = ranked.job_matches_page('j1', limit=limit, cursor=cursor)
+        assert len(page) <= limit
+        seen += page
+        if cursor is None:
+            break
+    assert seen == ranked.job_matches('j1')
+
+
+def test_offset_and_min_score(ranked):
+    page, cursor = ranked.job_matches_page('j1', limit=2, offset=3)
+    assert [e['score'] for e in page] == [70, 60]
+    assert cursor is not None
+    page, cursor = ranked.job_matches_page('j1', min_score=55)
+    assert [e['score'] for e in page] == [90, 80, 80, 70, 60]
+    assert cursor is None
+    page, cursor = ranked.job_matches_page('j1', limit=5, min_score=55)
+    assert len(page) == 5 and cursor is None
+
+
+def test_limit_zero_returns_an_empty_last_page(ranked):
+    assert ranked.job_matches_page('j1', limit=0) == ([], None)
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=-1', 'offset=-1', 'min_score=x', 'min_score=nan',
+                                   'min_score=inf', 'min_score=-inf', 'cursor=bogus'])
+def test_job_matches_query_is_validated(client, asgi_client, query):
+    assert client.get(f'/job_matches/any?{query}').status_code == 400
+    assert asgi_client.get(f'/job_matches/any?{query}').status_code == 400
+    if query.startswith('min_score'):
+        assert client.get(f'/employability_ranking/any?{query}').status_code == 400
+
+
+def test_records_page_walks_in_insertion_order(storage):
+    storage.put_resumes([{'id': f"r{n}", 'name': f"R{n}"} for n in range(7)])
+    seen, cursor = [], None
+    while True:
+        page, cursor = storage.records_page('resumes', 3, cursor)
+        seen += list(page)
+        if cursor is None:
+            break
+    assert seen == [f"r{n}" for n in range(7)]
+    assert storage.records_page('resumes', 0) == ({}, None)
+
+
+def test_collection_limit_is_validated(client):
+    assert client.get('/resumes?limit=0').status_code == 400
+    assert client.get('/resumes?limit=1').status_code == 200
+
+
+class MemoryStorage(Storage):
+    """The smallest complete backend: only the abstract methods, over dicts."""
+
+    def __init__(self):
+        super().__init__()
+        self.resumes, self.jobs, self.matches, self.seq = {}, {}, {}, 0
+
+    def list_resumes(self):
+        return dict(self.resumes)
+
+    def list_jobs(self):
+        return dict(self.jobs)
+
+    def put_resumes(self, records):
+        self.resumes.update((r['id'], r) for r in records)
+
+    def put_jobs(self, records):
+        self.jobs.update((r['id'], r) for r in records)
+
+    def put_matches(self, entries):
+        for entry in entries:
+            self.seq += 1
+            self.matches.setdefault(entry['job_id'], {})[entry['resume_id']] = dict(entry, seq=self.seq)
+
+    def resume_matches(self, resume_id):
+        return sorted((m[resume_id] for m in self.matches.values() if resume_id in m), key=lambda e: -e['score'])
+
+    def all_matches(self):
+        return self.matches
+
+
+def test_incomplete_backend_fails_when_created():
+    class NoMatches(MemoryStorage):
+        all_matches = Storage.all_matches
+
+    with pytest.raises(TypeError):
+        NoMatches()
+
+
+def test_default_pages_and_changes():
+    store = MemoryStorage()
+    store.put_matches([match('j1', f"r{n}", score) for n, score in enumerate([30, 20, 20, 10])])
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.job_matches_page('j1', limit=3, cursor=cursor)
+        seen += page
+        if cursor is None:
+            break
+    assert [e['score'] for e in seen] == [30, 20, 20, 10]
+    assert store.job_matches_page('j1', limit=0) == ([], None)
+    entries, after, more = store.match_changes(0, 3)
+    assert [e['seq'] for e in entries] == [1, 2, 3] and after == 3 and more
+    assert store.match_changes(after, 3) == ([store.matches['j1']['r3']], 4, False)
+
+
+def _json_folder(folder):
+    store = make_storage('json', str(folder))
+    store.put_resumes([{'id': 'r1', 'name': 'A'}])
+    store.put_jobs([{'id': 'j1', 'title': 'T'}])
+    store.put_matches([match('j1', 'r1', 50)])
+
+
+def test_migration_builds_the_database_aside(tmp_path):
+    _json_folder(tmp_path)
+    store = make_storage('sqlite', str(tmp_path))
+    assert list(store.list_resumes()) == ['r1'] and store.job_matches('j1')[0]['score'] == 50
+    assert not [name for name in os.listdir(tmp_path) if '.tmp' in name]
+
+
+def test_interrupted_migration_runs_again(tmp_path, monkeypatch):
+    _json_folder(tmp_path)
+
+    def crash(self, entries):
+        raise RuntimeError('killed')
+    with monkeypatch.context() as patched:
+        patched.setattr(SqliteStorage, 'put_matches', crash)
+        with pytest.raises(RuntimeError):
+            make_storage('sqlite', str(tmp_path))
+    assert not os.path.exists(tmp_path / 'app.db')
+    store = make_storage('sqlite', str(tmp_path))
+    assert len(store.job_matches('j1')) == 1
+
+
+def test_match_changes_follow_writes(storage):
+    storage.put_matches([match('j1', 'r1', 10), match('j1', 'r2', 20), match('j2', 'r1', 30)])
+    entries, after, more = storage.match_changes(0, 2)
+    assert [(e['job_id'], e['resume_id'], e['seq']) for e in entries] == [('j1', 'r1', 1), ('j1', 'r2', 2)]
+    assert (after, more) == (2, True)
+    assert storage.match_changes(after, 2) == ([storage.job_matches('j2')[0]], 3, False)
+    # a rescored pair moves to the end of the log, once
+    storage.put_matches([match('j1', 'r1', 15)])
+    entries, after, more = storage.match_changes(0)
+    assert [(e['job_id'], e['resume_id'], e['seq']) for e in entries] == [('j1', 'r2', 2), ('j2', 'r1', 3),
+                                                                          ('j1', 'r1', 4)]
+    assert [e['seq'] for e in storage.match_changes(0, job_id='j1')[0]] == [2, 4]
+    assert [e['seq'] for e in storage.match_changes(0, resume_id='r1')[0]] == [3, 4]
+    assert storage.match_changes(4) == ([], 4, False)
+    assert storage.last_change_seq() == 4
+
+
+def test_backfill_upgrades_records_once_when_read(storage):
+    storage.put_resumes([{'id': 'r1', 'v': 1}, {'id': 'r2', 'v': 2}, {'id': 'r3', 'v': 1}])
+    storage.put_jobs([{'id': 'j1', 'v': 1}])
+    upgraded = []
+
+    def upgrade(record):
+        upgraded.append(record['id'])
+        record['v'] = 2
+    store = BackfillStorage(storage, {'resumes': upgrade, 'jobs': upgrade}, lambda record: record['v'] < 2)
+    assert upgraded == []
+    assert store.get_resume('r1') == {'id': 'r1', 'v': 2} and store.get_resume('missing') is None
+    assert storage.get_resume('r1') == {'id': 'r1', 'v': 2}
+    assert store.records_page('resumes', 2) == ({'r1': {'id': 'r1', 'v': 2}, 'r2': {'id': 'r2', 'v': 2}},
+                                                store.records_page('resumes', 2)[1])
+    assert list(store.list_resumes().items()) == [(f"r{n}", {'id': f"r{n}", 'v': 2}) for n in (1, 2, 3)]
+    assert list(storage.list_resumes()) == ['r1', 'r2', 'r3']
+    assert store.list_jobs() == {'j1': {'id': 'j1', 'v': 2}}
+    assert upgraded == ['r1', 'r3', 'j1']